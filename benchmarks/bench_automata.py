@@ -76,28 +76,26 @@ def formats_1_with_cycle() -> timed_auto.TimedAutomaton:
     ]
 
     return creators.timed_automaton_creator({
-        "transitions": [
-                linear_transition_constructor(automaton_partial_data),
-            ] + [{
-                "start_location": 1,
-                "end_location": 1,
-                "data": [{
-                    "action": "cycle",
-                    "guard": {
+        "transitions": linear_transition_constructor(automaton_partial_data) + [{
+            "start_location": 1,
+            "end_location": 1,
+            "data": [{
+                "action": "cycle",
+                "guard": {
+                    "type": "linear",
+                    "constraints": [{
                         "type": "linear",
-                        "constraints": [{
-                            "type": "linear",
-                            "data": {
-                                "lower_bound": 1,
-                                "upper_bound": + inf,
-                                "clock_index": 0
-                            }
+                        "data": {
+                            "lower_bound": 1,
+                            "upper_bound": + inf,
+                            "clock_index": 0
                         }
-                        ],
-                    },
-                    "resets": [1],
-                }],
+                    }
+                    ],
+                },
+                "resets": [1],
             }],
+        }],
         "init_location": 0,
         "goal_location": 2,
         "number_clocks": 2
@@ -9,21 +9,25 @@ import pyrobustness.runs.opponentstrategy as opponent_strategy
 
 def three_clock_automata_1_explo(interval_sampling_precision: int,
                                  valuation: Valuation,
-                                 location: Location):
+                                 location: Location,
+                                 value_only: bool = False):
     return explorer.Backtracking(ta=three_clock_automata_1(),
                                  start=timed_auto.Configuration(location=location, valuation=valuation),
                                  strategy_opponent=opponent_strategy.worst_case_branch_free_opponent_strategy(),
                                  interval_sampling_step=Fraction(1, interval_sampling_precision),
-                                 to_print=False
+                                 to_print=False,
+                                 value_only=value_only
                                  )
 
 
 def three_clock_automata_2_explo(interval_sampling_precision: int,
                                  valuation: Valuation,
-                                 location: Location):
+                                 location: Location,
+                                 value_only: bool = False):
     return explorer.Backtracking(ta=three_clock_automata_2(),
                                  start=timed_auto.Configuration(location=location, valuation=valuation),
                                  strategy_opponent=opponent_strategy.worst_case_branch_free_opponent_strategy(),
                                  interval_sampling_step=Fraction(1, interval_sampling_precision),
-                                 to_print=False
+                                 to_print=False,
+                                 value_only=value_only
                                  )
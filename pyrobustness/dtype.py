@@ -1,16 +1,35 @@
 import math
 from fractions import Fraction
-from typing import Union, List
+from typing import Union, List, Tuple
 
 from pyrobustness.ta import exceptions as exceptions
 
 Delay = Union[int, float, Fraction]  # float to allow math.inf
 Valuation = List[Delay]
+# The hashable form of a valuation
+FrozenValuation = Tuple[Delay, ...]
 Reset = List[int]
 Action = str
 Sampling_Step = Union[int, Fraction]
 Location = Union[int, str]
 
+# The delays and the valuations are checked once, where they enter the
+# library (the creators, TimedAutomaton.check_configuration and the explorers):
+# the methods called during the search (guard checks, enabled delays, interval
+# membership) trust them. True (see set_debug_checks) brings back the checks
+# of these methods on each call.
+DEBUG_CHECKS = False
+
+
+def set_debug_checks(enabled: bool) -> None:
+    """
+    enables or disables the checks of the delays and of the valuations on
+    each call of the internal methods (see DEBUG_CHECKS).
+    :param enabled: True to check on each call
+    """
+    global DEBUG_CHECKS
+    DEBUG_CHECKS = enabled
+
 
 def check_delay_type(delay: Delay) -> None:
     """
@@ -20,4 +39,14 @@ def check_delay_type(delay: Delay) -> None:
     """
     if type(delay) is not Fraction and type(delay) is not int and not math.isinf(delay):
         raise exceptions.WrongType(element="delay=" + str(delay),
-                                   right_type="integer or Fraction, or math.inf")
\ No newline at end of file
+                                   right_type="integer or Fraction, or math.inf")
+
+
+def check_valuation(valuation: Valuation) -> None:
+    """
+    check the type of each clock value of valuation (see check_delay_type)
+    :param valuation: array_like
+    :return:
+    """
+    for value in valuation:
+        check_delay_type(value)
\ No newline at end of file
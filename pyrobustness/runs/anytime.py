@@ -0,0 +1,158 @@
+# coding=utf-8
+"""
+==================================================
+Anytime explorer module
+==================================================
+This module runs the search of explorer.Backtracking under a wall-clock or
+node budget, and reports the best trace found so far (the incumbent) as soon
+as it improves.
+
+The game is searched with coarse sampling steps first: interval_sampling_step
+* 2 ** levels, ..., interval_sampling_step * 2, interval_sampling_step. A
+coarse step is a multiple of the finer ones, so its sampled intervals are
+also sampled by them: the permissiveness only increases from a step to the
+next one. The permissiveness proved with a step is given as the alpha of the
+search with the next one, which only looks for better traces.
+
+Each search is run by iterative.IterativeBacktracking, by chunks of nodes:
+between two chunks the budget is checked and the best trace of the root
+among its moves already explored becomes the incumbent if it is better.
+
+Classes:
+------
+Incumbent
+AnytimeBacktracking
+------
+"""
+from __future__ import annotations  # For forward reference typing
+
+import math
+import time
+from typing import Callable, Iterator, List, NamedTuple, Optional, Union
+
+import pyrobustness.runs.explorer as explorer
+import pyrobustness.runs.iterative as iterative
+from pyrobustness.dtype import Delay
+
+Configuration = explorer.Configuration
+TimedAutomaton = explorer.TimedAutomaton
+AnyTrace = Union[explorer.Trace, explorer.ValueTrace]
+
+
+class Incumbent(NamedTuple):
+    """
+    A trace found by the anytime search. permissiveness is a lower bound of
+    the permissiveness with the sampling step step, equal to it if exact
+    (the search with this step is finished).
+    """
+    permissiveness: float
+    trace: AnyTrace
+    step: Delay
+    exact: bool
+
+
+class AnytimeBacktracking(object):
+    """
+    Anytime search of the permissiveness of a configuration, see
+    incumbents and search.
+    :param ta: the timed automaton
+    :param start: the start configuration
+    :param strategy_opponent: the strategy of the opponent
+    :param interval_sampling_step: the finest sampling step
+    :param levels: the number of coarser steps searched first
+    :param time_budget: the wall-clock budget in seconds, None for no limit
+    :param node_budget: the number of explored nodes, None for no limit
+    :param chunk_nodes: the number of nodes explored between two checks of
+    the budget and of the incumbent
+    :param kwargs: the other parameters of explorer.Backtracking
+    """
+
+    def __init__(self, ta: TimedAutomaton, start: Configuration, strategy_opponent,
+                 interval_sampling_step: Delay, levels: int = 3, time_budget: Optional[float] = None,
+                 node_budget: Optional[int] = None, chunk_nodes: int = 100, **kwargs):
+        self.ta = ta
+        self.start = start
+        self.strategy_opponent = strategy_opponent
+        self.interval_sampling_step = interval_sampling_step
+        self.levels = levels
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        self.chunk_nodes = chunk_nodes
+        self.kwargs = kwargs
+        self.best: Optional[Incumbent] = None
+        # The finest step whose search is finished
+        self.proven_step: Optional[Delay] = None
+        self.nodes = 0
+        self.finished = False
+
+    def steps(self) -> List[Delay]:
+        """
+        returns the sampling steps of the searches, from the coarsest one.
+        """
+        return [self.interval_sampling_step * 2 ** level for level in range(self.levels, -1, -1)]
+
+    def remaining_nodes(self, started: float) -> Optional[int]:
+        """
+        returns the number of nodes to explore before the next check, 0 if
+        the budget is exhausted.
+        """
+        if self.time_budget is not None and time.monotonic() - started >= self.time_budget:
+            return 0
+        if self.node_budget is None:
+            return self.chunk_nodes
+        return max(0, min(self.chunk_nodes, self.node_budget - self.nodes))
+
+    def incumbents(self, to_print=False) -> Iterator[Incumbent]:
+        """
+        Run the searches and yield the incumbent each time it improves, and
+        once more at the end of the search of each step (exact incumbent).
+        The generator stops at the end of the search with the finest step or
+        when the budget is exhausted; self.best is then the best incumbent.
+        :param to_print: True to log the explorations
+        :return: a generator of Incumbent
+        """
+        started = time.monotonic()
+        for step in self.steps():
+            explo = iterative.IterativeBacktracking(ta=self.ta, start=self.start,
+                                                    strategy_opponent=self.strategy_opponent,
+                                                    interval_sampling_step=step, **self.kwargs)
+            explo.start_search(to_print, alpha=-math.inf if self.best is None else self.best.permissiveness)
+            while True:
+                chunk = self.remaining_nodes(started)
+                if chunk == 0:
+                    return
+                nodes = explo.state.nodes
+                result = explo.resume_search(max_nodes=chunk)
+                self.nodes += explo.state.nodes - nodes
+                if result is not None:
+                    break
+                trace = explo.incumbent()
+                if trace is not None and self.improves(trace):
+                    self.best = Incumbent(permissiveness=trace.compute_trace_permissiveness(), trace=trace,
+                                          step=step, exact=False)
+                    yield self.best
+            # A result not better than the alpha only bounds the permissiveness
+            # from above: the one of the coarser step is then exact here too
+            trace = result if self.improves(result) else self.best.trace
+            self.best = Incumbent(permissiveness=trace.compute_trace_permissiveness(), trace=trace,
+                                  step=step, exact=True)
+            self.proven_step = step
+            yield self.best
+        self.finished = True
+
+    def improves(self, trace: AnyTrace) -> bool:
+        return self.best is None or trace.compute_trace_permissiveness() > self.best.permissiveness
+
+    def search(self, callback: Optional[Callable[[Incumbent], None]] = None, to_print=False) -> Optional[Incumbent]:
+        """
+        Run the anytime search up to its end or to the exhaustion of the
+        budget.
+        :param callback: called with each incumbent of incumbents
+        :param to_print: True to log the explorations
+        :return: the best incumbent, None if the budget was exhausted before
+        any; self.proven_step is the finest step whose search is finished
+        """
+        for incumbent in self.incumbents(to_print):
+            if callback is not None:
+                callback(incumbent)
+        return self.best
@@ -0,0 +1,363 @@
+# coding=utf-8
+"""
+==================================================
+Best-first explorer module
+==================================================
+This module provides an explorer with the API of explorer.Backtracking that
+expands the game in best-first order instead of depth-first.
+
+A partial strategy of the player fixes a move at some of the nodes reached
+from the start configuration; the nodes where it does not yet fix one are
+its open leaves. The permissiveness of any completion of the strategy is at
+most its bound: the min of the permissiveness of the traces already
+reaching the goal and of the optimistic bound of each open leaf, min(prefix
+permissiveness, node_bound) (see Backtracking.node_bound).
+
+The partial strategies are kept in a priority queue by decreasing bound.
+The first one is expanded at its open leaf of smallest bound: it is replaced
+by one strategy for each move of the player at this leaf, whose open leaves
+are the configurations reached by the delays of the opponent. The bounds
+only decrease along an expansion, so the first strategy without open leaves
+has the greatest permissiveness. The search stops there, or once the best
+trace found (the seed of the rollout, see Backtracking.seed_trace) is at
+least the bound of the first strategy of the queue.
+
+A leaf whose value the transposition table knows is closed at once, and
+two leaves with the same memo key only keep the one with the smaller
+prefix permissiveness: they have the same sub-game and the player can play
+the same way at both.
+
+The upper bound of the value of an expanded node is backed up from its
+moves: the greatest over its moves of the min of their length and of the
+bounds of the nodes they reach, kept in upper_table by memo key. When a
+bound decreases, the bounds of the nodes leading to it are revised too.
+
+Classes:
+------
+Leaf
+PartialStrategy
+PendingMoves
+ExpandedNode
+NodeComparison
+BestFirstBacktracking
+------
+"""
+from __future__ import annotations  # For forward reference typing
+
+import heapq
+import itertools
+import math
+from typing import Dict, Hashable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+import pyrobustness.runs.exceptions as exceptions
+import pyrobustness.runs.explorer as explorer
+import pyrobustness.runs.iterative as iterative
+import pyrobustness.runs.moves as moves
+
+Configuration = explorer.Configuration
+Move = explorer.Move
+Trace = explorer.Trace
+ValueTrace = explorer.ValueTrace
+AnyTrace = Union[Trace, ValueTrace]
+
+
+class Leaf(NamedTuple):
+    """
+    An open leaf of a partial strategy: a node where the player has not
+    chosen a move yet, and the optimistic bound of its permissiveness.
+    """
+    bound: float
+    configuration: Configuration
+    trace: AnyTrace
+    key: Hashable
+
+
+class PartialStrategy(NamedTuple):
+    """
+    A partial strategy of the player: worst_trace is the trace of smallest
+    permissiveness reaching the goal (None if there is none yet) and leaves
+    its open leaves, by increasing bound.
+    """
+    bound: float
+    worst_trace: Optional[AnyTrace]
+    leaves: Tuple[Leaf, ...]
+
+
+class PendingMoves(NamedTuple):
+    """
+    The moves of the first leaf of strategy not expanded yet: move (the
+    index-th move of the leaf), then the ones of candidates.
+    """
+    strategy: PartialStrategy
+    candidates: Iterator[Move]
+    move: Optional[Move]
+    index: int
+
+
+class ExpandedNode(object):
+    """
+    What the expansions of a node (by memo key) found: for each of its
+    first moves its bound and the keys of the open leaves reached by the
+    delays of the opponent, and the bound of the other moves (pending).
+    """
+
+    def __init__(self):
+        self.moves: List[Tuple[float, Tuple[Hashable, ...]]] = []
+        self.pending = math.inf
+
+
+class NodeComparison(NamedTuple):
+    """
+    The number of nodes expanded by the best-first explorer and by the
+    depth-first one (iterative.IterativeBacktracking) for the same search.
+    """
+    best_first: int
+    depth_first: int
+
+
+class BestFirstBacktracking(explorer.Backtracking):
+    """
+    Explorer expanding the partial strategies of the player in best-first
+    order, see the module documentation. It takes the same parameters as
+    explorer.Backtracking; nodes is the number of leaves expanded by the
+    last search.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Upper bounds of the values of the sub-games of the nodes, by memo key:
+        # node_bound, then the best bound of their moves once expanded
+        self.upper_table: Dict[Hashable, float] = {}
+        self.expanded: Dict[Hashable, ExpandedNode] = {}
+        self._parents: Dict[Hashable, Set[Hashable]] = {}
+        self.nodes = 0
+
+    def prepare_search(self, to_print=False) -> None:
+        super().prepare_search(to_print)
+        self.upper_table.clear()
+        self.expanded.clear()
+        self._parents.clear()
+        self.nodes = 0
+
+    def open_leaf(self, configuration: Configuration, trace: AnyTrace) -> Union[Leaf, AnyTrace]:
+        """
+        returns the leaf of a node, or its trace if the transposition table
+        knows its value or if the node is a loop. The exceptions of
+        check_fail are raised to the caller.
+        """
+        self.check_fail(trace)
+        if self.loop_cond(configuration, trace):
+            return Trace(data=None, no_trace=True)
+        key = self.memo_key(configuration, trace)
+        if self.memo_opt:
+            memo_trace = self.memo_lookup(key, trace, math.inf)
+            if memo_trace is not None:
+                return memo_trace
+        if key not in self.upper_table:
+            self.upper_table[key] = self.node_bound(self.extract_max_moves(configuration))
+        return Leaf(bound=min(trace.compute_trace_permissiveness(), self.upper_table[key]),
+                    configuration=configuration, trace=trace, key=key)
+
+    def leaf_bound(self, leaf: Leaf) -> float:
+        """
+        returns the bound of a leaf refined by the upper table.
+        """
+        return min(leaf.bound, self.upper_table[leaf.key])
+
+    def strategy(self, worst_trace: Optional[AnyTrace], leaves: List[Leaf]) -> PartialStrategy:
+        sorted_leaves = tuple(sorted(leaves, key=self.leaf_bound))
+        bound = math.inf if worst_trace is None else worst_trace.compute_trace_permissiveness()
+        if sorted_leaves:
+            bound = min(bound, self.leaf_bound(sorted_leaves[0]))
+        return PartialStrategy(bound=bound, worst_trace=worst_trace, leaves=sorted_leaves)
+
+    @staticmethod
+    def worst(worst_trace: Optional[AnyTrace], trace: AnyTrace) -> AnyTrace:
+        if worst_trace is None or trace.compare_trace(worst_trace) < 0:
+            return trace
+        return worst_trace
+
+    def expand(self, strategy: PartialStrategy, move: Move) -> Tuple[Optional[PartialStrategy], Tuple[Hashable, ...]]:
+        """
+        Play move at the first leaf of strategy.
+        :return: the new strategy, None if the cycle bound drops all the
+        delays of the opponent, and the keys of the open leaves reached by
+        the delays
+        """
+        leaf = strategy.leaves[0]
+        worst_trace = strategy.worst_trace
+        leaves: Dict[Hashable, Leaf] = {other.key: other for other in strategy.leaves[1:]}
+        keys = []
+        reached = False
+        # All the delays are played: their order does not matter
+        for delay_move in self.sampling_opponent(move):
+            next_config = moves.next_step(timed_automaton=self.search_ta, configuration=leaf.configuration,
+                                          delay_move=delay_move)
+            next_trace = leaf.trace.add_step(configuration=leaf.configuration, move=move,
+                                             delay=delay_move["step"][0].interval)
+            if self.goal_cond(next_config):
+                worst_trace = self.worst(worst_trace, next_trace)
+                reached = True
+                continue
+            try:
+                next_leaf = self.open_leaf(next_config, next_trace)
+            except exceptions.CycleException:
+                continue
+            reached = True
+            if not isinstance(next_leaf, Leaf):
+                worst_trace = self.worst(worst_trace, next_leaf)
+                continue
+            keys.append(next_leaf.key)
+            if next_leaf.key not in leaves or next_leaf.trace.compare_trace(leaves[next_leaf.key].trace) < 0:
+                # The leaf of smaller prefix permissiveness gives the value of both
+                leaves[next_leaf.key] = next_leaf
+        if not reached:
+            return None, ()
+        return self.strategy(worst_trace, list(leaves.values())), tuple(keys)
+
+    def revise(self, key: Hashable) -> None:
+        """
+        Compute again the upper bound of an expanded node from its moves,
+        and the ones of its ancestors if it decreases.
+        """
+        stack = [key]
+        while stack:
+            current_key = stack.pop()
+            node = self.expanded[current_key]
+            upper = node.pending
+            for bound, keys in node.moves:
+                upper = max(upper, min([bound] + [self.upper_table[child_key] for child_key in keys]))
+            if upper < self.upper_table[current_key]:
+                self.upper_table[current_key] = upper
+                stack.extend(self._parents.get(current_key, ()))
+
+    def pending_bound(self, pending: PendingMoves) -> float:
+        """
+        returns the bound of the strategies of the moves of pending: with the
+        sorted sampling, no move after pending.move is greater.
+        """
+        if not self.sorted_sampling:
+            return pending.strategy.bound
+        return min(pending.strategy.bound, moves.compute_interval_length(pending.move))
+
+    def _best_first(self, current: Configuration, trace: AnyTrace) -> AnyTrace:
+        """
+        Best-first search of the sub-game starting at current.
+        :param current: the current configuration
+        :param trace: the trace leading to current
+        :return: the best trace found
+        """
+        if self.goal_cond(current):
+            return trace
+        best_trace = self.seed_trace(current, trace)
+        root = self.open_leaf(current, trace)
+        if not isinstance(root, Leaf):
+            return root
+        # By decreasing bound, then by increasing number of leaves, the last pushed first
+        queue: List[Tuple[float, int, int, Union[PartialStrategy, PendingMoves]]] = []
+        counter = itertools.count()
+
+        def push(bound: float, entry: Union[PartialStrategy, PendingMoves]):
+            if bound > best_trace.compute_trace_permissiveness():
+                leaves = entry.leaves if isinstance(entry, PartialStrategy) else entry.strategy.leaves
+                heapq.heappush(queue, (-bound, len(leaves), -next(counter), entry))
+
+        push(root.bound, self.strategy(None, [root]))
+        while queue:
+            bound, _, _, entry = heapq.heappop(queue)
+            if -bound <= best_trace.compute_trace_permissiveness():
+                break
+            strategy = entry if isinstance(entry, PartialStrategy) else entry.strategy
+            if not strategy.leaves:
+                # No strategy in the queue can do better
+                return strategy.worst_trace
+            # The leaves expanded since the strategy was pushed may lower its bound
+            refined = self.strategy(strategy.worst_trace, list(strategy.leaves))
+            if refined.bound < strategy.bound:
+                if isinstance(entry, PartialStrategy):
+                    push(refined.bound, refined)
+                else:
+                    # The moves are the ones of the first leaf: the leaves keep their order
+                    entry = entry._replace(strategy=strategy._replace(bound=refined.bound))
+                    push(self.pending_bound(entry), entry)
+                continue
+            if isinstance(entry, PartialStrategy):
+                self.nodes += 1
+                candidates = self.gen_next_poss(strategy.leaves[0].configuration)
+                entry = PendingMoves(strategy=strategy, candidates=candidates, move=next(candidates, None), index=0)
+            self._expand_next(entry, best_trace, push)
+        return best_trace
+
+    def _expand_next(self, pending: PendingMoves, best_trace: AnyTrace, push) -> None:
+        """
+        Expand the next move of pending and push the strategy it gives and
+        the remaining moves. The first expansion of a node to reach a move
+        records it in expanded (see revise).
+        """
+        leaf = pending.strategy.leaves[0]
+        move = pending.move
+        threshold = best_trace.compute_trace_permissiveness()
+        record = None
+        if move is None:
+            pass
+        elif moves.compute_interval_length(move) <= threshold:
+            record = (moves.compute_interval_length(move), ())
+            if self.sorted_sampling:
+                # The next moves are not greater
+                move = None
+        elif not self.bound_poss(move, best_trace):
+            record = (self.move_bound(move), ())
+        else:
+            child, keys = self.expand(pending.strategy, move)
+            if child is not None:
+                record = (moves.compute_interval_length(move), keys)
+                push(child.bound, child)
+        next_move = None if move is None else next(pending.candidates, None)
+        node = self.expanded.setdefault(leaf.key, ExpandedNode())
+        if len(node.moves) == pending.index:
+            if record is not None:
+                node.moves.append(record)
+                for child_key in record[1]:
+                    self._parents.setdefault(child_key, set()).add(leaf.key)
+            else:
+                # No delay is left to the opponent
+                node.moves.append((-math.inf, ()))
+            if next_move is None:
+                node.pending = -math.inf
+            elif self.sorted_sampling:
+                node.pending = moves.compute_interval_length(next_move)
+            self.revise(leaf.key)
+        if next_move is not None:
+            remaining = pending._replace(move=next_move, index=pending.index + 1)
+            push(self.pending_bound(remaining), remaining)
+
+    def backtracking(self, to_print=False, rebuild_trace=False):
+        """
+        Explore the game from the start configuration in best-first order.
+        :param to_print: True to log with print_class
+        :param rebuild_trace: in value only mode, rebuild the best trace of the
+        root after the search (see rebuild_best_trace)
+        :return: the best trace found, the worst one of the opponent against
+        the best strategy of the player
+        """
+        self.prepare_search(to_print)
+        self.best_trace = self._best_first(self.start, self.root_trace())
+        if self.value_only and rebuild_trace:
+            self.best_trace = self.rebuild_best_trace()
+        self.best_trace = self.result_trace(self.best_trace)
+        return self.best_trace
+
+
+def compare_nodes(*args, **kwargs) -> NodeComparison:
+    """
+    Run the same search with the best-first and the depth-first explorers.
+    :param args: the parameters of explorer.Backtracking
+    :param kwargs: the parameters of explorer.Backtracking
+    :return: the numbers of nodes they expanded
+    """
+    best_first = BestFirstBacktracking(*args, **kwargs)
+    best_first.backtracking()
+    depth_first = iterative.IterativeBacktracking(*args, **kwargs)
+    depth_first.start_search()
+    depth_first.resume_search()
+    return NodeComparison(best_first=best_first.nodes, depth_first=depth_first.state.nodes)
@@ -78,3 +78,13 @@ class InfinitePathFound(Exception):
 
 class BoundException(Exception):
     pass
+
+
+class NotOnTickGrid(Exception):
+    def __init__(self, value, denominator):
+        super().__init__("The delay " + value + " is not a multiple of 1/" + str(denominator))
+
+
+class SearchNotStarted(Exception):
+    def __init__(self):
+        super().__init__("resume_search called before start_search")
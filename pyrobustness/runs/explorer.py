@@ -3,16 +3,21 @@ from __future__ import annotations  # For forward reference typing
 
 from fractions import Fraction
 from functools import reduce
+import heapq
+import itertools
 
 import math
-from typing import List, Tuple, Optional, Iterator, Union, NamedTuple
+from typing import Dict, FrozenSet, Hashable, List, Tuple, Optional, Iterator, Union, NamedTuple
 
-from pyrobustness.dtype import Delay
+from pyrobustness.dtype import Delay, Location, Valuation, check_delay_type
 import pyrobustness.ta.guards as guards
 import pyrobustness.ta.interval as interval
 import pyrobustness.ta.timedauto as timed_auto
 import pyrobustness.runs.moves as moves
+import pyrobustness.runs.opponentstrategy as opponentstrategy
 import pyrobustness.runs.exceptions as exceptions
+import pyrobustness.runs.transposition as transposition
+import pyrobustness.runs.ticks as ticks
 import networkx as nx
 import pyrobustness.runs.backtrack_log as btlog
 
@@ -32,22 +37,213 @@ class TraceNode(NamedTuple):
 TraceList = List[TraceNode]
 
 
+class SearchWindow(object):
+    """
+    The alpha-beta window of a node: alpha is the permissiveness the player
+    is already guaranteed elsewhere, beta the one the opponent can already
+    force elsewhere. The opponent loop tightens beta while it runs, that is
+    why the window is mutable.
+    """
+
+    def __init__(self, alpha: float = -math.inf, beta: float = math.inf):
+        self.alpha = alpha
+        self.beta = beta
+
+    def __repr__(self):
+        return "SearchWindow(alpha="+str(self.alpha)+", beta="+str(self.beta)+")"
+
+
+class RolloutEntry(NamedTuple):
+    """
+    The trace of the greedy strategy from a node (see
+    Backtracking.rollout_trace): its permissiveness, its cells after the
+    node (None if it does not reach the goal) and their number.
+    """
+    permissiveness: float
+    suffix: Optional[List]
+    height: int
+
+
+class RolloutFrame(object):
+    """
+    A node of the greedy strategy being played by Backtracking._rollout: the
+    delays of the opponent in the greedy move still to play and the minimal
+    trace found so far (running min).
+    """
+
+    def __init__(self, trace, key, delays: Iterator):
+        self.trace = trace
+        self.key = key
+        self.delays = delays
+        self.minimal_trace = Trace(data=None, no_trace=True)
+
+    def add(self, future_trace) -> bool:
+        """
+        keep future_trace if it is worse for the player than the minimal
+        trace, and returns True if the opponent can not do better: the
+        remaining delays need not be played.
+        """
+        if self.minimal_trace.no_trace or future_trace.compare_trace(self.minimal_trace) < 0:
+            self.minimal_trace = future_trace
+        return self.minimal_trace.compute_trace_permissiveness() == -math.inf
+
+
+class TraceCell(NamedTuple):
+    """
+    A cell of the persistent linked list of a Trace: traces built from the
+    same prefix share its cells. The cell also stores the interval length of
+    its move, the length of the trace and the minimal interval length of its
+    moves.
+    """
+    node: TraceNode
+    previous: Optional[TraceCell]
+    length: int
+    permissiveness: float
+    interval_length: float
+
+
+class VisitCell(NamedTuple):
+    """
+    A visit of a location by a path: the valuation (normalized, see
+    PathVisits), the number of visits of the location up to this one and
+    the previous visit of the location.
+    """
+    valuation: Tuple
+    count: int
+    previous: Optional[VisitCell]
+
+
+class PathVisits(object):
+    """
+    The configurations visited by a path, updated by each step instead of
+    being recomputed from the whole trace: for each tracked location its
+    last visit (a VisitCell chained to the previous ones), and the greatest
+    number of visits of a location. A step only copies the dictionary of the
+    last visits, one entry per tracked location. Like the cells of a Trace,
+    the visits are never modified: the paths sharing a prefix share them.
+    Only the locations of tracked are recorded (all of them if None): the
+    explorer tracks the locations on a cycle, the other ones are visited
+    once at most.
+    With ceilings (see TimedAutomaton.clock_ceilings), the value of a clock
+    above its ceiling is replaced by math.inf: it no longer changes the
+    delays enabled by the guards, the configurations are the same for the
+    game.
+    """
+    __slots__ = ["ceilings", "tracked", "last", "max_count"]
+
+    def __init__(self, ceilings: Optional[Tuple[Delay, ...]] = None, tracked: Optional[FrozenSet[Location]] = None,
+                 last: Optional[Dict[Location, VisitCell]] = None, max_count: int = 0):
+        self.ceilings = ceilings
+        self.tracked = tracked
+        self.last = {} if last is None else last
+        self.max_count = max_count
+
+    def normalize(self, valuation: Valuation) -> Tuple:
+        if self.ceilings is None:
+            return tuple(valuation)
+        return tuple(value if value <= ceiling else math.inf for value, ceiling in zip(valuation, self.ceilings))
+
+    def add(self, configuration: Configuration) -> PathVisits:
+        if self.tracked is not None and configuration.location not in self.tracked:
+            if self.max_count >= 1:
+                return self
+            return PathVisits(self.ceilings, self.tracked, self.last, 1)
+        last = dict(self.last)
+        previous = last.get(configuration.location)
+        count = 1 if previous is None else previous.count + 1
+        last[configuration.location] = VisitCell(valuation=self.normalize(configuration.valuation), count=count,
+                                                 previous=previous)
+        return PathVisits(self.ceilings, self.tracked, last, max(self.max_count, count))
+
+    def count(self, location: Location) -> int:
+        cell = self.last.get(location)
+        return 0 if cell is None else cell.count
+
+    def counts(self) -> FrozenSet[Tuple[Location, int]]:
+        """
+        returns the number of visits of each visited tracked location
+        """
+        return frozenset((location, cell.count) for location, cell in self.last.items())
+
+    def valuations(self, location: Location) -> Iterator[Tuple]:
+        """
+        returns the normalized valuations of the visits of location, from
+        the last one.
+        """
+        cell = self.last.get(location)
+        while cell is not None:
+            yield cell.valuation
+            cell = cell.previous
+
+    def visited(self, configuration: Configuration) -> bool:
+        """
+        returns True if the path already visited configuration (a tracked
+        location), in O(number of visits of its location).
+        """
+        valuation = self.normalize(configuration.valuation)
+        return any(visited == valuation for visited in self.valuations(configuration.location))
+
+    def configurations(self, locations: Iterator[Location]) -> FrozenSet[Tuple[Location, Tuple]]:
+        """
+        returns the visited configurations of the given locations
+        """
+        return frozenset((location, valuation) for location in locations for valuation in self.valuations(location))
+
+
+NO_VISITS = PathVisits()
+
+
 class Trace(object):
 
-    def __init__(self, data: Optional[TraceList], no_trace: bool = False):
-        self.data = data
+    def __init__(self, data: Optional[TraceList], no_trace: bool = False, visits: PathVisits = NO_VISITS):
         self.no_trace = no_trace
+        self.empty_data = data is None
+        self.last: Optional[TraceCell] = None
+        # The configurations of the nodes of the trace
+        self.visits = visits
+        for node in data if data is not None else []:
+            self.last = self._push(self.last, node)
+            self.visits = self.visits.add(node.configuration)
+
+    @staticmethod
+    def _push(last: Optional[TraceCell], node: TraceNode, interval_length: Optional[float] = None) -> TraceCell:
+        if interval_length is None:
+            interval_length = moves.compute_interval_length(node.move)
+        if last is None:
+            return TraceCell(node=node, previous=None, length=1, permissiveness=interval_length,
+                             interval_length=interval_length)
+        return TraceCell(node=node, previous=last, length=last.length + 1,
+                         permissiveness=min(interval_length, last.permissiveness), interval_length=interval_length)
+
+    @classmethod
+    def _from_cell(cls, last: Optional[TraceCell], no_trace: bool, visits: PathVisits) -> Trace:
+        trace = cls.__new__(cls)
+        trace.no_trace = no_trace
+        trace.empty_data = False
+        trace.last = last
+        trace.visits = visits
+        return trace
+
+    @property
+    def data(self) -> Optional[TraceList]:
+        """
+        The list of the nodes of the trace, None if there is no trace. The
+        list is built on each access.
+        """
+        if self.empty_data:
+            return None
+        return self.suffix(0)
 
     def compute_trace_permissiveness(self) -> float:
         """
         Compute the permissiveness associated to a trace
-        :param trace: List[Tuple[Configuration, Interval, Delay]]
         :return: the computed permissiveness of the trace
         """
-        if self.data is None:
+        if self.empty_data:
             return -math.inf
-        return reduce(lambda acc, t: min(moves.compute_interval_length(t.move),
-                                         acc), self.data, math.inf)
+        if self.last is None:
+            return math.inf
+        return self.last.permissiveness
 
     def compare_trace(self, other_trace: Trace) -> float:
         """
@@ -59,39 +255,148 @@ class Trace(object):
         :return: float < 0 if other_trace better than trace, float == 0 if
         other_trace and trace are equivalent, float > 0 else
         """
-        if other_trace.data is None:
+        if other_trace.empty_data:
             return 1.  # = the other_trace is useless or the other_trace is a non reachable path
-        elif self.data is None:
+        elif self.empty_data:
             return -1.
         trace_perm = self.compute_trace_permissiveness()
         other_trace_perm = other_trace.compute_trace_permissiveness()
         return trace_perm - other_trace_perm
 
     def add_node(self, node: TraceNode) -> Trace:
-        return Trace(data=self.data + [node], no_trace=self.no_trace)
+        return Trace._from_cell(self._push(self.last, node), self.no_trace, self.visits.add(node.configuration))
+
+    def add_step(self, configuration: Configuration, move: Move, delay: Delay) -> Trace:
+        return self.add_node(TraceNode(configuration=configuration, move=move, delay=delay))
+
+    def locations(self) -> Iterator:
+        """
+        returns the locations visited by the trace, from the last one.
+        """
+        cell = self.last
+        while cell is not None:
+            yield cell.node.configuration.location
+            cell = cell.previous
+
+    def extend(self, nodes: TraceList) -> Trace:
+        last = self.last
+        visits = self.visits
+        for node in nodes:
+            last = self._push(last, node)
+            visits = visits.add(node.configuration)
+        return Trace._from_cell(last, self.no_trace, visits)
+
+    def extend_cells(self, cells: List[TraceCell]) -> Trace:
+        """
+        returns the trace extended by the nodes of cells taken from another
+        trace, without computing their interval lengths again.
+        """
+        last = self.last
+        visits = self.visits
+        for cell in cells:
+            last = self._push(last, cell.node, cell.interval_length)
+            visits = visits.add(cell.node.configuration)
+        return Trace._from_cell(last, self.no_trace, visits)
+
+    def suffix_cells(self, start: int) -> List[TraceCell]:
+        """
+        returns the cells of the trace from the index start, the prefix is not
+        visited.
+        :param start: the index of the first node
+        :return: a list of TraceCell
+        """
+        cells = []
+        cell = self.last
+        while cell is not None and cell.length > start:
+            cells.append(cell)
+            cell = cell.previous
+        cells.reverse()
+        return cells
+
+    def suffix(self, start: int) -> TraceList:
+        """
+        returns the nodes of the trace from the index start
+        :param start: the index of the first node
+        :return: a list of TraceNode
+        """
+        return [cell.node for cell in self.suffix_cells(start)]
 
     def copy(self):
-        return Trace(self.data[:] if self.data is not None else None, self.no_trace)
+        # The cells are never modified, the copy shares them
+        if self.empty_data:
+            return Trace(None, self.no_trace)
+        return Trace._from_cell(self.last, self.no_trace, self.visits)
 
     def __iter__(self):
-        if self.data is None:
-            return self
-        else:
-            return self.data.__iter__()
-
-    def __next__(self):
-        raise StopIteration
+        return iter(self.suffix(0))
 
     def __len__(self):
-        if self.data is None:
+        if self.last is None:
             return 0
         else:
-            return len(self.data)
+            return self.last.length
 
     def __repr__(self):
         return "Trace(data="+str(self.data)+", no_trace="+str(self.no_trace)+")"
 
 
+class ValueTrace(object):
+    """
+    The trace used by the value only mode: only the length, the
+    permissiveness and the visited configurations (needed by the cycle bound
+    and the loops) are kept, no TraceNode is built. It has the interface of
+    Trace used by the explorer.
+    The value only mode only pays off when the caller does not need the best
+    trace: the gain comes from the cells a Trace builds at each step, which
+    dominate on long traces (formats_0 with 150 transitions: 5.5s against
+    1.8s, see main.experiment_value_only) and are within noise on short ones.
+    Rebuilding the trace (Backtracking.backtracking with rebuild_trace) runs a
+    second pass that gives most of the gain back (4.5s on the same automaton).
+    """
+
+    def __init__(self, length: int = 0, permissiveness: float = math.inf,
+                 visits: PathVisits = NO_VISITS, no_trace: bool = False):
+        self.length = length
+        self.permissiveness = -math.inf if no_trace else permissiveness
+        self.visits = visits
+        self.no_trace = no_trace
+        self.empty_data = no_trace
+
+    def compute_trace_permissiveness(self) -> float:
+        return self.permissiveness
+
+    def compare_trace(self, other_trace: ValueTrace) -> float:
+        if other_trace.empty_data:
+            return 1.
+        elif self.empty_data:
+            return -1.
+        return self.permissiveness - other_trace.permissiveness
+
+    def add_step(self, configuration: Configuration, move: Move, delay: Delay) -> ValueTrace:
+        return ValueTrace(length=self.length + 1,
+                          permissiveness=min(self.permissiveness, moves.compute_interval_length(move)),
+                          visits=self.visits.add(configuration))
+
+    def bounded(self, permissiveness: float) -> ValueTrace:
+        """
+        returns the trace extended by a suffix of the given permissiveness
+        """
+        return ValueTrace(length=self.length, permissiveness=min(self.permissiveness, permissiveness),
+                          visits=self.visits)
+
+    def suffix_cells(self, start: int) -> List[TraceCell]:
+        return []
+
+    def copy(self):
+        return self
+
+    def __len__(self):
+        return self.length
+
+    def __repr__(self):
+        return "ValueTrace(length="+str(self.length)+", permissiveness="+str(self.permissiveness)+")"
+
+
 class Backtracking(object):
 
     def __init__(self, ta: TimedAutomaton,
@@ -103,8 +408,38 @@ class Backtracking(object):
                  print_class=None,
                  trace_bound: int = 50,
                  cycle_bound: int = 50,
-                 filter_opt: bool = True):
+                 filter_opt: bool = True,
+                 memo_opt: bool = True,
+                 alpha_beta_opt: bool = True,
+                 value_only: bool = False,
+                 integer_ticks: bool = False,
+                 compile_opt: bool = True,
+                 sorted_sampling_opt: bool = True,
+                 endpoint_opt: bool = True,
+                 bound_opt: bool = True,
+                 rollout_opt: bool = True,
+                 ordering_opt: bool = False,
+                 loop_opt: bool = True):
+        # The start configuration and the sampling step are checked once here:
+        # the search trusts the delays it computes (see dtype.DEBUG_CHECKS)
+        ta.check_configuration(start)
+        check_delay_type(interval_sampling_step)
+        if not interval_sampling_step > 0:
+            raise ValueError("The interval sampling step must be positive")
+        # With integer_ticks the search works on ticks of 1/D (see ticks.TickScale):
+        # ta, start, the sampling step and the opponent strategy are scaled once
+        # here, and the traces returned by the search are given in time units.
+        self.ticks = ticks.TickScale.for_search(ta, start, interval_sampling_step, strategy_opponent) \
+            if integer_ticks else None
+        if self.ticks is not None:
+            ta = self.ticks.timed_automaton(ta)
+            start = self.ticks.configuration(start)
+            interval_sampling_step = self.ticks.to_ticks(interval_sampling_step)
+            strategy_opponent = self.ticks.strategy(strategy_opponent)
         self.ta = ta
+        # The moves and the steps of the search read the compiled form of the timed automaton
+        self.compile_opt = compile_opt
+        self.search_ta = ta.compile() if compile_opt else ta
         self.start = start
         self.strategy_opponent = strategy_opponent
         self.interval_sampling_step = interval_sampling_step
@@ -116,6 +451,52 @@ class Backtracking(object):
         self.cycle_bound = cycle_bound
         self.print_class = btlog.BacktrackConsoleLogger() if print_class is None else print_class
         self.filter_opt = filter_opt
+        self.memo_opt = memo_opt
+        self.alpha_beta_opt = alpha_beta_opt
+        # Only worth it when the best trace is not needed (see ValueTrace)
+        self.value_only = value_only
+        # The moves of move_sampling can be generated by non-increasing size: the
+        # first move rejected by filter_poss then ends the loop over the moves
+        self.sorted_sampling = sorted_sampling_opt and strategy_player is moves.move_sampling
+        # Against the branch free opponent the value of a sampled interval only
+        # depends on its length and on the values after its two ends: the
+        # successors are explored once per end delay (see _backtrack_endpoints)
+        self.endpoint_values = endpoint_opt and strategy_player is moves.move_sampling and \
+            getattr(self.strategy_opponent, "factory", None) is \
+            opponentstrategy.worst_case_branch_free_opponent_strategy
+        # The widest path from a location to the goal bounds the permissiveness
+        # of its nodes: the moves that can not beat the best trace are skipped
+        # and a node ends once its best trace reaches its bound (see node_bound)
+        self.bound_opt = bound_opt
+        self.location_bounds = self.ta.widest_path_bounds() if bound_opt else None
+        # The best trace of a node starts as the one of a greedy strategy of the
+        # player (see rollout_trace): a lower bound that the moves must beat
+        self.rollout_opt = rollout_opt
+        self.rollout_table: Dict[Hashable, RolloutEntry] = {}
+        # The moves are tried largest first across all the actions, the ones
+        # that ended a node before first among the moves of the same size (see
+        # order_moves): the history table scores (location, action, interval
+        # length) by the cutoffs they produced, the killer moves are the last
+        # ones per depth. Mostly useful without the sorted sampling, which
+        # already gives the moves largest first. Off by default: on cyclic
+        # automata without the rollout seed, largest first can explore the
+        # cycles much longer than the sampling order
+        self.ordering_opt = ordering_opt
+        self.history_table: Dict[Tuple[Hashable, Hashable, float], int] = {}
+        self.killer_moves: Dict[int, List[Tuple[Hashable, Delay, Delay]]] = {}
+        # A path that comes back to a configuration it already visited (the
+        # clocks above their ceilings being equal) is a loop: the opponent can
+        # repeat it and the goal is never reached, the node is lost for the
+        # player (see loop_cond). The on-path configurations are kept along
+        # the traces (see PathVisits)
+        self.loop_opt = loop_opt
+        self.loop_ceilings = tuple(self.ta.clock_ceilings()) if loop_opt else None
+        self._loop_check = False
+        self._components: Dict[Location, Tuple[Location, ...]] = {}
+        self._cyclic_locations: Optional[FrozenSet[Location]] = None
+        self.transposition_table = transposition.TranspositionTable()
+        self._path_dependent_memo = True
+        self._deepest = 0
 
     def goal_cond(self, current: Configuration) -> bool:
         return current.location == self.ta.goal_location
@@ -129,8 +510,7 @@ class Backtracking(object):
         :param move: a move
         :return: the length of the global interval of the move.
         """
-        move_interval = moves.global_interval(move)
-        return move_interval.right - move_interval.left
+        return moves.compute_interval_length(move)
 
     # @staticmethod
     # def compute_trace_permissiveness(trace: Optional[TraceList]) -> float:
@@ -176,41 +556,82 @@ class Backtracking(object):
         return trace
 
     def check_cycle_bound(self, trace: Trace) -> None:
-        visited_location = {}
-        for t in trace:
-            location = t[0].location
-            visited_location[location] = visited_location.get(location, 0) + 1
-            if visited_location[location] >= self.cycle_bound:
-                self.print_debug(btlog.DebugPart.CYCLE_EXCEPTION, trace=trace, e=None)
-                raise exceptions.CycleException()
+        if trace.visits.max_count >= self.cycle_bound:
+            self.print_debug(btlog.DebugPart.CYCLE_EXCEPTION, trace=trace, e=None)
+            raise exceptions.CycleException()
+
+    def loop_cond(self, current: Configuration, trace: Trace) -> bool:
+        """
+        returns True if current repeats a configuration of the trace leading
+        to it (loop optimization only). The opponent can then play the same
+        delays again and again: the play never reaches the goal and the
+        player has no trace, the node is worth -math.inf.
+        """
+        if not self._loop_check or not trace.visits.visited(current):
+            return False
+        self.print_debug(btlog.DebugPart.CYCLE_EXCEPTION, trace=trace, e=None)
+        return True
 
     def check_fail(self, trace: Trace) -> None:
-        if trace.data is None:
+        if trace.empty_data:
             return
-        elif len(trace.data) >= self.trace_bound:
+        elif len(trace) >= self.trace_bound:
             self.print_debug(btlog.DebugPart.BOUND_EXCEPTION, trace=trace, e=None)
             raise exceptions.BoundException()
 
         self.check_cycle_bound(trace)
 
-    def filter_poss(self, possibility_move: Move, best_trace: Trace) -> bool:
+    def filter_poss(self, possibility_move: Move, best_trace: Trace, alpha: float = -math.inf) -> bool:
         """
         Filter the possibility in order to eliminate path that can not improve
         the result
         :param best_trace:
         :param possibility_move:
+        :param alpha: the permissiveness already guaranteed to the player by
+        an ancestor (alpha-beta optimization only)
         :return: True if the possibility must be treated, False otherwise
         """
 
-        if not self.filter_opt:
+        if not self.filter_opt and not self.alpha_beta_opt:
             # If the filter optimization is not enabled
             return True
 
         global_interval = moves.global_interval(possibility_move)
-        if global_interval.right - global_interval.left > best_trace.compute_trace_permissiveness():
+        if global_interval.right - global_interval.left > max(best_trace.compute_trace_permissiveness(), alpha):
             return True
         return False
 
+    def move_bound(self, move: Move) -> float:
+        """
+        returns an upper bound of the permissiveness of the player through
+        move: the length of its greatest sampled interval and, with bound_opt,
+        the widest path from its target locations to the goal.
+        """
+        length = self.endpoint_length(move)
+        if self.location_bounds is None:
+            return length
+        return min(length, max(self.location_bounds[step.target_location] for step in move["step"]))
+
+    def node_bound(self, max_moves: List[Move]) -> float:
+        """
+        returns an upper bound of the permissiveness of the player at a node
+        whose moves are max_moves (see extract_max_moves): -math.inf if no
+        move can reach the goal, math.inf without bound_opt.
+        """
+        if self.location_bounds is None:
+            return math.inf
+        return reduce(lambda acc, m: max(self.move_bound(m), acc), max_moves, -math.inf)
+
+    def bound_poss(self, possibility_move: Move, best_trace: Trace, alpha: float = -math.inf) -> bool:
+        """
+        Filter the possibility by its move_bound (bound optimization only):
+        unlike filter_poss, the next possibilities may still be greater.
+        :return: True if the possibility must be treated, False otherwise
+        """
+        if self.location_bounds is None:
+            return True
+        return self.move_bound(possibility_move) > max(best_trace.compute_trace_permissiveness(), alpha)
+
     def extract_max_moves(self, current: Configuration) -> \
             List[Move]:
         """
@@ -220,20 +641,85 @@ class Backtracking(object):
         :param current: the current configuration
         :return: a list of moves
         """
-        return moves.moves(self.ta, current)
+        return moves.moves(self.search_ta, current)
 
-    def gen_next_poss(self, current: Configuration) -> Iterator[Move]:
+    def gen_next_poss(self, current: Configuration, max_moves: Optional[List[Move]] = None) -> Iterator[Move]:
         """
         Return a generators of possible moves.
         :param current: our current configuration
+        :param max_moves: the moves of extract_max_moves if already extracted
         :return: a generator of moves.
         """
-        extracted_max_moves = self.extract_max_moves(current)
+        extracted_max_moves = self.extract_max_moves(current) if max_moves is None else max_moves
+        if self.sorted_sampling:
+            yield from heapq.merge(*(moves.sorted_move_sampling(max_move, self.interval_sampling_step, self.bound)
+                                     for max_move in extracted_max_moves),
+                                   key=lambda move: -moves.compute_interval_length(move))
+            return
         for max_move in extracted_max_moves:
             for sampled_moves in self.strategy_player(
                     move=max_move, strat_sampling=self.interval_sampling_step, bound=self.bound):
                 yield sampled_moves
 
+    @staticmethod
+    def history_key(current: Configuration, move: Move) -> Tuple[Hashable, Hashable, float]:
+        return current.location, move["action"], moves.compute_interval_length(move)
+
+    @staticmethod
+    def killer_key(move: Move) -> Tuple[Hashable, Delay, Delay]:
+        move_interval = moves.global_interval(move)
+        return move["action"], move_interval.left, move_interval.right
+
+    def order_moves(self, current: Configuration, trace: Trace,
+                    max_moves: Optional[List[Move]] = None) -> Iterator[Move]:
+        """
+        Return the moves of gen_next_poss largest first across all the
+        actions (ordering optimization only). Among the moves of the same size,
+        the killer moves of the depth of the node come first, then the moves by
+        decreasing history score, the others keeping their order. With the
+        sorted sampling the moves already come by non-increasing size: only the
+        ties are reordered, lazily.
+        :param current: our current configuration
+        :param trace: the trace leading to current
+        :param max_moves: the moves of extract_max_moves if already extracted
+        :return: a generator of moves.
+        """
+        next_poss = self.gen_next_poss(current, max_moves)
+        if not self.ordering_opt:
+            yield from next_poss
+            return
+        killers = self.killer_moves.get(len(trace), [])
+
+        def rank(move: Move) -> Tuple[float, int, int]:
+            killer = self.killer_key(move)
+            return (-moves.compute_interval_length(move),
+                    killers.index(killer) if killer in killers else len(killers),
+                    -self.history_table.get(self.history_key(current, move), 0))
+
+        if not self.sorted_sampling:
+            yield from sorted(next_poss, key=rank)
+            return
+        for _, same_size in itertools.groupby(next_poss, key=moves.compute_interval_length):
+            yield from sorted(same_size, key=rank)
+
+    def record_cutoff(self, current: Configuration, trace: Trace, move: Move) -> None:
+        """
+        Record that move ended the loop over the moves of current (ordering
+        optimization only): its history score grows with the height left
+        below the node, and it becomes the first killer move of its depth.
+        """
+        if not self.ordering_opt:
+            return
+        key = self.history_key(current, move)
+        self.history_table[key] = self.history_table.get(key, 0) + (self.trace_bound - len(trace)) ** 2
+        killers = self.killer_moves.setdefault(len(trace), [])
+        killer = self.killer_key(move)
+        if killer in killers:
+            killers.remove(killer)
+        killers.insert(0, killer)
+        # Two killer moves per depth
+        del killers[2:]
+
     # TODO: Improvement do not take **kwargs strat yet
     # TODO: change Delay into delay moves
     #  completely the trace in the _backtrack_delay function
@@ -247,13 +733,54 @@ class Backtracking(object):
         """
         return self.strategy_opponent(next_poss)
 
+    def estimate_delay(self, next_config: Configuration, next_trace: Trace) -> float:
+        """
+        Cheap optimistic estimate of the permissiveness the player gets after
+        a delay: the exact value if the transposition table knows it,
+        otherwise the size of the greatest interval available at the next
+        configuration.
+        :param next_config: the configuration reached after the delay
+        :param next_trace: the trace leading to next_config
+        :return: an upper bound of the permissiveness of the delay
+        """
+        prefix_permissiveness = next_trace.compute_trace_permissiveness()
+        if self.goal_cond(next_config):
+            return prefix_permissiveness
+        if self.memo_opt:
+            entry = self.transposition_table.peek(self.memo_key(next_config, next_trace))
+            if entry is not None and entry.exact:
+                return min(entry.permissiveness, prefix_permissiveness)
+        return reduce(lambda acc, m: max(moves.compute_interval_length(m), acc),
+                      self.extract_max_moves(next_config), -math.inf)
+
+    def order_delays(self, current: Configuration, trace: Trace,
+                     move: Move) -> List[Tuple[Move, Configuration, Trace]]:
+        """
+        Sample the delays of the opponent and sort them most-damaging-first,
+        so that the opponent loop reaches alpha as soon as possible. The sort
+        is stable: delays with the same estimate keep the sampling order.
+        :param current: the current configuration
+        :param trace: the trace leading to current
+        :param move: the move proposed by the player
+        :return: a list of (delay move, next configuration, next trace)
+        """
+        delays = []
+        for delay_move in self.sampling_opponent(move):
+            next_config = moves.next_step(timed_automaton=self.search_ta, configuration=current, delay_move=delay_move)
+            delay: Delay = delay_move["step"][0].interval
+            next_trace: Trace = trace.add_step(configuration=current, move=move, delay=delay)
+            delays.append((delay_move, next_config, next_trace))
+        if self.alpha_beta_opt:
+            delays.sort(key=lambda d: self.estimate_delay(d[1], d[2]))
+        return delays
+
     # TODO: get back the best strategy for the best strategy of the player.
     def _backtrack_delay(self, current: Configuration, trace: Trace,
-                         move: Move) -> Iterator[Trace]:
-        for delay_move in self.sampling_opponent(move):
-            next_config = moves.next_step(timed_automaton=self.ta, configuration=current, delay_move=delay_move)
+                         move: Move, window: Optional[SearchWindow] = None) -> Iterator[Trace]:
+        if window is None:
+            window = SearchWindow()
+        for delay_move, next_config, next_trace in self.order_delays(current, trace, move):
             delay: Delay = delay_move["step"][0].interval
-            next_trace: Trace = trace.add_node(TraceNode(configuration=current, move=move, delay=delay))
 
             if next_config.location == self.ta.goal_location:
                 self.print_debug(btlog.DebugPart.START_DELAY, trace=trace, delay=delay)
@@ -262,52 +789,202 @@ class Backtracking(object):
             else:
                 self.print_debug(btlog.DebugPart.START_DELAY, trace=trace, delay=delay)
                 try:
-                    yield self._backtrack(next_config, next_trace)
+                    yield self._backtrack(next_config, next_trace, window.alpha, window.beta)
                 except exceptions.CycleException:
                     continue
 
+    def memo_key(self, current: Configuration, trace: Trace):
+        """
+        returns the key of a node in the transposition table. The number of
+        visits of each location is part of the key when the cycle bound can
+        make the value depend on the path. With the loop optimization, the
+        configurations of the path that the node can reach again (the ones of
+        the strongly connected component of its location) are part of it
+        instead: they give these numbers of visits too, a path never visiting
+        a configuration twice.
+        :param current: the configuration of the node
+        :param trace: the trace leading to the node
+        :return: a hashable key
+        """
+        key = (current.location, tuple(current.valuation))
+        if not self._path_dependent_memo:
+            return key
+        if self._loop_check:
+            return key + (trace.visits.configurations(self._components[current.location]),)
+        return key + (trace.visits.counts(),)
+
+    def memo_stats(self):
+        """
+        returns the hit and miss counts of the transposition table
+        """
+        return self.transposition_table.stats()
+
     def _backtrack(self,
                    current: Configuration,
-                   trace: Trace) -> Trace:
+                   trace: Trace,
+                   alpha: float = -math.inf,
+                   beta: float = math.inf) -> Trace:
+        """
+        Explore the sub-game starting at current. With the alpha-beta
+        optimization the result is only exact inside the window: a
+        permissiveness <= alpha is an upper bound, a permissiveness >= beta
+        a lower bound of the real value.
+        :param current: the current configuration
+        :param trace: the trace leading to current
+        :param alpha: the permissiveness already guaranteed to the player
+        :param beta: the permissiveness the opponent can already force
+        :return: the best trace found
+        """
         if self.goal_cond(current):
             self.apply_goal(trace)
         self.check_fail(trace)
+        if self.loop_cond(current, trace):
+            return Trace(data=None, no_trace=True)
+
+        if not self.memo_opt:
+            return self._backtrack_moves(current, trace, alpha, beta)
+
+        key = self.memo_key(current, trace)
+        memo_trace = self.memo_lookup(key, trace, beta)
+        if memo_trace is not None:
+            return memo_trace
 
+        deepest = self._deepest
+        self._deepest = len(trace)
+        best_trace = self._backtrack_moves(current, trace, alpha, beta)
+        self.memo_store(key, trace, alpha, beta, best_trace)
+        self._deepest = max(deepest, self._deepest)
+        return best_trace
+
+    def memo_lookup(self, key, trace: Trace, beta: float) -> Optional[Trace]:
+        """
+        returns the trace given by the transposition table for a node, None if
+        the node has to be explored.
+        :param key: the key of the node
+        :param trace: the trace leading to the node
+        :param beta: the beta of the window of the node
+        :return: a Trace or None
+        """
+        entry = self.transposition_table.lookup(key, trace.compute_trace_permissiveness(),
+                                                self.trace_bound - len(trace),
+                                                beta=beta if self.alpha_beta_opt else math.inf)
+        if entry is None:
+            return None
+        self._deepest = max(self._deepest, len(trace) + entry.height)
+        if entry.suffix is None:
+            return Trace(data=None, no_trace=True)
+        if self.value_only:
+            return trace.bounded(entry.permissiveness)
+        return trace.extend_cells(entry.suffix)
+
+    def memo_store(self, key, trace: Trace, alpha: float, beta: float, best_trace: Trace) -> None:
+        """
+        Store the result of the exploration of a node in the transposition
+        table.
+        :param key: the key of the node
+        :param trace: the trace leading to the node
+        :param alpha: the alpha of the window of the node
+        :param beta: the beta of the window of the node
+        :param best_trace: the trace returned by the exploration
+        """
+        prefix_permissiveness = trace.compute_trace_permissiveness()
+        permissiveness = best_trace.compute_trace_permissiveness()
+        # A fail-low result is only an upper bound of the value: not stored
+        if self.alpha_beta_opt and permissiveness <= alpha and not math.isinf(alpha):
+            return
+        self.transposition_table.store(key, prefix_permissiveness, permissiveness,
+                                       suffix=None if best_trace.empty_data else best_trace.suffix_cells(len(trace)),
+                                       height=self._deepest - len(trace),
+                                       lower_bound_only=self.alpha_beta_opt and
+                                       beta <= permissiveness and beta < prefix_permissiveness)
+
+    def choose_min_trace(self, minimal_trace: Trace, future_trace: Trace,
+                         window: SearchWindow) -> Tuple[Trace, bool]:
+        """
+        Opponent choice between the best trace of a delay and the minimal one
+        found for the other delays.
+        :return: the new minimal trace and True if the other delays can be
+        skipped
+        """
+        if minimal_trace.no_trace:
+            minimal_trace = future_trace
+        elif future_trace.compare_trace(minimal_trace) < 0:
+            # future_trace is more minimal than minimal_trace
+            minimal_trace = future_trace
+
+        permissiveness = minimal_trace.compute_trace_permissiveness()
+        if self.alpha_beta_opt:
+            # The opponent already does better than what the player gets elsewhere
+            window.beta = min(window.beta, permissiveness)
+            return minimal_trace, window.beta <= window.alpha
+        # Short circuit in case the we have a -inf trace
+        return minimal_trace, self.filter_opt and math.isinf(permissiveness) and permissiveness < 0
+
+    def choose_max_trace(self, best_trace: Trace, minimal_trace: Trace, beta: float) -> Tuple[Trace, bool]:
+        """
+        Player choice between the trace of a move and the best one found for
+        the other moves.
+        :return: the new best trace and True if the other moves can be skipped
+        """
+        if best_trace.no_trace:
+            best_trace = minimal_trace
+        elif minimal_trace.compare_trace(best_trace) > 0:
+            # minimal_trace better than best_trace
+            best_trace = minimal_trace
+
+        # With alpha-beta, the opponent will not let the game reach this node
+        return best_trace, self.alpha_beta_opt and best_trace.compute_trace_permissiveness() >= beta
+
+    def _backtrack_moves(self,
+                         current: Configuration,
+                         trace: Trace,
+                         alpha: float = -math.inf,
+                         beta: float = math.inf) -> Trace:
+        max_moves = self.extract_max_moves(current)
+        if self.endpoint_values and all(self.endpoint_move(max_move) for max_move in max_moves):
+            return self._backtrack_endpoints(current, trace, max_moves, alpha, beta)
+        prefix_permissiveness = trace.compute_trace_permissiveness()
         self.print_debug(part=btlog.DebugPart.START_CONFIG,
                          config=current,
                          trace=trace,
-                         perm=trace.compute_trace_permissiveness())
+                         perm=prefix_permissiveness)
 
-        best_trace: Trace = Trace(data=None, no_trace=True)
+        # No move can give more than the permissiveness of the prefix
+        beta = min(beta, prefix_permissiveness)
+        best_trace: Trace = self.seed_trace(current, trace)
         acc_max = []
-        for next_poss in self.gen_next_poss(current):
+        node_bound = self.node_bound(max_moves)
+        cut = self.node_cut(best_trace, node_bound, alpha, beta)
+        for next_poss in [] if cut else self.order_moves(current, trace, max_moves):
             interval_move = moves.global_interval(next_poss)
             self.print_debug(part=btlog.DebugPart.START_INTERVAL,
                              trace=trace,
                              action=next_poss["action"],
                              interval=interval_move)
-            if not self.filter_poss(next_poss, best_trace):
+            if not self.filter_poss(next_poss, best_trace, alpha if self.alpha_beta_opt else -math.inf):
+                self.print_debug(part=btlog.DebugPart.FILTERED_OUT_INTERVAL,
+                                 trace=trace)
+                if self.sorted_sampling:
+                    # The next moves are not greater
+                    break
+                continue
+            if not self.bound_poss(next_poss, best_trace, alpha if self.alpha_beta_opt else -math.inf):
                 self.print_debug(part=btlog.DebugPart.FILTERED_OUT_INTERVAL,
                                  trace=trace)
                 continue
             # Doing the min_trace:
             minimal_trace: Trace = Trace(data=None, no_trace=True)
             acc_min = []  # Debug
-            for future_trace in self._backtrack_delay(current, trace, next_poss):
+            window = SearchWindow(alpha=max(alpha, best_trace.compute_trace_permissiveness()), beta=beta)
+            for future_trace in self._backtrack_delay(current, trace, next_poss, window):
                 permissiveness = future_trace.compute_trace_permissiveness()
                 self.print_debug(part=btlog.DebugPart.END_DELAY,
                                  trace=trace,
                                  perm=permissiveness)
                 acc_min.append(permissiveness)
 
-                if minimal_trace.no_trace:
-                    minimal_trace = future_trace.copy()
-                elif future_trace.compare_trace(minimal_trace) < 0:
-                    # future_trace is more minimal than minimal_trace
-                    minimal_trace = future_trace.copy()
-
-                # Short circuit in case the we have a -inf trace
-                if self.filter_opt and math.isinf(permissiveness) and permissiveness < 0:
+                minimal_trace, cut = self.choose_min_trace(minimal_trace, future_trace, window)
+                if cut:
                     break
 
             permissiveness_interval = minimal_trace.compute_trace_permissiveness()
@@ -322,13 +999,11 @@ class Backtracking(object):
 
             acc_max.append(permissiveness_interval)
             # Doing the max_trace:
-            if best_trace.no_trace:
-                best_trace = minimal_trace
-                # Deepcopy already made
-
-            elif minimal_trace.compare_trace(best_trace) > 0:
-                # minimal_trace better than best_trace
-                best_trace = minimal_trace
+            best_trace, cut = self.choose_max_trace(best_trace, minimal_trace, beta)
+            # No other move can do better than the bound of the node
+            if cut or best_trace.compute_trace_permissiveness() >= node_bound:
+                self.record_cutoff(current, trace, next_poss)
+                break
 
         self.print_debug(part=btlog.DebugPart.END_ALL_INTERVALS,
                          trace=trace,
@@ -337,13 +1012,487 @@ class Backtracking(object):
 
         return best_trace
 
-    def backtracking(self, to_print=False):
+    @staticmethod
+    def endpoint_move(max_move: Move) -> bool:
+        """
+        returns True if _backtrack_endpoints handles the move: a single step
+        on a closed (or empty) interval.
+        """
+        move_interval = moves.global_interval(max_move)
+        return len(max_move["step"]) == 1 and (move_interval.is_empty() or move_interval.closed == "both")
 
+    def endpoint_delays(self, move_interval: Interval, threshold: float) -> Tuple[List[Delay], List[Delay]]:
+        """
+        returns the left ends a + i * step and the right ends b - k * step of
+        the intervals move_sampling samples in [a, b] (b being the bound if
+        the interval is not bounded), keeping only the ends of intervals
+        longer than threshold (the ends of [a, b] are always kept).
+        """
+        left = move_interval.left
+        right = self.bound if math.isinf(move_interval.right) else move_interval.right
+        step = self.interval_sampling_step
+        lefts = [left]
+        rights = [right]
+        while right - lefts[-1] - step > threshold and right - lefts[-1] - step > 0:
+            lefts.append(lefts[-1] + step)
+        while rights[-1] - step - left > threshold and rights[-1] - step - left > 0:
+            rights.append(rights[-1] - step)
+        return lefts, rights
+
+    def endpoint_ends(self, max_move: Move, threshold: float) -> Tuple[Move, List[Delay], List[Delay]]:
+        """
+        returns the move the traces of _backtrack_endpoints go through (max_move,
+        or its longest sampled interval if it is not bounded) and its end
+        delays kept by endpoint_delays for threshold.
+        """
+        move_interval = moves.global_interval(max_move)
+        lefts, rights = self.endpoint_delays(move_interval, threshold)
+        if math.isinf(move_interval.right):
+            # The longest sampled interval, as the first move of move_sampling
+            max_move = self.endpoint_sampled_move(max_move, lefts[0], rights[0])
+        return max_move, lefts, rights
+
+    @staticmethod
+    def endpoint_sampled_move(max_move: Move, left: Delay, right: Delay) -> Move:
+        """
+        returns the sampled move of max_move on the interval [left, right].
+        """
+        return moves.Move(max_move["action"],
+                          [moves.Step(interval=Interval.unchecked(left, right),
+                                      target_location=max_move["step"][0].target_location)])
+
+    def endpoint_step(self, current: Configuration, trace: Trace, max_move: Move,
+                      delay: Delay) -> Tuple[Configuration, Trace]:
+        """
+        returns the configuration and the trace after the opponent chose delay
+        in the interval of max_move.
+        """
+        step = max_move["step"][0]
+        delay_move = moves.Move(max_move["action"], [moves.Step(interval=delay, target_location=step.target_location)])
+        next_config = moves.next_step(timed_automaton=self.search_ta, configuration=current, delay_move=delay_move)
+        return next_config, trace.add_step(configuration=current, move=max_move, delay=delay)
+
+    def endpoint_trace(self, current: Configuration, trace: Trace, max_move: Move, delay: Delay,
+                       alpha: float, beta: float) -> Optional[Trace]:
+        """
+        returns the best trace after the opponent chose delay in the interval
+        of max_move, None if the cycle bound drops the delay. The trace goes
+        through max_move: its permissiveness is min(prefix, |max_move|,
+        future), and min(|J|, permissiveness) is the one through any sampled
+        interval J of max_move ending at delay.
+        """
+        next_config, next_trace = self.endpoint_step(current, trace, max_move, delay)
+        self.print_debug(btlog.DebugPart.START_DELAY, trace=trace, delay=delay)
+        if next_config.location == self.ta.goal_location:
+            self.print_debug(btlog.DebugPart.GOAL_REACHED, trace=trace)
+            return next_trace
+        try:
+            return self._backtrack(next_config, next_trace, alpha, beta)
+        except exceptions.CycleException:
+            return None
+
+    def rebuild_endpoint_trace(self, current: Configuration, trace: Trace, move: Move, delay: Delay,
+                               future_trace: Trace) -> Trace:
+        """
+        returns the trace through the sampled move and delay whose future is
+        the one of future_trace, given by endpoint_trace.
+        """
+        if future_trace.empty_data:
+            return future_trace
+        next_trace = trace.add_step(configuration=current, move=move, delay=delay)
+        if self.value_only:
+            return next_trace.bounded(future_trace.compute_trace_permissiveness())
+        return next_trace.extend_cells(future_trace.suffix_cells(len(trace) + 1))
+
+    def _backtrack_endpoints(self,
+                             current: Configuration,
+                             trace: Trace,
+                             max_moves: List[Move],
+                             alpha: float = -math.inf,
+                             beta: float = math.inf) -> Trace:
+        """
+        _backtrack_moves against the branch free opponent. The opponent
+        answers a sampled interval [a + i * step, b - k * step] of [a, b] by
+        one of its ends, so the successors are explored once for each of the
+        O(k) end delays of [a, b] instead of twice for each of the O(k^2)
+        sampled intervals. The best interval is then the (i, k) maximising
+        min(b - a - (i + k) * step, V(a + i * step), V(b - k * step)), taken
+        by decreasing length until it cannot improve.
+        :param current: the current configuration
+        :param trace: the trace leading to current
+        :param max_moves: the moves of extract_max_moves, see endpoint_move
+        :param alpha: the permissiveness already guaranteed to the player
+        :param beta: the permissiveness the opponent can already force
+        :return: the best trace found
+        """
+        prefix_permissiveness = trace.compute_trace_permissiveness()
+        self.print_debug(part=btlog.DebugPart.START_CONFIG,
+                         config=current,
+                         trace=trace,
+                         perm=prefix_permissiveness)
+
+        beta = min(beta, prefix_permissiveness)
+        best_trace: Trace = self.seed_trace(current, trace)
+        acc_max = []
+        node_bound = self.node_bound(max_moves)
+        cut = self.node_cut(best_trace, node_bound, alpha, beta)
+        for max_move in [] if cut else sorted(max_moves, key=lambda m: -self.endpoint_length(m)):
+            move_interval = moves.global_interval(max_move)
+            if move_interval.is_empty():
+                continue
+            self.print_debug(part=btlog.DebugPart.START_INTERVAL,
+                             trace=trace,
+                             action=max_move["action"],
+                             interval=move_interval)
+            # The intervals not longer than threshold are filtered out, as by filter_poss
+            threshold = max(best_trace.compute_trace_permissiveness(), alpha if self.alpha_beta_opt else -math.inf) \
+                if self.filter_opt or self.alpha_beta_opt else -math.inf
+            if self.move_bound(max_move) <= threshold:
+                self.print_debug(part=btlog.DebugPart.FILTERED_OUT_INTERVAL,
+                                 trace=trace)
+                continue
+            max_move, lefts, rights = self.endpoint_ends(max_move, threshold)
+            # The traces after the end delays, computed on their first use
+            futures = {}
+            best = self.best_endpoint_interval(max_move, lefts, rights, threshold, alpha, beta, futures,
+                                               lambda delay, end_alpha, end_beta:
+                                               self.endpoint_trace(current, trace, max_move, delay,
+                                                                   end_alpha, end_beta))
+            if best is None:
+                continue
+            _, left, right, delay = best
+            if delay is None:
+                # The cycle bound drops both delays
+                minimal_trace = Trace(data=None, no_trace=True)
+            else:
+                minimal_trace = self.rebuild_endpoint_trace(current, trace,
+                                                            self.endpoint_sampled_move(max_move, left, right),
+                                                            delay, futures[delay])
+
+            permissiveness_interval = minimal_trace.compute_trace_permissiveness()
+            self.print_debug(part=btlog.DebugPart.END_INTERVAL,
+                             trace=trace,
+                             perm=permissiveness_interval)
+            acc_max.append(permissiveness_interval)
+            best_trace, cut = self.choose_max_trace(best_trace, minimal_trace, beta)
+            if cut or best_trace.compute_trace_permissiveness() >= node_bound:
+                break
+
+        self.print_debug(part=btlog.DebugPart.END_ALL_INTERVALS,
+                         trace=trace,
+                         acc_max=acc_max,
+                         perm=best_trace.compute_trace_permissiveness())
+        return best_trace
+
+    def best_endpoint_interval(self, max_move: Move, lefts: List[Delay], rights: List[Delay], threshold: float,
+                               alpha: float, beta: float, futures: Dict[Delay, Optional[Trace]],
+                               end_trace) -> Optional[Tuple[float, Delay, Delay, Optional[Delay]]]:
+        """
+        Choose the best sampled interval [lefts[i], rights[k]] of max_move
+        against the branch free opponent (see _backtrack_endpoints).
+        :param max_move: the move, see endpoint_ends
+        :param lefts: the left end delays, see endpoint_ends
+        :param rights: the right end delays, see endpoint_ends
+        :param threshold: the intervals not longer than threshold are filtered out
+        :param alpha: the permissiveness already guaranteed to the player
+        :param beta: the permissiveness the opponent can already force
+        :param futures: the traces after the end delays, filled on their first
+        use by end_trace(delay, alpha, beta), with the window of this first use
+        (None if the cycle bound drops the delay: it is not a choice of the
+        opponent)
+        :return: (permissiveness, left, right, delay) for the best interval
+        [left, right] and the delay the opponent answers (None if the cycle
+        bound drops both), None if no interval is longer than threshold
+        """
+        step = self.interval_sampling_step
+        # No interval of the move does better than its bound
+        move_beta = min(beta, self.move_bound(max_move))
+        # The best (i, k), by decreasing length
+        span = rights[0] - lefts[0]
+        best = None
+        total = 0
+        while total == 0 or (span - total * step > 0 and total < len(lefts) + len(rights) - 1):
+            length = span - total * step
+            bar = threshold if best is None else max(threshold, best[0])
+            # No interval does better than its length, nor than the prefix (beta)
+            if total > 0 and (length <= bar or bar >= move_beta):
+                break
+            for i in range(max(0, total - len(rights) + 1), min(total, len(lefts) - 1) + 1):
+                if bar >= move_beta:
+                    break
+                left, right = lefts[i], rights[total - i]
+                ends = []
+                for delay in (left,) if left == right else (left, right):
+                    if delay not in futures:
+                        # The first use of a delay is its longest interval: the window holds for the next ones
+                        futures[delay] = end_trace(delay, *((max(alpha, bar), min(move_beta, length))
+                                                            if self.alpha_beta_opt else (alpha, beta)))
+                    if futures[delay] is not None:
+                        ends.append((futures[delay].compute_trace_permissiveness(), delay))
+                        if ends[-1][0] <= bar:
+                            break
+                value = min(length, min(ends)[0]) if ends else -math.inf
+                if best is None or value > best[0]:
+                    best = (value, left, right, min(ends)[1] if ends else None)
+                    bar = max(threshold, value)
+            total += 1
+        return best
+
+    def endpoint_length(self, max_move: Move) -> float:
+        """
+        returns the length of the greatest interval sampled in max_move.
+        """
+        move_interval = moves.global_interval(max_move)
+        if move_interval.is_empty():
+            return -math.inf
+        right = self.bound if math.isinf(move_interval.right) else move_interval.right
+        return right - move_interval.left
+
+    def greedy_move(self, current: Configuration, max_moves: List[Move]) -> Optional[Move]:
+        """
+        returns the move of the greedy strategy of the player: the greatest
+        sampled interval of the move with the greatest move_bound, None if no
+        move can reach the goal.
+        """
+        max_moves = [max_move for max_move in max_moves if not moves.global_interval(max_move).is_empty()]
+        if not max_moves:
+            return None
+        max_move = max(max_moves, key=self.move_bound)
+        if self.move_bound(max_move) == -math.inf:
+            return None
+        sampled_moves = self.gen_next_poss(current, [max_move])
+        if self.sorted_sampling:
+            return next(sampled_moves, None)
+        return max(sampled_moves, key=moves.compute_interval_length, default=None)
+
+    def rollout_trace(self, current: Configuration, trace: Trace) -> Trace:
+        """
+        Play the greedy strategy of the player (see greedy_move) from current
+        against all the delays of the opponent. The player may do better, so
+        the permissiveness of the returned trace (the worst one of the
+        opponent) is a lower bound of the one of the node. The traces are
+        kept in rollout_table: the greedy strategy is played once from each
+        node.
+        :param current: the current configuration
+        :param trace: the trace leading to current
+        :return: the worst trace of the greedy strategy, a trace without data
+        if the opponent can avoid the goal or the trace bound is reached
+        """
+        try:
+            return self._rollout(current, trace)
+        except exceptions.BoundException:
+            return Trace(data=None, no_trace=True)
+
+    def _rollout(self, current: Configuration, trace: Trace) -> Trace:
+        # The greedy strategy is played against all the delays of the
+        # opponent: the nodes are kept on an explicit stack, the rollout is
+        # not limited by the Python recursion limit (see iterative)
+        node = self._enter_rollout(current, trace)
+        if not isinstance(node, RolloutFrame):
+            return node
+        stack = [node]
+        while stack:
+            frame = stack[-1]
+            child = None
+            for delay_move, next_config, next_trace in frame.delays:
+                try:
+                    child = self._enter_rollout(next_config, next_trace)
+                except exceptions.CycleException:
+                    continue
+                if isinstance(child, RolloutFrame):
+                    break
+                stop = frame.add(child)
+                child = None
+                if stop:
+                    break
+            if child is not None:
+                stack.append(child)
+                continue
+            stack.pop()
+            future_trace = self._exit_rollout(frame)
+            if not stack:
+                return future_trace
+            if stack[-1].add(future_trace):
+                stack[-1].delays = iter(())
+
+    def _enter_rollout(self, current: Configuration, trace: Trace) -> Union[Trace, RolloutFrame]:
+        """
+        returns the trace of the greedy strategy from current if it is known
+        without playing it, the frame playing it otherwise.
+        """
+        if self.goal_cond(current):
+            return trace
+        self.check_fail(trace)
+        if self.loop_cond(current, trace):
+            return Trace(data=None, no_trace=True)
+        key = self.memo_key(current, trace)
+        entry = self.rollout_table.get(key)
+        if entry is None or len(trace) + entry.height >= self.trace_bound:
+            move = self.greedy_move(current, self.extract_max_moves(current))
+            delays = [] if move is None else self.order_delays(current, trace, move)
+            return RolloutFrame(trace, key, iter(delays))
+        return self._rollout_result(trace, entry)
+
+    def _exit_rollout(self, frame: RolloutFrame) -> Trace:
+        """
+        keep the minimal trace of frame in rollout_table and returns the trace
+        of the greedy strategy from its node.
+        """
+        minimal_trace = frame.minimal_trace
+        trace = frame.trace
+        entry = RolloutEntry(permissiveness=minimal_trace.compute_trace_permissiveness(),
+                             suffix=None if minimal_trace.empty_data else minimal_trace.suffix_cells(len(trace)),
+                             height=len(minimal_trace) - len(trace))
+        self.rollout_table[frame.key] = entry
+        return self._rollout_result(trace, entry)
+
+    def _rollout_result(self, trace: Trace, entry: RolloutEntry) -> Trace:
+        if entry.suffix is None:
+            return Trace(data=None, no_trace=True)
+        if self.value_only:
+            return trace.bounded(entry.permissiveness)
+        return trace.extend_cells(entry.suffix)
+
+    def seed_trace(self, current: Configuration, trace: Trace) -> Trace:
+        """
+        returns the trace a node starts with as its best trace: the one of
+        rollout_trace with the rollout optimization, a trace without data
+        otherwise.
+        """
+        if not self.rollout_opt:
+            return Trace(data=None, no_trace=True)
+        return self.rollout_trace(current, trace)
+
+    def node_cut(self, best_trace: Trace, node_bound: float, alpha: float, beta: float) -> bool:
+        """
+        returns True if the moves of a node need not be explored: none of
+        them can beat alpha (fail low), or the best trace the node starts
+        with already reaches beta or the bound of the node.
+        """
+        permissiveness = best_trace.compute_trace_permissiveness()
+        if self.alpha_beta_opt and (node_bound <= alpha or permissiveness >= beta):
+            return True
+        return permissiveness >= node_bound
+
+    def rollout(self, to_print=False) -> Union[Trace, ValueTrace]:
+        """
+        Fast approximate answer: the trace of the greedy strategy of the
+        player from the start configuration (see rollout_trace). Its
+        permissiveness is a lower bound of the one of backtracking.
+        :param to_print: True to log with print_class
+        :return: the trace, a ValueTrace in value only mode
+        """
+        self.prepare_search(to_print)
+        return self.result_trace(self.rollout_trace(self.start, self.root_trace()))
+
+    def root_visits(self) -> PathVisits:
+        return PathVisits(self.loop_ceilings, self._cyclic_locations)
+
+    def root_trace(self) -> Union[Trace, ValueTrace]:
+        if self.value_only:
+            return ValueTrace(visits=self.root_visits())
+        return Trace([], visits=self.root_visits())
+
+    def prepare_search(self, to_print=False) -> None:
+        """
+        Check the timed automaton and reset the state of the explorer before
+        a search.
+        :param to_print: True to log the exploration with print_class
+        """
         try:
             self.ta.existence_infinite_weighted_path(location=self.start.location)
         except nx.NetworkXUnbounded:
             raise exceptions.InfinitePathFound
 
         self.to_print = to_print
-        self.best_trace = self._backtrack(self.start, Trace([]))
+        self.transposition_table.set_context((self.interval_sampling_step, self.bound, self.strategy_opponent,
+                                              self.strategy_player, self.cycle_bound, self.value_only,
+                                              self.loop_opt))
+        self.rollout_table.clear()
+        self.history_table.clear()
+        self.killer_moves.clear()
+        # The cycle bound only matters for the memo if a location can be visited twice
+        cyclic = not nx.is_directed_acyclic_graph(self.ta)
+        self._path_dependent_memo = self.cycle_bound <= 1 or cyclic
+        # Only the cycles let a path visit a configuration twice
+        self._loop_check = self.loop_opt and cyclic
+        self._components = {location: tuple(component) for component in nx.strongly_connected_components(self.ta)
+                            for location in component}
+        # The locations on a cycle: the only ones a path can visit twice
+        self._cyclic_locations = frozenset(location for location, component in self._components.items()
+                                           if len(component) > 1 or self.ta.has_edge(location, location))
+        self._deepest = 0
+
+    def rebuild_best_trace(self) -> Trace:
+        """
+        Second pass of the value only mode: rebuild the best trace from the
+        root by replaying the choices of the players. At each node the move
+        with the greatest value is chosen, then the delay with the smallest
+        one; the values of the successors are computed by value only searches,
+        mostly answered by the transposition table.
+        :return: the best trace of the root
+        """
+        current = self.start
+        trace = Trace([], visits=self.root_visits())
+        value_trace = ValueTrace(visits=self.root_visits())
+        while not self.goal_cond(current):
+            best = None
+            for next_poss in self.gen_next_poss(current):
+                if best is not None and moves.compute_interval_length(next_poss) <= best[0]:
+                    continue
+                worst = None
+                for delay_move, next_config, next_value_trace in self.order_delays(current, value_trace, next_poss):
+                    try:
+                        if self.goal_cond(next_config):
+                            permissiveness = next_value_trace.compute_trace_permissiveness()
+                        else:
+                            permissiveness = self._backtrack(next_config, next_value_trace).compute_trace_permissiveness()
+                    except exceptions.CycleException:
+                        continue
+                    if worst is None or permissiveness < worst[0]:
+                        worst = (permissiveness, delay_move, next_config, next_value_trace)
+                if worst is not None and (best is None or worst[0] > best[0]):
+                    best = (worst[0], next_poss) + worst[1:]
+            if best is None or best[0] == -math.inf:
+                return Trace(data=None, no_trace=True)
+            _, next_poss, delay_move, next_config, value_trace = best
+            trace = trace.add_step(configuration=current, move=next_poss, delay=delay_move["step"][0].interval)
+            current = next_config
+        return trace
+
+    def result_trace(self, trace: Union[Trace, ValueTrace]) -> Union[Trace, ValueTrace]:
+        """
+        returns a trace of the search in time units, its delays and interval
+        bounds given as Fraction: with integer_ticks they are converted back
+        from ticks, otherwise the int values the search left (see
+        Interval.unchecked) are converted.
+        """
+        if trace.empty_data:
+            return trace
+        scale = ticks.UNIT_SCALE if self.ticks is None else self.ticks
+        if isinstance(trace, ValueTrace):
+            return ValueTrace(length=trace.length, permissiveness=scale.from_ticks(trace.permissiveness),
+                              visits=trace.visits)
+        return Trace([TraceNode(configuration=scale.configuration_from_ticks(node.configuration),
+                                move=scale.move_from_ticks(node.move),
+                                delay=scale.from_ticks(node.delay))
+                      for node in trace], no_trace=trace.no_trace)
+
+    def backtracking(self, to_print=False, rebuild_trace=False):
+        """
+        Explore the game from the start configuration.
+        :param to_print: True to log the exploration with print_class
+        :param rebuild_trace: in value only mode, rebuild the best trace of the
+        root after the search (see rebuild_best_trace); this second pass costs
+        most of what the value only mode saved, use the default mode when the
+        trace is needed
+        :return: the best trace found, a ValueTrace in value only mode unless
+        rebuild_trace is True
+        """
+
+        self.prepare_search(to_print)
+        self.best_trace = self._backtrack(self.start, self.root_trace())
+        if self.value_only and rebuild_trace:
+            self.best_trace = self.rebuild_best_trace()
+        self.best_trace = self.result_trace(self.best_trace)
         return self.best_trace
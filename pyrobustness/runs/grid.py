@@ -0,0 +1,318 @@
+# coding=utf-8
+"""
+==================================================
+Grid permissiveness module
+==================================================
+This module computes, for an acyclic timed automaton, the sampled
+permissiveness of explorer.Backtracking (player moves sampled by
+moves.move_sampling, worst case branch free opponent) for every valuation of
+a grid at once, instead of running a forward search for each start
+valuation.
+
+The valuations are integer ticks of 1/D, D being the lcm of the
+denominators of the sampling step, of the guard constants and of the grid
+step (see ticks.TickScale). A clock above its ceiling (its greatest guard
+constant) no longer changes which guards are enabled, so each clock only
+takes the values 0, ..., ceiling + 1 tick: the grid is finite.
+
+The locations are processed backwards from the goal location. For an edge,
+the enabled delays [a, b] of every grid point are computed by one call to
+CompiledTimedAutomaton.enabled_delays_batch. The sampled intervals are
+[a + i * step, b - k * step] (b is the bound of the explorer if the guard
+has no upper bound) and the opponent picks one of their two ends, so the
+permissiveness of the edge is the maximum over (i, k) of
+min(b - a - (i + k) * step, F(a + i * step), F(b - k * step)), F being the
+permissiveness of the target after the delay and the resets. The maximum is
+computed over all the grid points at once, one i at a time. As with the
+explorer, the queries of a location from which a path of unbounded guards
+reaches the goal location raise InfinitePathFound.
+
+ValueIteration extends it to the automata with cycles, by iterating the
+same operator up to its fixed point instead of unrolling the cycles.
+
+Classes:
+------
+EdgeGrid
+GridPermissiveness
+ValueIteration
+------
+"""
+from __future__ import annotations  # For forward reference typing
+
+import math
+from fractions import Fraction
+from typing import Dict, List, NamedTuple, Optional
+
+import networkx as nx
+import numpy
+
+import pyrobustness.runs.exceptions as exceptions
+import pyrobustness.runs.ticks as ticks
+import pyrobustness.ta.timedauto as timed_auto
+from pyrobustness.dtype import Delay, Location, Valuation
+
+TimedAutomaton = timed_auto.TimedAutomaton
+
+
+class EdgeGrid(NamedTuple):
+    """
+    The part of an edge that does not depend on the tables: for each grid
+    valuation n, the length spans[n] of its enabled delays [a, b], and the
+    grid indices left_indices[i, n] and right_indices[k, n] of the
+    valuations reached after the delays a + i * step and b - k * step.
+    """
+    target: Location
+    spans: numpy.ndarray
+    empty: numpy.ndarray
+    left_indices: numpy.ndarray
+    right_indices: numpy.ndarray
+
+
+class GridPermissiveness(object):
+    """
+    Sampled permissiveness of every grid valuation of an acyclic timed
+    automaton with linear guards. The value tables are computed once, on
+    the first query.
+    :param ta: the timed automaton
+    :param interval_sampling_step: the sampling step of the player
+    :param grid_step: the step of the valuations of the grid (the sampling
+    step if None)
+    """
+
+    def __init__(self, ta: TimedAutomaton, interval_sampling_step: Delay, grid_step: Optional[Delay] = None):
+        self.check_automaton(ta)
+        self.ta = ta
+        self.interval_sampling_step = interval_sampling_step
+        self.grid_step = interval_sampling_step if grid_step is None else grid_step
+        self.scale = ticks.TickScale.for_search(ta, timed_auto.Configuration(location=ta.init_location,
+                                                                             valuation=[self.grid_step]),
+                                                interval_sampling_step, None)
+        self.compiled_ta = self.scale.timed_automaton(ta).compile()
+        self.number_clocks = ta.number_clocks
+        self.step = self.scale.to_ticks(interval_sampling_step)
+        # The bound of the explorer: like it, the grid cuts the unbounded
+        # guards there, which is only right if the permissiveness is finite
+        # (see check_location)
+        self.bound = self.scale.to_ticks(ta.maximal_lower_bound() + ta.maximal_upper_bound())
+        self._bounded_locations = set()
+        self.ceilings = self.clock_ceilings()
+        self.shape = tuple(ceiling + 1 for ceiling in self.ceilings)
+        # The (N x clocks) array of the valuations of the grid, in ticks
+        self.valuations = numpy.indices(self.shape).reshape(self.number_clocks, -1).T.astype(numpy.int64)
+        self.tables: Optional[Dict[Location, numpy.ndarray]] = None
+        self._edge_grids: Dict[Location, List[EdgeGrid]] = {}
+
+    def clock_ceilings(self) -> List[int]:
+        """
+        returns, for each clock, the greatest finite guard constant on it
+        plus one tick: the valuations above are all equivalent to it.
+        """
+        ceilings = [0] * self.number_clocks
+        for edges in self.compiled_ta.out_edges:
+            for edge in edges:
+                for clock in range(self.number_clocks):
+                    for constant in (edge.lower[clock], edge.upper[clock]):
+                        if not math.isinf(constant):
+                            ceilings[clock] = max(ceilings[clock], constant)
+        return [ceiling + 1 for ceiling in ceilings]
+
+    def check_automaton(self, ta: TimedAutomaton) -> None:
+        if not nx.is_directed_acyclic_graph(ta):
+            raise exceptions.WrongTimedAutomatonClass(fct=type(self).__name__, ta_class="cyclic ")
+
+    def compute(self) -> Dict[Location, numpy.ndarray]:
+        """
+        Compute the value tables of all the locations, from the goal
+        location backwards. The table of a location holds the permissiveness
+        in ticks (as floats, -inf without any trace) of the valuations of the
+        grid, in the order of self.valuations.
+        :return: a dictionary location -> table
+        """
+        if self.tables is not None:
+            return self.tables
+        tables = {}
+        for location in reversed(list(nx.topological_sort(self.ta))):
+            tables[location] = self.location_table(location, tables)
+        self.tables = tables
+        return tables
+
+    def location_table(self, location: Location, tables: Dict[Location, numpy.ndarray]) -> numpy.ndarray:
+        """
+        returns the table of a location, given the tables of its successors:
+        the maximum of the tables of its outgoing edges.
+        """
+        size = len(self.valuations)
+        if location == self.ta.goal_location:
+            return numpy.full(size, math.inf)
+        table = numpy.full(size, -math.inf)
+        for edge_grid in self.edge_grids(location):
+            target_table = tables[edge_grid.target]
+            if numpy.all(target_table == -math.inf):
+                continue
+            table = numpy.maximum(table, self.edge_table(edge_grid, target_table))
+        return table
+
+    def edge_grids(self, location: Location) -> List[EdgeGrid]:
+        """
+        returns the EdgeGrid of the outgoing edges of a location, built on
+        the first call.
+        """
+        edge_grids = self._edge_grids.get(location)
+        if edge_grids is not None:
+            return edge_grids
+        edge_grids = []
+        edges = self.compiled_ta.edges(location)
+        if edges:
+            enabled = self.compiled_ta.enabled_delays_batch(location, self.valuations)
+            for e, edge in enumerate(edges):
+                empty = enabled.empty[e]
+                left = numpy.where(empty, 0, enabled.lower[e]).astype(numpy.int64)
+                right = numpy.where(empty, 0, numpy.where(numpy.isinf(enabled.upper[e]), self.bound,
+                                                          enabled.upper[e])).astype(numpy.int64)
+                offsets = numpy.arange(int((right - left).max(initial=0)) // self.step + 1,
+                                       dtype=numpy.int64) * self.step
+                edge_grids.append(EdgeGrid(
+                    target=self.compiled_ta.locations[edge.target], spans=right - left, empty=empty,
+                    left_indices=numpy.stack([self.successor_indices(edge.resets, numpy.minimum(left + offset, right))
+                                              for offset in offsets]),
+                    right_indices=numpy.stack([self.successor_indices(edge.resets, numpy.maximum(right - offset, left))
+                                               for offset in offsets])))
+        self._edge_grids[location] = edge_grids
+        return edge_grids
+
+    def successor_indices(self, resets: int, delays: numpy.ndarray) -> numpy.ndarray:
+        """
+        returns the grid indices of the valuations reached by waiting
+        delays[n] from the valuation n of the grid and applying the resets.
+        """
+        valuations = self.valuations + delays[:, None]
+        for clock in range(self.number_clocks):
+            if resets >> clock & 1:
+                valuations[:, clock] = 0
+        numpy.minimum(valuations, self.ceilings, out=valuations)
+        return numpy.ravel_multi_index(valuations.T, self.shape)
+
+    def edge_table(self, edge_grid: EdgeGrid, target_table: numpy.ndarray) -> numpy.ndarray:
+        """
+        returns the permissiveness of the grid valuations through an edge.
+        :param edge_grid: the EdgeGrid of the edge
+        :param target_table: the value table of its target
+        :return: a table
+        """
+        # Permissiveness after the delays a + i * step (lefts) and b - k * step (rights)
+        lefts = target_table[edge_grid.left_indices]
+        rights = target_table[edge_grid.right_indices]
+        offsets = numpy.arange(len(lefts), dtype=numpy.int64) * self.step
+
+        table = numpy.full(len(edge_grid.spans), -math.inf)
+        for i in range(len(lefts)):
+            lengths = edge_grid.spans[None, :] - (i * self.step + offsets)[:, None]
+            valid = lengths > 0
+            if i == 0:
+                valid[0] = True
+            values = numpy.minimum(numpy.minimum(lengths, lefts[i][None, :]), rights)
+            table = numpy.maximum(table, numpy.where(valid, values, -math.inf).max(axis=0))
+        table[edge_grid.empty] = -math.inf
+        return table
+
+    def check_location(self, location: Location) -> None:
+        """
+        The check of Backtracking.prepare_search: raises InfinitePathFound if
+        a path of unbounded guards goes from location to the goal location,
+        the permissiveness of location is then infinite.
+        """
+        if location in self._bounded_locations or location == self.ta.goal_location:
+            return
+        try:
+            self.ta.existence_infinite_weighted_path(location=location)
+        except nx.NetworkXUnbounded:
+            raise exceptions.InfinitePathFound
+        self._bounded_locations.add(location)
+
+    def table(self, location: Location) -> numpy.ndarray:
+        self.check_location(location)
+        return self.compute()[location]
+
+    def permissiveness(self, location: Location, valuation: Valuation) -> Delay:
+        """
+        returns the sampled permissiveness of the configuration (location,
+        valuation), the valuation being on the grid.
+        """
+        index = tuple(min(self.scale.to_ticks(value), ceiling) for value, ceiling in zip(valuation, self.ceilings))
+        value = self.table(location)[numpy.ravel_multi_index(index, self.shape)]
+        if math.isinf(value):
+            return value
+        return Fraction(int(value), self.scale.denominator)
+
+
+class ValueIteration(GridPermissiveness):
+    """
+    Sampled permissiveness of every grid valuation of a timed automaton that
+    may have cycles. The tables are the least fixed point of the max-min
+    operator of GridPermissiveness.location_table: starting from -inf
+    (goal location excepted), the tables of the locations are computed again
+    and again (in place, strongly connected components in reverse
+    topological order) until no value changes. A play that never reaches the
+    goal location has no trace, so the result does not depend on a cycle
+    bound.
+    The values only increase and are taken in a finite set of ticks: the
+    iteration always converges.
+    As with GridPermissiveness, the queries of a location from which a path
+    of unbounded guards reaches the goal location (a cycle included) raise
+    InfinitePathFound.
+    :param ta: the timed automaton
+    :param interval_sampling_step: the sampling step of the player
+    :param grid_step: the step of the valuations of the grid (the sampling
+    step if None)
+    :param tolerance: the iteration stops once no value increases by more
+    than tolerance; the tables are then lower bounds of the fixed point
+    :param max_iterations: the maximal number of iterations, None for no
+    limit
+    """
+
+    def __init__(self, ta: TimedAutomaton, interval_sampling_step: Delay, grid_step: Optional[Delay] = None,
+                 tolerance: Delay = 0, max_iterations: Optional[int] = None):
+        super().__init__(ta, interval_sampling_step, grid_step)
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.iterations = 0
+        self.converged = False
+
+    def check_automaton(self, ta: TimedAutomaton) -> None:
+        # The cycles are handled by the iteration
+        pass
+
+    def location_order(self) -> List[Location]:
+        condensation = nx.condensation(self.ta)
+        return [location for component in reversed(list(nx.topological_sort(condensation)))
+                for location in condensation.nodes[component]["members"]]
+
+    def compute(self) -> Dict[Location, numpy.ndarray]:
+        """
+        Iterate the tables of all the locations up to their fixed point (or
+        up to the tolerance, or max_iterations). The number of iterations is
+        kept in self.iterations, and self.converged tells if the last one
+        changed no value by more than the tolerance.
+        :return: a dictionary location -> table
+        """
+        if self.tables is not None:
+            return self.tables
+        tolerance = self.tolerance * self.scale.denominator
+        tables = {location: numpy.full(len(self.valuations), -math.inf) for location in self.ta.nodes}
+        order = self.location_order()
+        while self.max_iterations is None or self.iterations < self.max_iterations:
+            self.iterations += 1
+            change = 0
+            for location in order:
+                table = self.location_table(location, tables)
+                changed = table != tables[location]
+                if changed.any():
+                    # The values only increase: -inf -> finite is an infinite change
+                    change = max(change, numpy.subtract(table, tables[location], out=numpy.zeros(len(table)),
+                                                        where=changed).max())
+                tables[location] = table
+            if change <= tolerance:
+                self.converged = True
+                break
+        self.tables = tables
+        return tables
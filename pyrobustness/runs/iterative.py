@@ -0,0 +1,314 @@
+# coding=utf-8
+"""
+==================================================
+Iterative explorer module
+==================================================
+This module provides an explorer with the API of explorer.Backtracking that
+does not recurse: the nodes being explored are kept on an explicit stack of
+frames. A player frame holds the iterator over the moves, the best trace
+found so far (running max) and the alpha-beta window of the node. An
+opponent frame holds the iterator over the delays of one move and the
+minimal trace found so far (running min).
+
+The frames make the same choices as the recursive explorer (they share its
+filter, bound, memo and window logic), so both give the same results. The frames
+always loop over the sampled moves: the endpoint values of the recursive
+explorer (endpoint_opt) give the same permissiveness, but may break the ties
+between traces differently. Without
+recursion the trace bound is not limited by the Python recursion limit, and
+a search can be paused after a given number of nodes and resumed later.
+
+Classes:
+------
+PlayerFrame
+OpponentFrame
+SearchState
+IterativeBacktracking
+------
+"""
+from __future__ import annotations  # For forward reference typing
+
+import math
+from typing import Iterator, List, Optional, Tuple, Union
+
+import pyrobustness.runs.backtrack_log as btlog
+import pyrobustness.runs.exceptions as exceptions
+import pyrobustness.runs.explorer as explorer
+import pyrobustness.runs.moves as moves
+
+Configuration = explorer.Configuration
+Move = explorer.Move
+Trace = explorer.Trace
+ValueTrace = explorer.ValueTrace
+AnyTrace = Union[Trace, ValueTrace]
+
+
+class PlayerFrame(object):
+    """
+    A node of the game where the player chooses a move.
+    """
+
+    def __init__(self, current: Configuration, trace: AnyTrace, alpha: float, beta: float,
+                 key, deepest: int, candidates: Iterator[Move], node_bound: float = math.inf):
+        self.current = current
+        self.trace = trace
+        self.alpha = alpha
+        # beta of the window given by the parent, used by the memo
+        self.window_beta = beta
+        # No move can give more than the permissiveness of the prefix
+        self.beta = min(beta, trace.compute_trace_permissiveness())
+        self.key = key
+        self.deepest = deepest
+        self.candidates = candidates
+        # See Backtracking.node_bound
+        self.node_bound = node_bound
+        self.best_trace: AnyTrace = Trace(data=None, no_trace=True)
+        # The move explored by the opponent frame above this one
+        self.move: Optional[Move] = None
+        self.acc_max = []
+
+
+class OpponentFrame(object):
+    """
+    A node of the game where the opponent chooses a delay in a move.
+    """
+
+    def __init__(self, current: Configuration, trace: AnyTrace, move: Move,
+                 candidates: Iterator[Tuple[Move, Configuration, AnyTrace]],
+                 window: explorer.SearchWindow):
+        self.current = current
+        self.trace = trace
+        self.move = move
+        self.candidates = candidates
+        self.window = window
+        self.minimal_trace: AnyTrace = Trace(data=None, no_trace=True)
+        self.acc_min = []
+
+
+class SearchState(object):
+    """
+    The stack of a search, with its result once the stack is empty.
+    """
+
+    def __init__(self):
+        self.frames: List[Union[PlayerFrame, OpponentFrame]] = []
+        self.result: Optional[AnyTrace] = None
+        self.nodes = 0
+
+    def finished(self) -> bool:
+        return not self.frames
+
+
+class IterativeBacktracking(explorer.Backtracking):
+    """
+    Explorer using an explicit stack instead of recursive generators. It
+    takes the same parameters as explorer.Backtracking.
+
+    backtracking() runs a whole search. start_search() and
+    resume_search(max_nodes) run it by chunks of explored nodes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.state: Optional[SearchState] = None
+
+    def start_search(self, to_print=False, alpha: float = -math.inf) -> None:
+        """
+        Start a search from the start configuration without exploring any
+        node; use resume_search to run it.
+        :param to_print: True to log the exploration with print_class
+        :param alpha: a permissiveness already guaranteed to the player: with
+        the alpha-beta optimization the search only looks for better traces,
+        and a result <= alpha is only an upper bound
+        """
+        self.prepare_search(to_print)
+        self.state = SearchState()
+        self.state.result = self._enter(self.state, self.start, self.root_trace(), alpha, math.inf)
+
+    def resume_search(self, max_nodes: Optional[int] = None) -> Optional[AnyTrace]:
+        """
+        Run the search started by start_search.
+        :param max_nodes: the number of nodes to explore before pausing, None
+        to run the search until its end
+        :return: the best trace if the search is finished, None if it paused
+        """
+        if self.state is None:
+            raise exceptions.SearchNotStarted()
+        if not self._run(self.state, max_nodes):
+            return None
+        self.best_trace = self.result_trace(self.state.result)
+        return self.best_trace
+
+    def paused(self) -> bool:
+        return self.state is not None and not self.state.finished()
+
+    def incumbent(self) -> Optional[AnyTrace]:
+        """
+        returns the best trace of the root among its moves already explored
+        by the paused search (in time units), None if there is none.
+        """
+        if not self.paused() or self.state.frames[0].best_trace.empty_data:
+            return None
+        return self.result_trace(self.state.frames[0].best_trace)
+
+    def _backtrack(self,
+                   current: Configuration,
+                   trace: AnyTrace,
+                   alpha: float = -math.inf,
+                   beta: float = math.inf) -> AnyTrace:
+        state = SearchState()
+        state.result = self._enter(state, current, trace, alpha, beta)
+        self._run(state)
+        return state.result
+
+    def _enter(self, state: SearchState, current: Configuration, trace: AnyTrace,
+               alpha: float, beta: float) -> Optional[AnyTrace]:
+        """
+        Start the exploration of a node: returns its trace if it is known
+        without exploring it, otherwise pushes its frame and returns None.
+        The exceptions of check_fail are raised to the caller.
+        """
+        if self.goal_cond(current):
+            self.apply_goal(trace)
+        self.check_fail(trace)
+        if self.loop_cond(current, trace):
+            return Trace(data=None, no_trace=True)
+
+        key = None
+        deepest = self._deepest
+        if self.memo_opt:
+            key = self.memo_key(current, trace)
+            memo_trace = self.memo_lookup(key, trace, beta)
+            if memo_trace is not None:
+                return memo_trace
+            self._deepest = len(trace)
+
+        self.print_debug(part=btlog.DebugPart.START_CONFIG,
+                         config=current,
+                         trace=trace,
+                         perm=trace.compute_trace_permissiveness())
+        max_moves = self.extract_max_moves(current)
+        frame = PlayerFrame(current, trace, alpha, beta, key, deepest, iter([]), self.node_bound(max_moves))
+        frame.best_trace = self.seed_trace(current, trace)
+        if not self.node_cut(frame.best_trace, frame.node_bound, frame.alpha, frame.beta):
+            frame.candidates = self.order_moves(current, trace, max_moves)
+        state.frames.append(frame)
+        state.nodes += 1
+        return None
+
+    def _run(self, state: SearchState, max_nodes: Optional[int] = None) -> bool:
+        """
+        Process the frames of a search.
+        :return: True if the search is finished, False if it paused
+        """
+        budget = None if max_nodes is None else state.nodes + max_nodes
+        result = None
+        while state.frames:
+            # The search only pauses between two nodes, when no result is pending
+            if result is None and budget is not None and state.nodes >= budget:
+                return False
+            frame = state.frames[-1]
+            if isinstance(frame, PlayerFrame):
+                result = self._step_player(state, frame, result)
+            else:
+                result = self._step_opponent(state, frame, result)
+        if result is not None:
+            state.result = result
+        return True
+
+    def _step_player(self, state: SearchState, frame: PlayerFrame,
+                     minimal_trace: Optional[AnyTrace]) -> Optional[AnyTrace]:
+        """
+        Resume a player frame, with the minimal trace of its last move if its
+        opponent frame just finished.
+        :return: the best trace if the frame is finished, None otherwise
+        """
+        if minimal_trace is not None:
+            permissiveness_interval = minimal_trace.compute_trace_permissiveness()
+            self.print_debug(part=btlog.DebugPart.END_INTERVAL,
+                             trace=frame.trace,
+                             perm=permissiveness_interval)
+            frame.acc_max.append(permissiveness_interval)
+            frame.best_trace, cut = self.choose_max_trace(frame.best_trace, minimal_trace, frame.beta)
+            if cut or frame.best_trace.compute_trace_permissiveness() >= frame.node_bound:
+                self.record_cutoff(frame.current, frame.trace, frame.move)
+                return self._leave_player(state, frame)
+
+        for next_poss in frame.candidates:
+            self.print_debug(part=btlog.DebugPart.START_INTERVAL,
+                             trace=frame.trace,
+                             action=next_poss["action"],
+                             interval=moves.global_interval(next_poss))
+            if not self.filter_poss(next_poss, frame.best_trace, frame.alpha if self.alpha_beta_opt else -math.inf):
+                self.print_debug(part=btlog.DebugPart.FILTERED_OUT_INTERVAL,
+                                 trace=frame.trace)
+                if self.sorted_sampling:
+                    # The next moves are not greater
+                    break
+                continue
+            if not self.bound_poss(next_poss, frame.best_trace, frame.alpha if self.alpha_beta_opt else -math.inf):
+                self.print_debug(part=btlog.DebugPart.FILTERED_OUT_INTERVAL,
+                                 trace=frame.trace)
+                continue
+            window = explorer.SearchWindow(alpha=max(frame.alpha, frame.best_trace.compute_trace_permissiveness()),
+                                           beta=frame.beta)
+            frame.move = next_poss
+            state.frames.append(OpponentFrame(frame.current, frame.trace, next_poss,
+                                              iter(self.order_delays(frame.current, frame.trace, next_poss)),
+                                              window))
+            return None
+        return self._leave_player(state, frame)
+
+    def _leave_player(self, state: SearchState, frame: PlayerFrame) -> AnyTrace:
+        self.print_debug(part=btlog.DebugPart.END_ALL_INTERVALS,
+                         trace=frame.trace,
+                         acc_max=frame.acc_max,
+                         perm=frame.best_trace.compute_trace_permissiveness())
+        if self.memo_opt:
+            self.memo_store(frame.key, frame.trace, frame.alpha, frame.window_beta, frame.best_trace)
+            self._deepest = max(frame.deepest, self._deepest)
+        state.frames.pop()
+        return frame.best_trace
+
+    def _step_opponent(self, state: SearchState, frame: OpponentFrame,
+                       future_trace: Optional[AnyTrace]) -> Optional[AnyTrace]:
+        """
+        Resume an opponent frame, with the best trace of its last delay if the
+        player frame of the delay just finished.
+        :return: the minimal trace if the frame is finished, None otherwise
+        """
+        if future_trace is not None and self._consume_delay(frame, future_trace):
+            return self._leave_opponent(state, frame)
+
+        for delay_move, next_config, next_trace in frame.candidates:
+            self.print_debug(btlog.DebugPart.START_DELAY, trace=frame.trace, delay=delay_move["step"][0].interval)
+            if next_config.location == self.ta.goal_location:
+                self.print_debug(btlog.DebugPart.GOAL_REACHED, trace=frame.trace)
+                future_trace = next_trace
+            else:
+                try:
+                    future_trace = self._enter(state, next_config, next_trace, frame.window.alpha, frame.window.beta)
+                except exceptions.CycleException:
+                    continue
+                if future_trace is None:
+                    return None
+            if self._consume_delay(frame, future_trace):
+                return self._leave_opponent(state, frame)
+        return self._leave_opponent(state, frame)
+
+    def _consume_delay(self, frame: OpponentFrame, future_trace: AnyTrace) -> bool:
+        permissiveness = future_trace.compute_trace_permissiveness()
+        self.print_debug(part=btlog.DebugPart.END_DELAY,
+                         trace=frame.trace,
+                         perm=permissiveness)
+        frame.acc_min.append(permissiveness)
+        frame.minimal_trace, cut = self.choose_min_trace(frame.minimal_trace, future_trace, frame.window)
+        return cut
+
+    def _leave_opponent(self, state: SearchState, frame: OpponentFrame) -> AnyTrace:
+        self.print_debug(part=btlog.DebugPart.END_ALL_DELAYS,
+                         trace=frame.trace,
+                         acc_min=frame.acc_min,
+                         perm=frame.minimal_trace.compute_trace_permissiveness())
+        state.frames.pop()
+        return frame.minimal_trace
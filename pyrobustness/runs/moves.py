@@ -10,15 +10,22 @@ Runs module
 
 Classes:
 ------
-None
+Move
+MoveAsInterval
 
 Methods:
 valuation_after_passing_guard
 valuation_after_passing_guard_permissive
 check_continuous_move
 global_interval
+freeze_move
 moves
+compiled_moves
 next_step
+compiled_next_step
+sampled_steps
+move_sampling
+sorted_move_sampling
 move_convertor_permissive_into_delays
 next_permissive_step
 ------
@@ -26,21 +33,105 @@ next_permissive_step
 from __future__ import annotations  # For forward reference typing
 
 import math
-from typing import Union, List, Dict, Optional
+from typing import Any, Union, List, Iterable, Iterator, Optional, Tuple
 from collections import namedtuple
+from collections.abc import Mapping
 
-from pyrobustness.dtype import Delay, Valuation
+from pyrobustness.dtype import Action, Delay, Valuation
 import pyrobustness.ta.interval as interval
 import pyrobustness.ta.timedauto as timed_auto
 import pyrobustness.ta.guards as guards
+import pyrobustness.ta.compiled as compiled
 import pyrobustness.runs.exceptions as exceptions
+import pyrobustness.ta.exceptions as ta_exceptions
 
 Interval = interval.Interval
 Label = guards.Label
 Step = namedtuple("Step", ["interval", "target_location"])
-Move = Dict[str, Union[str, List[Step]]]
 Configuration = timed_auto.Configuration
 TimedAutomaton = timed_auto.TimedAutomaton
+CompiledTimedAutomaton = compiled.CompiledTimedAutomaton
+
+
+class Move(Mapping):
+    """
+    A move: an action and its steps, each an interval (a delay for a delay
+    move) and the target location of the action on it. A move is immutable
+    and hashable; its global interval and the length of it are computed
+    once, on their first use.
+
+    A move is also read as the dictionary {"action": action, "step": steps}
+    that represented the moves before: move["step"][0], dict(move), and the
+    comparisons with such dictionaries work as with them.
+    :param action: the action of the move
+    :param step: the steps of the move, by increasing delays
+    :param interval: the global interval of the steps, if already known
+    """
+    __slots__ = ["action", "step", "_global_interval", "_length"]
+
+    def __init__(self, action: Action, step: Iterable[Step], interval: Optional[Interval] = None):
+        _set(self, "action", action)
+        _set(self, "step", tuple(step))
+        _set(self, "_global_interval", interval)
+        _set(self, "_length", None)
+
+    def __setattr__(self, key, value):
+        raise ta_exceptions.FrozenObjectException(self, key)
+
+    def __delattr__(self, key):
+        raise ta_exceptions.FrozenObjectException(self, key)
+
+    def __reduce__(self):
+        return Move, (self.action, self.step, self._global_interval)
+
+    @property
+    def global_interval(self) -> Interval:
+        """
+        the merge of the intervals of the steps (see global_interval)
+        """
+        if self._global_interval is None:
+            _set(self, "_global_interval", steps_interval(self.step))
+        return self._global_interval
+
+    @property
+    def length(self) -> float:
+        """
+        the length of the global interval (see compute_interval_length)
+        """
+        if self._length is None:
+            interval = self.global_interval
+            _set(self, "_length", interval.right - interval.left)
+        return self._length
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "step":
+            return self.step
+        if key == "action":
+            return self.action
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(("action", "step"))
+
+    def __len__(self) -> int:
+        return 2
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Move):
+            return self.action == other.action and self.step == other.step
+        if isinstance(other, dict):
+            return other.keys() == {"action", "step"} and self.action == other["action"] and \
+                   list(self.step) == list(other["step"])
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self.action, self.step))
+
+    def __repr__(self) -> str:
+        return "Move(action=" + repr(self.action) + ", step=" + repr(list(self.step)) + ")"
+
+
+_set = object.__setattr__
 
 
 class MoveAsInterval(object):
@@ -83,18 +174,12 @@ class MoveAsInterval(object):
                 # Condition: the sampled interval begins in this step (
                 # but does not finish)
 
-                lowest_type = restricted_interval.closed_left
-                highest_type = step.interval.closed_right
-
-                interval_type = Interval.interval_type(
-                    lowest_type, highest_type)
-
                 interval_step.append(
                     Step(
-                        interval=Interval(
+                        interval=Interval.unchecked(
                             restricted_interval.left,
                             step.interval.right,
-                            closed=interval_type),
+                            restricted_interval.closed_left, step.interval.closed_right),
                         target_location=step.target_location
                     )
                 )
@@ -114,16 +199,12 @@ class MoveAsInterval(object):
                             found_starting_step and not restricted_interval.closed_right and
                             restricted_interval.right <= step.interval.right):
                 # Condition: upper bound found
-                lowest_type = step.interval.closed_left
-                highest_type = restricted_interval.closed_right
-                interval_type = Interval.interval_type(
-                    lowest_type, highest_type)
                 interval_step.append(
                     Step(
-                        interval=Interval(
+                        interval=Interval.unchecked(
                             step.interval.left,
                             restricted_interval.right,
-                            closed=interval_type),
+                            step.interval.closed_left, restricted_interval.closed_right),
                         target_location=step.target_location
                     )
                 )
@@ -219,31 +300,52 @@ def check_continuous_move(current_move: Move, previous_move: Move) -> bool:
             interval_previous_move.closed_right)
 
 
+def steps_interval(steps: Tuple[Step, ...]) -> Interval:
+    """
+    return the merge of the intervals of steps.
+    :param steps: the steps of a move
+    :return: an Interval
+    """
+    return Interval.unchecked(steps[0].interval.left, steps[-1].interval.right,
+                              steps[0].interval.closed_left, steps[-1].interval.closed_right)
+
+
 def global_interval(move: Move) -> Interval:
     """
     return the merge of all the interval of all the steps of a Move.
-    :param move: a Move
+    :param move: a Move, or a move as a dictionary
     :return: an Interval
     """
-    return Interval(move["step"][0].interval.left,
-                    move["step"][len(move["step"]) - 1].interval.right,
-                    closed=Interval.interval_type(
-                        move["step"][0].interval.closed_left,
-                        move["step"][len(move["step"]) - 1].interval.closed_right
-                    ))
+    if type(move) is Move:
+        return move.global_interval
+    return steps_interval(move["step"])
+
+
+def freeze_move(move: Move) -> Move:
+    """
+    returns move as a Move (a hashable move), move itself if it is one.
+    :param move: a Move, or a move as a dictionary {"action": action,
+    "step": steps}
+    :return: a Move
+    """
+    if type(move) is Move:
+        return move
+    return Move(move["action"], move["step"])
 
 
 def compute_interval_length(move) -> float:
     """
     Compute the length of a move
-    :param move: a move
+    :param move: a Move, or a move as a dictionary
     :return: the length of the global interval of the move.
     """
+    if type(move) is Move:
+        return move.length
     interval = global_interval(move)
     return interval.right - interval.left
 
 
-def moves(timed_automaton: TimedAutomaton,
+def moves(timed_automaton: Union[TimedAutomaton, CompiledTimedAutomaton],
           config: Configuration) -> List[Move]:
     """
     The function moves takes as input a timed automaton timed_automaton and
@@ -272,7 +374,12 @@ def moves(timed_automaton: TimedAutomaton,
 
     As a result, the function is only implemented for deterministic
     timed_automaton.
+
+    A compiled timed automaton (see TimedAutomaton.compile) is handled by
+    compiled_moves.
     """
+    if isinstance(timed_automaton, CompiledTimedAutomaton):
+        return compiled_moves(timed_automaton, config)
 
     moves_list = []
 
@@ -285,8 +392,8 @@ def moves(timed_automaton: TimedAutomaton,
                 timed_automaton[source_location].items():
             for action in edge_attr.keys():
                 interval = edge_attr[action].guard.enabled_delays_set(valuation)
-                moves_list.append({"action": action, "step": [
-                    Step(interval=interval, target_location=target_location)]})
+                moves_list.append(Move(action, [Step(interval=interval, target_location=target_location)],
+                                       interval))
 
     elif timed_automaton.is_deterministic():
         partial_move_list = []
@@ -295,8 +402,8 @@ def moves(timed_automaton: TimedAutomaton,
                 timed_automaton[source_location].items():
             for action, label in edge_attr.item():
                 interval = label.guard.enabled_delays_set(valuation)
-                partial_move_list.append({"action": action, "step": [
-                    Step(interval=interval, target_location=target_location)]})
+                partial_move_list.append(Move(action, [Step(interval=interval, target_location=target_location)],
+                                              interval))
 
         # Sort the moves by action and for the same action by the start of
         # their interval
@@ -311,8 +418,7 @@ def moves(timed_automaton: TimedAutomaton,
                 continue
             pred_move = partial_move_list.pop()
             if check_continuous_move(move, pred_move):
-                pred_move["step"].extend(move["step"])
-                moves_list.append(pred_move)
+                moves_list.append(Move(pred_move.action, pred_move.step + move.step))
             else:
                 moves_list.append(pred_move)
                 moves_list.append(move)
@@ -324,21 +430,43 @@ def moves(timed_automaton: TimedAutomaton,
     return moves_list
 
 
-def next_step(timed_automaton: TimedAutomaton, configuration: Configuration, delay_move: Move) ->\
-        Optional[Configuration]:
+def compiled_moves(compiled_ta: CompiledTimedAutomaton, config: Configuration) -> List[Move]:
+    """
+    moves on a compiled timed automaton: one move per outgoing edge of the
+    location, with the greatest interval enabling its guard, in the order of
+    moves.
+    :param compiled_ta: a CompiledTimedAutomaton
+    :param config: a couple (location,valuation)
+    :return: a list of moves
+    """
+    valuation = config.valuation
+    moves_list = []
+    for edge in compiled_ta.edges(config.location):
+        interval = compiled_ta.enabled_delays_set(edge, valuation)
+        moves_list.append(Move(compiled_ta.actions[edge.action],
+                               [Step(interval=interval, target_location=compiled_ta.locations[edge.target])],
+                               interval))
+    return moves_list
+
+
+def next_step(timed_automaton: Union[TimedAutomaton, CompiledTimedAutomaton], configuration: Configuration,
+              delay_move: Move) -> Optional[Configuration]:
     """
     The function next_step takes as input a timed automaton timed_automaton,
     a configuration and a delay-move
     :param timed_automaton: a timed automaton.
     :param configuration: a configuration Configuration("location",
     "valuation")
-    :param delay_move: a dictionary {"action": action, "step": [
+    :param delay_move: a Move (or a dictionary) {"action": action, "step": [
                 Step(delay = delay, target_location=target_location)]}
     :return: If the delay pass a guard labelled by action in the edge
     (configuration.location, target, location), the function returns the
     configuration after passing the transition with the delay delay.
     Otherwise, it return None because the delay cannot pass the transition.
     """
+    if isinstance(timed_automaton, CompiledTimedAutomaton):
+        return compiled_next_step(timed_automaton, configuration, delay_move)
+
     action = delay_move["action"]
     delay = delay_move["step"][0].interval
     target_location = delay_move["step"][0].target_location
@@ -366,6 +494,94 @@ def next_step(timed_automaton: TimedAutomaton, configuration: Configuration, del
         return None
 
 
+def compiled_next_step(compiled_ta: CompiledTimedAutomaton, configuration: Configuration, delay_move: Move) -> \
+        Optional[Configuration]:
+    """
+    next_step on a compiled timed automaton.
+    :param compiled_ta: a CompiledTimedAutomaton
+    :param configuration: a configuration Configuration("location",
+    "valuation")
+    :param delay_move: a Move (or a dictionary) {"action": action, "step": [
+                Step(delay = delay, target_location=target_location)]}
+    :return: as next_step
+    """
+    step = delay_move["step"][0]
+    edge = compiled_ta.edge(configuration.location, delay_move["action"], step.target_location)
+    if edge is None:
+        return None
+    return timed_auto.Configuration(
+        location=step.target_location,
+        valuation=compiled_ta.valuation_after_passing_guard(edge, configuration.valuation, step.interval))
+
+
+def sampled_steps(move, interval: Interval) -> List[Step]:
+    """
+    returns the steps of move restricted to a sampled interval of its
+    global interval.
+    :param move: the sampled move
+    :param interval: an interval included in the global interval of move
+    :return: a list of Step
+    """
+    interval_step = []
+    found_starting_step = False
+    for step in move["step"]:
+        if interval.include(step.interval):
+            # Condition: the sampled interval is in a single step
+            interval_step.append(
+                Step(
+                    interval=interval,
+                    target_location=step.target_location
+                )
+            )
+            break  # Stop searching for useless steps.
+        elif (interval.closed_left and interval.left in step.interval) \
+                or \
+                (not interval.closed_left and step.interval.right >
+                 interval.left >= step.interval.left):
+            # Condition: the sampled interval begins in this step (
+            # but does not finish)
+
+            interval_step.append(
+                Step(
+                    interval=Interval.unchecked(
+                        interval.left,
+                        step.interval.right,
+                        interval.closed_left, step.interval.closed_right),
+                    target_location=step.target_location
+                )
+            )
+            found_starting_step = True
+        elif (
+                found_starting_step and interval.closed_right and
+                interval.right not in step.interval) or \
+                (found_starting_step and not interval.closed_right and
+                 interval.right > step.interval.right):
+            # Condition: upper bound not found yet, keep adding the
+            # intermediate steps
+            interval_step.append(step)
+        elif (
+                found_starting_step and interval.closed_right and
+                interval.right in step.interval) or \
+                (
+                        found_starting_step and not interval.closed_right and
+                        interval.right <= step.interval.right):
+            # Condition: upper bound found
+            interval_step.append(
+                Step(
+                    interval=Interval.unchecked(
+                        step.interval.left,
+                        interval.right,
+                        step.interval.closed_left, interval.closed_right),
+                    target_location=step.target_location
+                )
+            )
+            break
+            # Interval has been completely found, useless to continue.
+    else:
+        raise exceptions.IntervalNotFound(interval=str(interval))
+    return interval_step
+
+
 def move_sampling(move, strat_sampling, bound=math.inf):
         """
         Take a move, which type form is {"action": action, "step": List of
@@ -393,78 +609,31 @@ def move_sampling(move, strat_sampling, bound=math.inf):
         move_sampling_list = []
 
         for interval in global_interval_sampling:
-            interval_step = []
-            found_starting_step = False
-            for step in move["step"]:
-                if interval.include(step.interval):
-                    # Condition: the sampled interval is in a single step
-                    interval_step.append(
-                        Step(
-                            interval=interval,
-                            target_location=step.target_location
-                        )
-                    )
-                    break  # Stop searching for useless steps.
-                elif (interval.closed_left and interval.left in step.interval) \
-                        or \
-                        (not interval.closed_left and step.interval.right >
-                         interval.left >= step.interval.left):
-                    # Condition: the sampled interval begins in this step (
-                    # but does not finish)
-
-                    lowest_type = interval.closed_left
-                    highest_type = step.interval.closed_right
-
-                    interval_type = Interval.interval_type(
-                        lowest_type, highest_type)
-
-                    interval_step.append(
-                        Step(
-                            interval=Interval(
-                                interval.left,
-                                step.interval.right,
-                                closed=interval_type),
-                            target_location=step.target_location
-                        )
-                    )
-                    found_starting_step = True
-                elif (
-                        found_starting_step and interval.closed_right and
-                        interval.right not in step.interval) or \
-                        (found_starting_step and not interval.closed_right and
-                         interval.right > step.interval.right):
-                    # Condition: upper bound not found yet, keep adding the
-                    # intermediate steps
-                    interval_step.append(step)
-                elif (
-                        found_starting_step and interval.closed_right and
-                        interval.right in step.interval) or \
-                        (
-                                found_starting_step and not interval.closed_right and
-                                interval.right <= step.interval.right):
-                    # Condition: upper bound found
-                    lowest_type = step.interval.closed_left
-                    highest_type = interval.closed_right
-                    interval_type = Interval.interval_type(
-                        lowest_type, highest_type)
-                    interval_step.append(
-                        Step(
-                            interval=Interval(
-                                step.interval.left,
-                                interval.right,
-                                closed=interval_type),
-                            target_location=step.target_location
-                        )
-                    )
-                    break
-                    # Interval has been completely found, useless to continue.
-            else:
-                raise exceptions.IntervalNotFound(interval=str(interval))
             move_sampling_list.append(
-                {"action": action, "step": interval_step})
+                Move(action, sampled_steps(move, interval), interval))
 
         return move_sampling_list
 
+
+def sorted_move_sampling(move, strat_sampling, bound=math.inf) -> Iterator[Move]:
+    """
+    The moves of move_sampling, generated lazily by non-increasing interval
+    size (see Interval.sorted_sampling, whose samplings are memoised).
+    :param move: the move to sample
+    :param strat_sampling: the sampling step
+    :param bound: the bound of the intervals to sample.
+    :return: a generator of moves
+    """
+    if len(move["step"]) == 0:
+        raise exceptions.StepNotFound("No step in the step's list")
+    action = move["action"]
+    steps = move["step"]
+    for interval in global_interval(move).sorted_sampling(step=strat_sampling, bound=bound):
+        if len(steps) == 1:
+            yield Move(action, [Step(interval=interval, target_location=steps[0].target_location)], interval)
+        else:
+            yield Move(action, sampled_steps(move, interval), interval)
+
 # Remarks: for the moment these are unused functions.
 
 
@@ -27,6 +27,21 @@ import pyrobustness.runs.moves as moves
 Move = moves.Move
 
 
+def scalable(strategy: Callable[[Move], List[Move]], factory, *parameters) -> Callable[[Move], List[Move]]:
+    """
+    Attach to a strategy the factory and the parameters (delays) that built
+    it, so that the same strategy can be built for another time unit (see
+    the integer ticks of the explorer).
+    :param strategy: the strategy
+    :param factory: the function that built the strategy
+    :param parameters: the parameters given to factory
+    :return: the strategy
+    """
+    strategy.factory = factory
+    strategy.parameters = parameters
+    return strategy
+
+
 def delay_move_creator(
         action: Action, delay: Delay, target_location: int) -> Move:
     """
@@ -37,22 +52,19 @@ def delay_move_creator(
     :return: a Move
     """
     pyrobustness.dtype.check_delay_type(delay)
-    return {"action": action, "step": moves.Step(
+    return Move(action, [moves.Step(
         interval=delay,
-        target_location=target_location)}
+        target_location=target_location)])
 
 
 def create_delay_move_from_delay(move: Move) -> Callable[[Delay], Move]:
     def create_move(delay: Delay) -> Move:
         for s in move["step"]:
             if delay in s.interval:
-                return {
-                    "action": move["action"],
-                    "step": [
-                        moves.Step(interval=delay,
-                                   target_location=s.target_location)
-                    ]
-                }
+                return Move(move["action"], [
+                    moves.Step(interval=delay,
+                               target_location=s.target_location)
+                ])
 
         raise exceptions.DelayNotFound(place="move's step")
 
@@ -76,24 +88,18 @@ def worst_case_branch_free_opponent_strategy() -> Callable[[Move], List[Move]]:
                                           interval=str(interval),
                                           right_function="worst_case_approximate_branch_free_opponent_strategy")
         return [
-            {
-                "action": move["action"],
-                "step": [moves.Step(
-                    interval=interval.left,
-                    target_location=move["step"][0].target_location
-                )]
-            },
-            {
-                "action": move["action"],
-                "step": [moves.Step(
-                    interval=interval.right,
-                    target_location=move["step"][
-                        len(move["step"]) - 1].target_location
-                )]
-            }
+            Move(move["action"], [moves.Step(
+                interval=interval.left,
+                target_location=move["step"][0].target_location
+            )]),
+            Move(move["action"], [moves.Step(
+                interval=interval.right,
+                target_location=move["step"][
+                    len(move["step"]) - 1].target_location
+            )])
         ]
 
-    return strategy
+    return scalable(strategy, worst_case_branch_free_opponent_strategy)
 
 
 def worst_case_approximate_branch_free_opponent_strategy(
@@ -116,7 +122,7 @@ def worst_case_approximate_branch_free_opponent_strategy(
 
         return list(map(create_delay_move_from_delay(move), delays))
 
-    return strategy
+    return scalable(strategy, worst_case_approximate_branch_free_opponent_strategy, epsilon)
 
 
 def worst_case_brut_force_opponent_strategy(
@@ -146,7 +152,7 @@ def worst_case_brut_force_opponent_strategy(
                                           interval=str(interval),
                                           right_function="worst_case_brut_force_approximate_opponent_strategy")
 
-    return strategy
+    return scalable(strategy, worst_case_brut_force_opponent_strategy, step)
 
 
 def worst_case_brut_force_approximate_opponent_strategy(
@@ -179,7 +185,7 @@ def worst_case_brut_force_approximate_opponent_strategy(
                 interval_approx.right + step,
                 step=step) if delay <= interval_approx.right]
 
-    return strategy
+    return scalable(strategy, worst_case_brut_force_approximate_opponent_strategy, step, epsilon)
 
 
 def low_case_opponent_strategy() -> Callable[[Move], List[Move]]:
@@ -198,14 +204,11 @@ def low_case_opponent_strategy() -> Callable[[Move], List[Move]]:
             raise exceptions.OpenInterval(used_fct="low_case_opponent_strategy",
                                           interval=str(interval),
                                           right_function="worst_case_approximate_branch_free_opponent_strategy")
-        return [{
-            "action": move["action"],
-            "step": [moves.Step(
-                interval=interval.left,
-                target_location=move["step"][0].target_location)]
-        }]
+        return [Move(move["action"], [moves.Step(
+            interval=interval.left,
+            target_location=move["step"][0].target_location)])]
 
-    return strategy
+    return scalable(strategy, low_case_opponent_strategy)
 
 
 def up_case_opponent_strategy() -> Callable[[Move], List[Move]]:
@@ -224,15 +227,12 @@ def up_case_opponent_strategy() -> Callable[[Move], List[Move]]:
             raise exceptions.OpenInterval(used_fct="up_case_opponent_strategy",
                                           interval=str(interval),
                                           right_function="worst_case_approximate_branch_free_opponent_strategy")
-        return [{
-            "action": move["action"],
-            "step": [moves.Step(
-                interval=interval.right,
-                target_location=move["step"][
-                    len(move["step"]) - 1].target_location)]
-        }]
+        return [Move(move["action"], [moves.Step(
+            interval=interval.right,
+            target_location=move["step"][
+                len(move["step"]) - 1].target_location)])]
 
-    return strategy
+    return scalable(strategy, up_case_opponent_strategy)
 
 # noinspection PyUnusedLocal
 # def worst_case_random_opponent_strategy(move: Move, **kwargs) -> List[Move]:
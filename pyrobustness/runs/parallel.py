@@ -0,0 +1,588 @@
+# coding=utf-8
+"""
+==================================================
+Parallel explorer module
+==================================================
+This module provides an explorer with the API of explorer.Backtracking that
+splits the top of the game tree across a process pool.
+
+With split_depth = 1 the children of the root are evaluated by tasks: the
+moves proposed at the root, or, against the branch free opponent (see
+Backtracking._backtrack_endpoints), the configurations reached at the end
+delays of its intervals, explored once each. With split_depth = k > 1 the
+configurations reached from the root are split the same way, with
+split_depth = k - 1, as long as there are fewer tasks than workers: a
+deeper level enumerates all the moves of the configurations it reaches,
+that the sequential search prunes against each other. The split levels
+are expanded as the sequential explorer does: each node starts with its
+seed trace (the greedy rollout) and its moves are ordered, filtered and
+bounded by it, so no task explores a move the sequential search prunes at
+once.
+
+The search follows the young brothers wait scheme: the main process first
+explores the first child of the root (both ends of the longest interval
+against the branch free opponent), then forks the workers. They start with
+its transposition table and rollout table, and each worker keeps its table
+from one task to the next. The tasks share the best permissiveness already
+proved at the root, updated by the main process as soon as the tasks of a
+move (the two ends of an interval) are done: it is the alpha of their
+search, so that they prune each other.
+The shared value is a float rounded below the exact permissiveness, a move
+with the same permissiveness as the best one is never pruned.
+
+The permissiveness does not depend on the scheduling, but the trace found by
+a task depends on the alpha it received. Once every task is done the part of
+the tree giving the best trace is therefore explored again by the main
+process with a fixed window (the best root move, or the two ends of the best
+interval), which makes the returned trace deterministic.
+
+The explorer is sent to the workers by forking, the opponent strategies
+being closures that can not be pickled: the module needs the "fork" start
+method (Linux, macOS).
+
+Classes:
+------
+SpeedupReport
+SplitTask
+SplitMove
+SplitEndpoints
+RootProgress
+SplitNode
+ParallelBacktracking
+------
+"""
+from __future__ import annotations  # For forward reference typing
+
+import concurrent.futures
+import math
+import multiprocessing
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import pyrobustness.runs.exceptions as exceptions
+import pyrobustness.runs.explorer as explorer
+import pyrobustness.runs.moves as moves
+from pyrobustness.dtype import Delay
+
+Configuration = explorer.Configuration
+Move = explorer.Move
+Trace = explorer.Trace
+ValueTrace = explorer.ValueTrace
+AnyTrace = Union[Trace, ValueTrace]
+
+# The tasks per worker below which the tree is split one level deeper
+TASKS_PER_JOB = 1
+
+# Set in each worker by _init_worker
+_worker_explorer: Optional[ParallelBacktracking] = None
+_worker_best = None
+
+
+def _init_worker(explo: ParallelBacktracking, best) -> None:
+    global _worker_explorer, _worker_best
+    _worker_explorer = explo
+    _worker_best = best
+
+
+def _shared_alpha() -> float:
+    return _worker_best.value
+
+
+def _run_task(method: str, *args) -> AnyTrace:
+    return getattr(_worker_explorer, method)(*args, shared_alpha=_shared_alpha)
+
+
+def lower_float(permissiveness: float) -> float:
+    """
+    returns a float strictly lower than permissiveness (-inf stays -inf).
+    """
+    if permissiveness == -math.inf:
+        return -math.inf
+    return math.nextafter(float(permissiveness), -math.inf)
+
+
+class SpeedupReport(NamedTuple):
+    """
+    The runtimes (in seconds) of a search by the sequential explorer and by
+    the parallel one with jobs workers, see ParallelBacktracking.speedup.
+    """
+    jobs: int
+    sequential_time: float
+    parallel_time: float
+    permissiveness: float
+
+    @property
+    def speedup(self) -> float:
+        return self.sequential_time / self.parallel_time
+
+
+class SplitTask(object):
+    """
+    A part of the tree evaluated by a worker, or by the main process before
+    the workers start: a method of ParallelBacktracking (evaluate_move or
+    evaluate_node) and its arguments.
+    """
+
+    def __init__(self, method: str, *args):
+        self.method = method
+        self.args = args
+        self.future: Optional[concurrent.futures.Future] = None
+
+    def run(self, explo: ParallelBacktracking, best) -> None:
+        """
+        Evaluate the task in the current process, best being the shared
+        permissiveness of the root.
+        """
+        self.future = concurrent.futures.Future()
+        try:
+            self.future.set_result(getattr(explo, self.method)(*self.args, shared_alpha=lambda: best.value))
+        except exceptions.CycleException as exception:
+            self.future.set_exception(exception)
+
+    def submit(self, pool: concurrent.futures.Executor) -> concurrent.futures.Future:
+        self.future = pool.submit(_run_task, self.method, *self.args)
+        return self.future
+
+
+SplitItem = Union[AnyTrace, SplitTask, "SplitNode", None]
+
+
+def item_tasks(item: SplitItem) -> List[SplitTask]:
+    if isinstance(item, SplitTask):
+        return [item]
+    if isinstance(item, SplitNode):
+        return item.tasks()
+    return []
+
+
+class SplitMove(object):
+    """
+    A move of the split part of the tree: it is either evaluated by a task or
+    split along the delays of the opponent (delays: goal traces, tasks and
+    SplitNode).
+    """
+
+    def __init__(self, move: Move, task: Optional[SplitTask] = None,
+                 delays: Optional[List[SplitItem]] = None):
+        self.move = move
+        self.task = task
+        self.delays = delays
+
+    def tasks(self) -> List[SplitTask]:
+        if self.task is not None:
+            return [self.task]
+        return [task for delay in self.delays for task in item_tasks(delay)]
+
+    def first_tasks(self) -> List[SplitTask]:
+        return self.tasks()
+
+
+class SplitEndpoints(object):
+    """
+    A move of the split part of the tree against the branch free opponent:
+    the configurations reached at its end delays (see
+    Backtracking.endpoint_ends), each one a goal trace, a task, a SplitNode or
+    None if the cycle bound drops the delay.
+    """
+
+    def __init__(self, max_move: Move, lefts: List[Delay], rights: List[Delay], threshold: float,
+                 ends: Dict[Delay, SplitItem]):
+        self.max_move = max_move
+        self.lefts = lefts
+        self.rights = rights
+        self.threshold = threshold
+        self.ends = ends
+        # The permissiveness of the ends already known, see ParallelBacktracking._share_end
+        self.known: Dict[Delay, float] = {}
+
+    def tasks(self) -> List[SplitTask]:
+        return [task for end in self.ends.values() for task in item_tasks(end)]
+
+    def first_tasks(self) -> List[SplitTask]:
+        # The ends of the longest interval
+        return item_tasks(self.ends[self.lefts[0]]) + item_tasks(self.ends[self.rights[0]])
+
+
+class RootProgress(object):
+    """
+    The number of tasks left in each part of the root whose permissiveness
+    can be shared once its tasks are done: a move (SplitMove) or an end delay
+    of a SplitEndpoints, a part being (split move, end delay or None).
+    """
+
+    def __init__(self, root: SplitNode):
+        self.pending: Dict[Tuple[Union[SplitMove, SplitEndpoints], Optional[Delay]], int] = {}
+        self.owners: Dict[SplitTask, Tuple[Union[SplitMove, SplitEndpoints], Optional[Delay]]] = {}
+        for split_move in root.moves:
+            if isinstance(split_move, SplitEndpoints):
+                parts = [((split_move, delay), item_tasks(end)) for delay, end in split_move.ends.items()]
+            else:
+                parts = [((split_move, None), split_move.tasks())]
+            for part, tasks in parts:
+                self.pending[part] = len(tasks)
+                for task in tasks:
+                    self.owners[task] = part
+
+    def ready(self) -> List[Tuple[Union[SplitMove, SplitEndpoints], Optional[Delay]]]:
+        """
+        returns the parts without tasks.
+        """
+        return [part for part, pending in self.pending.items() if pending == 0]
+
+    def task_done(self, task: SplitTask) -> List[Tuple[Union[SplitMove, SplitEndpoints], Optional[Delay]]]:
+        """
+        returns the part of task if it was its last task left.
+        """
+        part = self.owners[task]
+        self.pending[part] -= 1
+        return [part] if self.pending[part] == 0 else []
+
+
+class SplitNode(object):
+    """
+    A configuration of the split part of the tree, with its moves and the
+    trace it starts with (see Backtracking.seed_trace).
+    """
+
+    def __init__(self, current: Configuration, trace: AnyTrace, moves: List[Union[SplitMove, SplitEndpoints]],
+                 seed: AnyTrace):
+        self.current = current
+        self.trace = trace
+        self.moves = moves
+        self.seed = seed
+
+    def tasks(self) -> List[SplitTask]:
+        return [task for split_move in self.moves for task in split_move.tasks()]
+
+
+class ParallelBacktracking(explorer.Backtracking):
+    """
+    Explorer evaluating the top of the game tree in a process pool (see the
+    module documentation). The workers are forked: it needs the "fork" start
+    method of multiprocessing (Linux, macOS). It takes the parameters of
+    explorer.Backtracking and:
+    :param jobs: the number of worker processes, the search is sequential if
+    jobs <= 1
+    :param split_depth: the maximal number of levels of configurations
+    expanded by the main process, the children of the last ones being tasks:
+    1 for the children of the root (its moves, or the configurations at the
+    end delays of its intervals against the branch free opponent), 2 for the
+    children of the configurations it reaches... A level is only expanded if
+    the previous one gives fewer than TASKS_PER_JOB tasks per worker.
+    """
+
+    def __init__(self, *args, jobs: int = 1, split_depth: int = 1, **kwargs):
+        super().__init__(*args, **kwargs)
+        if split_depth < 1:
+            raise ValueError("split_depth must be at least 1")
+        self.jobs = jobs
+        self.split_depth = split_depth
+
+    def evaluate_move(self, current: Configuration, trace: AnyTrace, move: Move,
+                      alpha: float = -math.inf, shared_alpha=None) -> AnyTrace:
+        """
+        Opponent choice among the delays of a move.
+        :param current: the configuration where the move is proposed
+        :param trace: the trace leading to current
+        :param move: the move
+        :param alpha: the permissiveness already guaranteed to the player
+        :param shared_alpha: a function returning the current best
+        permissiveness of the root, read between two delays
+        :return: the minimal trace of the move
+        """
+        window = explorer.SearchWindow(alpha=alpha, beta=trace.compute_trace_permissiveness())
+        if shared_alpha is not None:
+            window.alpha = max(window.alpha, shared_alpha())
+        minimal_trace = Trace(data=None, no_trace=True)
+        if self.alpha_beta_opt and moves.compute_interval_length(move) <= window.alpha:
+            # The move can not improve the root
+            return minimal_trace
+        for future_trace in self._backtrack_delay(current, trace, move, window):
+            minimal_trace, cut = self.choose_min_trace(minimal_trace, future_trace, window)
+            if cut:
+                break
+            if shared_alpha is not None:
+                window.alpha = max(window.alpha, shared_alpha())
+        return minimal_trace
+
+    def evaluate_node(self, current: Configuration, trace: AnyTrace, alpha: float = -math.inf,
+                      beta: float = math.inf, shared_alpha=None) -> AnyTrace:
+        """
+        Player choice at a configuration.
+        :param current: the configuration
+        :param trace: the trace leading to current
+        :param alpha: the permissiveness already guaranteed to the player
+        :param beta: the permissiveness the opponent can already force: the
+        length of the longest interval ending at the delay leading to current
+        against the branch free opponent
+        :param shared_alpha: a function returning the current best
+        permissiveness of the root, read before the search
+        :return: the best trace of current
+        """
+        if not self.alpha_beta_opt:
+            return self._backtrack(current, trace)
+        if shared_alpha is not None:
+            alpha = max(alpha, shared_alpha())
+        if min(trace.compute_trace_permissiveness(), beta) <= alpha:
+            # The configuration can not improve the root
+            return Trace(data=None, no_trace=True)
+        return self._backtrack(current, trace, alpha=alpha, beta=beta)
+
+    def _split_successor(self, next_config: Configuration, next_trace: AnyTrace, depth: int,
+                         beta: float = math.inf) -> SplitItem:
+        """
+        The configuration reached by a delay of the opponent: its trace if it
+        is the goal, a task if depth is 0, otherwise its trace if it is a
+        loop, None if the cycle bound drops it and a SplitNode of depth depth.
+        """
+        if next_config.location == self.ta.goal_location:
+            return next_trace
+        if depth == 0:
+            return SplitTask("evaluate_node", next_config, next_trace, -math.inf, beta)
+        try:
+            self.check_fail(next_trace)
+        except exceptions.CycleException:
+            return None
+        if self.loop_cond(next_config, next_trace):
+            return Trace(data=None, no_trace=True)
+        return self._split(next_config, next_trace, depth, beta)
+
+    def _split(self, current: Configuration, trace: AnyTrace, depth: int, beta: float = math.inf) -> SplitNode:
+        """
+        Expand the moves of the split levels as _backtrack_moves (or
+        _backtrack_endpoints) does: the node starts with its seed trace, and
+        the moves are ordered, filtered and bounded by it before becoming
+        tasks. beta bounds what current can bring to the root: the length of
+        the shortest move leading to it.
+        """
+        max_moves = self.extract_max_moves(current)
+        seed = self.seed_trace(current, trace)
+        split_moves = []
+        prefix_permissiveness = trace.compute_trace_permissiveness()
+        if self.node_cut(seed, self.node_bound(max_moves), -math.inf, prefix_permissiveness):
+            return SplitNode(current, trace, split_moves, seed)
+        if self.endpoint_values and all(self.endpoint_move(max_move) for max_move in max_moves):
+            threshold = seed.compute_trace_permissiveness() if self.filter_opt or self.alpha_beta_opt else -math.inf
+            for max_move in sorted(max_moves, key=lambda m: -self.endpoint_length(m)):
+                if moves.global_interval(max_move).is_empty() or self.move_bound(max_move) <= threshold:
+                    continue
+                max_move, lefts, rights = self.endpoint_ends(max_move, threshold)
+                move_beta = min(beta, prefix_permissiveness, self.move_bound(max_move))
+                # The longest interval ending at each delay
+                lengths = {}
+                for delay in lefts:
+                    lengths[delay] = rights[0] - delay
+                for delay in rights:
+                    lengths[delay] = max(lengths.get(delay, -math.inf), delay - lefts[0])
+                ends = {}
+                for delay, length in lengths.items():
+                    next_config, next_trace = self.endpoint_step(current, trace, max_move, delay)
+                    ends[delay] = self._split_successor(next_config, next_trace, depth - 1, min(move_beta, length))
+                split_moves.append(SplitEndpoints(max_move, lefts, rights, threshold, ends))
+            return SplitNode(current, trace, split_moves, seed)
+        for next_poss in self.order_moves(current, trace, max_moves):
+            if not self.filter_poss(next_poss, seed):
+                if self.sorted_sampling:
+                    # The next moves are not greater
+                    break
+                continue
+            if not self.bound_poss(next_poss, seed):
+                continue
+            if depth == 1:
+                split_moves.append(SplitMove(next_poss, task=SplitTask("evaluate_move", current, trace, next_poss)))
+                continue
+            move_beta = min(beta, moves.compute_interval_length(next_poss))
+            delays = [self._split_successor(next_config, next_trace, depth - 1, move_beta)
+                      for _, next_config, next_trace in self.order_delays(current, trace, next_poss)]
+            split_moves.append(SplitMove(next_poss, delays=delays))
+        return SplitNode(current, trace, split_moves, seed)
+
+    def _combine_item(self, item: SplitItem) -> Optional[AnyTrace]:
+        """
+        returns the trace of a split item, None if the cycle bound drops it.
+        """
+        if isinstance(item, SplitNode):
+            return self._combine_node(item)
+        if isinstance(item, SplitTask):
+            try:
+                return item.future.result()
+            except exceptions.CycleException:
+                return None
+        return item
+
+    def _combine_move(self, split_move: SplitMove) -> AnyTrace:
+        if split_move.task is not None:
+            return split_move.task.future.result()
+        window = explorer.SearchWindow()
+        minimal_trace = Trace(data=None, no_trace=True)
+        for delay in split_move.delays:
+            future_trace = self._combine_item(delay)
+            if future_trace is None:
+                continue
+            minimal_trace, cut = self.choose_min_trace(minimal_trace, future_trace, window)
+            if cut:
+                break
+        return minimal_trace
+
+    def _best_interval(self, node: SplitNode,
+                       split_move: SplitEndpoints) -> Optional[Tuple[float, Delay, Delay, Optional[Delay]]]:
+        """
+        The best interval of split_move, see Backtracking.best_endpoint_interval.
+        """
+        return self.best_endpoint_interval(split_move.max_move, split_move.lefts, split_move.rights,
+                                           split_move.threshold, -math.inf, node.trace.compute_trace_permissiveness(),
+                                           {}, lambda delay, end_alpha, end_beta:
+                                           self._combine_item(split_move.ends[delay]))
+
+    def _combine_endpoints(self, node: SplitNode, split_move: SplitEndpoints) -> AnyTrace:
+        best = self._best_interval(node, split_move)
+        if best is None or best[3] is None:
+            return Trace(data=None, no_trace=True)
+        _, left, right, delay = best
+        return self.rebuild_endpoint_trace(node.current, node.trace,
+                                           self.endpoint_sampled_move(split_move.max_move, left, right),
+                                           delay, self._combine_item(split_move.ends[delay]))
+
+    def _combine_split_move(self, node: SplitNode, split_move: Union[SplitMove, SplitEndpoints]) -> AnyTrace:
+        if isinstance(split_move, SplitEndpoints):
+            return self._combine_endpoints(node, split_move)
+        return self._combine_move(split_move)
+
+    def _combine_node(self, node: SplitNode) -> AnyTrace:
+        best_trace = node.seed
+        for split_move in node.moves:
+            best_trace, _ = self.choose_max_trace(best_trace, self._combine_split_move(node, split_move), math.inf)
+        return best_trace
+
+    def _share_end(self, split_move: SplitEndpoints, delay: Delay) -> float:
+        """
+        Record the permissiveness of the end delay of split_move, whose tasks
+        are done, and return the one of the best interval it ends whose other
+        end is known.
+        """
+        known = split_move.known
+        future_trace = self._combine_item(split_move.ends[delay])
+        known[delay] = None if future_trace is None else future_trace.compute_trace_permissiveness()
+        # The sampled intervals [delay, right] and [left, delay] whose other end is known
+        pairs = ([(delay, right) for right in split_move.rights if right in known]
+                 if delay in split_move.lefts else []) + \
+                ([(left, delay) for left in split_move.lefts if left in known]
+                 if delay in split_move.rights else [])
+        value = -math.inf
+        for left, right in pairs:
+            if right <= left and (left, right) != (split_move.lefts[0], split_move.rights[0]):
+                continue
+            ends = [known[end] for end in (left, right) if known[end] is not None]
+            if ends:
+                value = max(value, min([right - left] + ends))
+        return value
+
+    def _share(self, part: Tuple[Union[SplitMove, SplitEndpoints], Optional[Delay]], best) -> None:
+        """
+        Raise the shared permissiveness of the root to the one proved by a
+        part of the root whose tasks are done (see RootProgress).
+        """
+        split_move, delay = part
+        if delay is None:
+            value = self._combine_move(split_move).compute_trace_permissiveness()
+        else:
+            value = self._share_end(split_move, delay)
+        with best.get_lock():
+            best.value = max(best.value, lower_float(value))
+
+    def _rebuild_root(self, root: SplitNode, root_permissiveness: float) -> AnyTrace:
+        """
+        Explore again, with a window that does not depend on the scheduling,
+        the part of the tree giving the best trace of the root: the first
+        root move reaching root_permissiveness, or the two ends of its best
+        interval against the branch free opponent. The transposition table of
+        the main process only holds the first child of the root, explored
+        before the workers start, so it does not depend on the scheduling
+        either.
+        """
+        alpha = lower_float(root_permissiveness)
+        for split_move in root.moves:
+            if isinstance(split_move, SplitMove):
+                if self._combine_move(split_move).compute_trace_permissiveness() == root_permissiveness:
+                    return self.evaluate_move(root.current, root.trace, split_move.move, alpha=alpha)
+                continue
+            best = self._best_interval(root, split_move)
+            if best is None or best[0] != root_permissiveness:
+                continue
+            _, left, right, _ = best
+            ends = []
+            for delay in (left,) if left == right else (left, right):
+                future_trace = self.endpoint_trace(root.current, root.trace, split_move.max_move, delay, alpha,
+                                                   math.inf)
+                if future_trace is not None:
+                    ends.append((future_trace.compute_trace_permissiveness(), delay, future_trace))
+            _, delay, future_trace = min(ends, key=lambda end: end[:2])
+            return self.rebuild_endpoint_trace(root.current, root.trace,
+                                               self.endpoint_sampled_move(split_move.max_move, left, right),
+                                               delay, future_trace)
+        # No move beats the seed trace of the root
+        return root.seed
+
+    def backtracking(self, to_print=False, rebuild_trace=False):
+        if self.jobs <= 1 or self.goal_cond(self.start):
+            return super().backtracking(to_print=to_print, rebuild_trace=rebuild_trace)
+
+        self.prepare_search(to_print)
+        root_trace = self.root_trace()
+        self.check_fail(root_trace)
+        context = multiprocessing.get_context("fork")
+        best = context.Value("d", -math.inf)
+        # The first level giving enough tasks to the workers, up to split_depth
+        depth = 1
+        root = self._split(self.start, root_trace, depth)
+        while depth < self.split_depth and len(root.tasks()) < TASKS_PER_JOB * self.jobs:
+            depth += 1
+            root = self._split(self.start, root_trace, depth)
+        best.value = lower_float(root.seed.compute_trace_permissiveness())
+        if root.moves:
+            progress = RootProgress(root)
+            for part in progress.ready():
+                self._share(part, best)
+            # The first child of the root is explored before the workers are forked
+            for task in root.moves[0].first_tasks():
+                task.run(self, best)
+                for part in progress.task_done(task):
+                    self._share(part, best)
+            with concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs, mp_context=context,
+                                                        initializer=_init_worker, initargs=(self, best)) as pool:
+                futures = {task.submit(pool): task for task in root.tasks() if task.future is None}
+                for future in concurrent.futures.as_completed(futures):
+                    for part in progress.task_done(futures[future]):
+                        self._share(part, best)
+
+        root_permissiveness = self._combine_node(root).compute_trace_permissiveness()
+        if root_permissiveness == -math.inf:
+            self.best_trace = Trace(data=None, no_trace=True)
+            return self.best_trace
+        self.best_trace = self._rebuild_root(root, root_permissiveness) \
+            if root_permissiveness > root.seed.compute_trace_permissiveness() else root.seed
+        if self.value_only and rebuild_trace:
+            self.best_trace = self.rebuild_best_trace()
+        self.best_trace = self.result_trace(self.best_trace)
+        return self.best_trace
+
+    def speedup(self, to_print=False) -> SpeedupReport:
+        """
+        Search from the start configuration with the sequential explorer,
+        then with jobs workers, and compare their runtimes. Both searches
+        start with an empty transposition table.
+        :param to_print: True to log the explorations with print_class
+        :return: the runtimes and the permissiveness found
+        :raise AssertionError: if the two searches disagree on the permissiveness
+        """
+        self.transposition_table.clear()
+        t0 = time.perf_counter()
+        sequential = super().backtracking(to_print=to_print).compute_trace_permissiveness()
+        t1 = time.perf_counter()
+        self.transposition_table.clear()
+        t2 = time.perf_counter()
+        permissiveness = self.backtracking(to_print=to_print).compute_trace_permissiveness()
+        t3 = time.perf_counter()
+        assert permissiveness == sequential, "the parallel and sequential searches disagree"
+        return SpeedupReport(jobs=self.jobs, sequential_time=t1 - t0, parallel_time=t3 - t2,
+                             permissiveness=permissiveness)
@@ -0,0 +1,365 @@
+# coding=utf-8
+"""
+==================================================
+Symbolic permissiveness module
+==================================================
+This module computes the exact permissiveness function of an acyclic timed
+automaton with linear guards (CJMM20), without any sampling step: at each
+location the permissiveness is a piecewise affine function of the valuation,
+computed backwards from the goal location.
+
+The opponent chooses any delay of the interval proposed by the player. A
+permissiveness function W is stored as a maximum of concave pieces: a piece
+is a closed convex polyhedron H of Q^(n+1), the hypograph of a concave
+function {(v, p) : p <= W_H(v)} (all the constraints of H bound p from
+above), and W(v) is the maximum of W_H(v) over the pieces.
+
+Let F be the function of the target of an edge, composed with its resets.
+From the valuation v, the interval [a, a + p] of delays is accepted if it
+checks the guard and if F(v + d) >= p for each delay d of the interval. As
+each piece of F is concave on a convex domain, the interval is covered by a
+chain of pieces H_1, ..., H_k and a piece checks F(v + d) >= p on a segment
+if and only if it does at its two ends. For each chain the set of (v, p, a,
+c_1, ..., c_k) is a polyhedron: its projection on (v, p) is a new concave
+piece. The permissiveness of the edge is the maximum over the chains, and
+the permissiveness of a location the maximum over its edges. Only the
+chains with no useless piece are needed: their pieces are ordered by delays
+and each one covers the interval further than the previous one, so that
+the chains are not the permutations of the pieces.
+
+Classes:
+------
+ConcavePiece
+PermissivenessFunction
+SymbolicPermissiveness
+------
+
+Methods:
+integer_valuation
+------
+"""
+from __future__ import annotations  # For forward reference typing
+
+import math
+from fractions import Fraction
+from functools import reduce
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import networkx as nx
+
+import pyrobustness.runs.exceptions as exceptions
+import pyrobustness.ta.guards as guards
+import pyrobustness.ta.timedauto as timed_auto
+from pyrobustness.dtype import Delay, Location, Valuation
+from pyrobustness.ta.polyhedron import Constraint, Polyhedron
+
+TimedAutomaton = timed_auto.TimedAutomaton
+Label = guards.Label
+
+
+def _lcm(numbers: Sequence[int]) -> int:
+    return reduce(lambda a, b: a * b // math.gcd(a, b), numbers, 1)
+
+
+def integer_valuation(valuation: Valuation) -> Tuple[List[int], int]:
+    """
+    returns the valuation as integer numerators over a common denominator.
+    """
+    denominator = _lcm([Fraction(v).denominator for v in valuation])
+    return [int(v * denominator) for v in valuation], denominator
+
+
+class ConcavePiece(object):
+    """
+    A concave piece of a permissiveness function, given by its hypograph: a
+    polyhedron of Q^(n+1) whose last coordinate is the permissiveness and
+    whose constraints have a non negative permissiveness coefficient.
+    """
+
+    def __init__(self, hypograph: Polyhedron):
+        self.hypograph = hypograph
+        # Constraints on the valuation only, and upper bounds of the
+        # permissiveness (bound - coefficients . v)
+        self.domain: List[Constraint] = []
+        self.upper_bounds: List[Constraint] = []
+        for constraint in hypograph.constraints:
+            coefficient = constraint.coefficients[-1]
+            if coefficient == 0:
+                self.domain.append(Constraint(constraint.coefficients[:-1], constraint.bound))
+            else:
+                self.upper_bounds.append(Constraint(tuple(c / coefficient for c in constraint.coefficients[:-1]),
+                                                    constraint.bound / coefficient))
+        # Integer sparse forms for a fast evaluation: (terms, bound, divisor)
+        self._domain = [self._integer_form(constraint) for constraint in self.domain]
+        self._upper_bounds = [self._integer_form(constraint) for constraint in self.upper_bounds]
+
+    @staticmethod
+    def _integer_form(constraint: Constraint) -> Tuple[Tuple[Tuple[int, int], ...], int, int]:
+        divisor = _lcm([c.denominator for c in constraint.coefficients] + [constraint.bound.denominator])
+        return (tuple((i, int(c * divisor)) for i, c in enumerate(constraint.coefficients) if c),
+                int(constraint.bound * divisor),
+                divisor)
+
+    def __call__(self, valuation: Valuation) -> Delay:
+        """
+        returns the permissiveness of the piece at valuation: -math.inf out of
+        its domain, math.inf if it has no upper bound.
+        """
+        return self.evaluate(*integer_valuation(valuation))
+
+    def evaluate(self, numerators: Sequence[int], denominator: int) -> Delay:
+        """
+        returns the permissiveness of the piece at the valuation
+        numerators / denominator.
+        """
+        for terms, bound, _ in self._domain:
+            if sum(c * numerators[i] for i, c in terms) > bound * denominator:
+                return -math.inf
+        if not self._upper_bounds:
+            return math.inf
+        return min(Fraction(bound * denominator - sum(c * numerators[i] for i, c in terms), divisor * denominator)
+                   for terms, bound, divisor in self._upper_bounds)
+
+    def __repr__(self) -> str:
+        return "ConcavePiece(domain=" + str(self.domain) + ", upper_bounds=" + str(self.upper_bounds) + ")"
+
+    def reset(self, resets: Sequence[int]) -> ConcavePiece:
+        """
+        returns the piece composed with the resets: the piece of v -> W(r(v))
+        where r sets the clocks of resets to 0.
+        """
+        return ConcavePiece(Polyhedron(self.hypograph.dimension,
+                                       (Constraint(tuple(0 if i in resets else c
+                                                         for i, c in enumerate(constraint.coefficients)),
+                                                   constraint.bound)
+                                        for constraint in self.hypograph.constraints)))
+
+
+class PermissivenessFunction(object):
+    """
+    The permissiveness function of a location: the maximum of its pieces,
+    -math.inf if it has no piece.
+    """
+
+    def __init__(self, number_clocks: int, pieces: Optional[List[ConcavePiece]] = None):
+        self.number_clocks = number_clocks
+        self.pieces: List[ConcavePiece] = [] if pieces is None else pieces
+
+    @classmethod
+    def infinite(cls, number_clocks: int) -> PermissivenessFunction:
+        """
+        returns the function of the goal location, math.inf everywhere.
+        """
+        return cls(number_clocks, [ConcavePiece(Polyhedron(number_clocks + 1))])
+
+    def __call__(self, valuation: Valuation) -> Delay:
+        numerators, denominator = integer_valuation(valuation)
+        return max((piece.evaluate(numerators, denominator) for piece in self.pieces), default=-math.inf)
+
+    def __len__(self):
+        return len(self.pieces)
+
+    def __repr__(self) -> str:
+        return "PermissivenessFunction(pieces=" + str(self.pieces) + ")"
+
+
+class SymbolicPermissiveness(object):
+    """
+    Exact permissiveness of an acyclic timed automaton with linear guards.
+    The functions of the locations are computed once, on the first query.
+    :param ta: the timed automaton
+    """
+
+    def __init__(self, ta: TimedAutomaton):
+        if not nx.is_directed_acyclic_graph(ta):
+            raise exceptions.WrongTimedAutomatonClass(fct="SymbolicPermissiveness", ta_class="cyclic ")
+        for start_location, end_location in ta.edges:
+            for label in ta[start_location][end_location].values():
+                if not isinstance(label.guard, guards.LinearGuard):
+                    raise exceptions.WrongTimedAutomatonClass(fct="SymbolicPermissiveness",
+                                                              ta_class="non linear guard ")
+        self.ta = ta
+        self.number_clocks = ta.number_clocks
+        self.functions: Optional[Dict[Location, PermissivenessFunction]] = None
+
+    def compute(self) -> Dict[Location, PermissivenessFunction]:
+        """
+        Compute the permissiveness functions of all the locations, from the
+        goal location backwards.
+        :return: a dictionary location -> PermissivenessFunction
+        """
+        if self.functions is not None:
+            return self.functions
+        functions = {}
+        for location in reversed(list(nx.topological_sort(self.ta))):
+            if location == self.ta.goal_location:
+                functions[location] = PermissivenessFunction.infinite(self.number_clocks)
+                continue
+            pieces = []
+            for target_location, edge_attr in self.ta[location].items():
+                if not functions[target_location].pieces:
+                    continue
+                for label in edge_attr.values():
+                    pieces.extend(self.edge_pieces(label, functions[target_location]))
+            functions[location] = PermissivenessFunction(self.number_clocks, self.remove_dominated(pieces))
+        self.functions = functions
+        return functions
+
+    def function(self, location: Location) -> PermissivenessFunction:
+        return self.compute()[location]
+
+    def permissiveness(self, location: Location, valuation: Valuation) -> Delay:
+        """
+        returns the exact permissiveness of the configuration (location,
+        valuation).
+        """
+        return self.function(location)(valuation)
+
+    @staticmethod
+    def remove_dominated(pieces: List[ConcavePiece]) -> List[ConcavePiece]:
+        """
+        Remove the pieces whose hypograph is included in the hypograph of
+        another piece.
+        """
+        kept = []
+        for i, piece in enumerate(pieces):
+            if any(other.hypograph.includes(piece.hypograph) and
+                   (j < i or not piece.hypograph.includes(other.hypograph))
+                   for j, other in enumerate(pieces) if j != i):
+                continue
+            kept.append(piece)
+        return kept
+
+    def edge_pieces(self, label: Label, target: PermissivenessFunction) -> List[ConcavePiece]:
+        """
+        returns the pieces of the permissiveness of an edge: one for each
+        chain of pieces of the target that can cover an interval of delays
+        with no useless piece, unless a previous piece includes it.
+        :param label: the guard and resets of the edge
+        :param target: the permissiveness function of the target location
+        :return: a list of ConcavePiece
+        """
+        target_pieces = [piece.reset(label.resets) for piece in target.pieces]
+        followers = [[j for j, second in enumerate(target_pieces) if j != i and self.can_follow(first, second)]
+                     for i, first in enumerate(target_pieces)]
+        pieces = []
+        chains: List[Tuple[int, ...]] = [(j,) for j in range(len(target_pieces))]
+        while chains:
+            chain = chains.pop()
+            window = self.window(label.guard, [target_pieces[j] for j in chain])
+            if window.is_empty() or \
+                    (len(chain) > 2 and not self.fails(target_pieces[chain[-3]], window, len(chain) - 1)):
+                # No longer chain can cover an interval, or the piece before
+                # the last one is useless in all of them
+                continue
+            closed = window.intersection([self.closing_constraint(len(chain))])
+            if not any(self.covers(piece, closed) for piece in pieces):
+                piece = self.chain_piece(closed)
+                if piece is not None:
+                    pieces.append(piece)
+            chains.extend(chain + (j,) for j in followers[chain[-1]] if j not in chain)
+        return pieces
+
+    def covers(self, piece: ConcavePiece, window: Polyhedron) -> bool:
+        """
+        returns True if the hypograph of the piece includes the projection
+        of the window on (v, p): the piece of the window would be dominated.
+        """
+        n = self.number_clocks
+        padding = (Fraction(0),) * (window.dimension - n - 1)
+        return all(window.maximize(constraint.coefficients + padding) <= constraint.bound
+                   for constraint in piece.hypograph.constraints)
+
+    def can_follow(self, first: ConcavePiece, second: ConcavePiece) -> bool:
+        """
+        returns True if second can follow first in a chain covering an
+        interval with no useless piece. Such a chain is ordered by delays:
+        each piece covers the interval further than the previous one, so
+        that second must check F(v + d) >= p at a delay d where first does
+        not. The other chains give pieces dominated by their sub-chains.
+        """
+        # The chain first, second anywhere in a longer chain: no guard
+        return self.fails(first, self.window(None, [first, second]), 2)
+
+    def fails(self, piece: ConcavePiece, window: Polyhedron, breakpoint: int) -> bool:
+        """
+        returns True if some point of the window has F(v + c_breakpoint) < p
+        for the piece.
+        """
+        n = self.number_clocks
+        for hypograph_constraint in piece.hypograph.constraints:
+            objective = [Fraction(0)] * window.dimension
+            objective[:n] = hypograph_constraint.coefficients[:n]
+            objective[n] = hypograph_constraint.coefficients[n]
+            objective[n + 1 + breakpoint] = sum(hypograph_constraint.coefficients[:n])
+            if window.maximize(objective) > hypograph_constraint.bound:
+                return True
+        return False
+
+    def window(self, guard: Optional[guards.LinearGuard], chain: List[ConcavePiece]) -> Polyhedron:
+        """
+        returns the polyhedron of the (v, p, c_0, ..., c_k) such that the
+        interval [c_0, c_0 + p] checks the guard from v (if guard is not
+        None), and each piece H_i of the chain checks F(v + d) >= p on
+        [c_(i-1), c_i], with c_k lower than or equal to c_0 + p.
+        """
+        n = self.number_clocks
+        dimension = n + 2 + len(chain)
+        p, first, last = n, n + 1, n + 1 + len(chain)
+
+        def constraint(terms: Dict[int, Fraction], bound) -> Constraint:
+            coefficients = [Fraction(0)] * dimension
+            for index, coefficient in terms.items():
+                coefficients[index] += coefficient
+            return Constraint(tuple(coefficients), Fraction(bound))
+
+        constraints = [constraint({p: -1}, 0), constraint({first: -1}, 0),
+                       constraint({last: 1, first: -1, p: -1}, 0)]
+        for linear_constraint in guard.constraints if guard is not None else []:
+            clock = linear_constraint.clock_index
+            constraints.append(constraint({clock: -1, first: -1}, -linear_constraint.interval.left))
+            if not math.isinf(linear_constraint.interval.right):
+                constraints.append(constraint({clock: 1, first: 1, p: 1}, linear_constraint.interval.right))
+        for i, piece in enumerate(chain):
+            constraints.append(constraint({first + i: 1, first + i + 1: -1}, 0))
+            for end in [first + i, first + i + 1]:
+                for hypograph_constraint in piece.hypograph.constraints:
+                    terms = {clock: c for clock, c in enumerate(hypograph_constraint.coefficients[:n])}
+                    terms[p] = hypograph_constraint.coefficients[n]
+                    terms[end] = sum(hypograph_constraint.coefficients[:n])
+                    constraints.append(constraint(terms, hypograph_constraint.bound))
+        return Polyhedron(dimension, constraints)
+
+    def closing_constraint(self, chain_length: int) -> Constraint:
+        """
+        returns the constraint c_k >= c_0 + p, that makes the chain cover the
+        whole interval.
+        """
+        n = self.number_clocks
+        coefficients = [Fraction(0)] * (n + 2 + chain_length)
+        coefficients[n] = Fraction(1)
+        coefficients[n + 1] = Fraction(1)
+        coefficients[n + 1 + chain_length] = Fraction(-1)
+        return Constraint(tuple(coefficients), Fraction(0))
+
+    def chain_piece(self, window: Polyhedron) -> Optional[ConcavePiece]:
+        """
+        returns the concave piece v -> max {p : (v, p, c) in window}, None if
+        the window is empty.
+        """
+        n = self.number_clocks
+        projection = window.project(n + 1)
+        # Keep the upper bounds of p: the lower bounds become constraints on v
+        lower = [c for c in projection.constraints if c.coefficients[n] < 0]
+        upper = [c for c in projection.constraints if c.coefficients[n] > 0]
+        constraints = [c for c in projection.constraints if c.coefficients[n] >= 0]
+        for up in upper:
+            for low in lower:
+                up_factor, low_factor = -low.coefficients[n], up.coefficients[n]
+                constraints.append(Constraint(
+                    tuple(up_factor * u + low_factor * l for u, l in zip(up.coefficients, low.coefficients)),
+                    up_factor * up.bound + low_factor * low.bound))
+        hypograph = Polyhedron(n + 1, constraints).minimize()
+        if hypograph.is_empty():
+            return None
+        return ConcavePiece(hypograph)
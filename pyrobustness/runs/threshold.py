@@ -0,0 +1,242 @@
+# coding=utf-8
+"""
+==================================================
+Threshold explorer module
+==================================================
+This module provides an explorer with the API of explorer.Backtracking that
+answers the decision question "is the permissiveness of the start
+configuration at least threshold?" instead of computing the permissiveness.
+
+The player only proposes the sampled intervals of length >= threshold (with
+the sorted sampling, the first shorter one ends the loop), the first move
+whose delays all win is a witness and ends the node, and the first delay
+that loses refutes the move. A trace going only through such intervals has
+a permissiveness >= threshold: no trace is built, a ValueTrace keeps the
+length and the visited locations needed by the trace and cycle bounds.
+
+The answers are kept in a table keyed as the transposition table: for each
+node, the greatest threshold proved reachable and the smallest one proved
+out of reach. The answer is monotone in the threshold, so the table serves
+all the queries of a bisection.
+
+Classes:
+------
+ThresholdEntry
+ThresholdBacktracking
+------
+"""
+from __future__ import annotations  # For forward reference typing
+
+import math
+from fractions import Fraction
+from typing import Dict, Hashable, Iterator, List, NamedTuple, Optional, Tuple
+
+import pyrobustness.runs.exceptions as exceptions
+import pyrobustness.runs.explorer as explorer
+import pyrobustness.runs.moves as moves
+from pyrobustness.dtype import Delay
+
+Configuration = explorer.Configuration
+Move = explorer.Move
+ValueTrace = explorer.ValueTrace
+
+
+class ThresholdEntry(NamedTuple):
+    """
+    What the threshold queries proved on a node: its permissiveness is
+    >= won and < lost. height is the height of the greatest sub-tree
+    explored for it (see the budget rule of the transposition module).
+    """
+    won: float
+    lost: float
+    height: int
+
+
+class ThresholdBacktracking(explorer.Backtracking):
+    """
+    Explorer answering threshold queries, see decide and bisection. It
+    takes the same parameters as explorer.Backtracking.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threshold_table: Dict[Hashable, ThresholdEntry] = {}
+        self._threshold_context = None
+        self.nodes = 0
+
+    def prepare_search(self, to_print=False) -> None:
+        super().prepare_search(to_print)
+        if self.transposition_table.context != self._threshold_context:
+            self.threshold_table.clear()
+            self._threshold_context = self.transposition_table.context
+
+    def decide(self, threshold: Delay, to_print=False) -> bool:
+        """
+        returns True if the permissiveness of the start configuration is at
+        least threshold.
+        :param threshold: the permissiveness to reach (in time units, even
+        with integer_ticks)
+        :param to_print: True to log the exploration with print_class
+        :return: a boolean
+        """
+        self.prepare_search(to_print)
+        if self.ticks is not None:
+            threshold = threshold * self.ticks.denominator
+        return self._decide(self.start, ValueTrace(visits=self.root_visits()), threshold)
+
+    def bisection(self, tolerance: Delay, to_print=False) -> Tuple[float, float]:
+        """
+        Bound the permissiveness of the start configuration by threshold
+        queries, halving [0, bound] until it is narrower than tolerance.
+        :param tolerance: the greatest width of the result, > 0
+        :param to_print: True to log the explorations with print_class
+        :return: (low, high) such that low <= permissiveness < high, or
+        low = high = permissiveness (the bound of the explorer, or math.inf
+        if the start configuration is the goal), or (-math.inf, 0) if the
+        goal can not be reached
+        """
+        if not tolerance > 0:
+            raise ValueError("The tolerance must be positive")
+        if self.goal_cond(self.start):
+            return math.inf, math.inf
+        low = 0
+        high = self.bound if self.ticks is None else self.ticks.from_ticks(self.bound)
+        if not self.decide(low, to_print):
+            return -math.inf, low
+        if self.decide(high, to_print):
+            # No interval is longer than the bound
+            return high, high
+        while high - low > tolerance:
+            middle = Fraction(low + high) / 2
+            if self.decide(middle, to_print):
+                low = middle
+            else:
+                high = middle
+        return low, high
+
+    def threshold_moves(self, current: Configuration, max_moves: List[Move], threshold: Delay) -> Iterator[Move]:
+        """
+        returns a generator of the moves of gen_next_poss whose interval is
+        at least threshold long (and whose move_bound reaches threshold).
+        """
+        for next_poss in self.gen_next_poss(current, max_moves):
+            if moves.compute_interval_length(next_poss) >= threshold:
+                if self.move_bound(next_poss) >= threshold:
+                    yield next_poss
+            elif self.sorted_sampling:
+                # The next moves are not greater
+                return
+
+    def _decide(self, current: Configuration, trace: ValueTrace, threshold: Delay) -> bool:
+        if self.goal_cond(current):
+            return True
+        self.check_fail(trace)
+        if self.loop_cond(current, trace):
+            return False
+        self.nodes += 1
+
+        key = self.memo_key(current, trace)
+        entry = self.threshold_table.get(key)
+        if entry is not None and entry.height < self.trace_bound - len(trace):
+            if threshold <= entry.won:
+                return True
+            if threshold >= entry.lost:
+                return False
+
+        max_moves = self.extract_max_moves(current)
+        if self.node_bound(max_moves) < threshold:
+            return False
+        deepest = self._deepest
+        self._deepest = len(trace)
+        if self.endpoint_values and all(self.endpoint_move(max_move) for max_move in max_moves):
+            won = any(self._decide_endpoints(current, trace, max_move, threshold)
+                      for max_move in max_moves if self.move_bound(max_move) >= threshold)
+        else:
+            won = any(self._decide_move(current, trace, next_poss, threshold)
+                      for next_poss in self.threshold_moves(current, max_moves, threshold))
+        height = self._deepest - len(trace)
+        if entry is None:
+            entry = ThresholdEntry(won=-math.inf, lost=math.inf, height=height)
+        self.threshold_table[key] = ThresholdEntry(won=max(entry.won, threshold) if won else entry.won,
+                                                   lost=entry.lost if won else min(entry.lost, threshold),
+                                                   height=max(entry.height, height))
+        self._deepest = max(deepest, self._deepest)
+        return won
+
+    def _decide_move(self, current: Configuration, trace: ValueTrace, move: Move, threshold: Delay) -> bool:
+        """
+        returns True if every delay of the opponent in move leads to a
+        configuration of permissiveness >= threshold. The delays dropped by
+        the cycle bound are not choices of the opponent, but at least one
+        delay must remain.
+        """
+        reached = False
+        for delay_move, next_config, next_trace in self.order_delays(current, trace, move):
+            try:
+                if not self._decide(next_config, next_trace, threshold):
+                    return False
+            except exceptions.CycleException:
+                continue
+            reached = True
+        return reached
+
+    def _decide_delay(self, current: Configuration, trace: ValueTrace, max_move: Move, delay: Delay,
+                      threshold: Delay) -> Optional[bool]:
+        """
+        returns True if the delay in max_move leads to a configuration of
+        permissiveness >= threshold, False if not, None if the cycle bound
+        drops the delay.
+        """
+        delay_move = moves.Move(max_move["action"],
+                                [moves.Step(interval=delay, target_location=max_move["step"][0].target_location)])
+        next_config = moves.next_step(timed_automaton=self.search_ta, configuration=current, delay_move=delay_move)
+        if self.goal_cond(next_config):
+            return True
+        try:
+            return self._decide(next_config, trace.add_step(configuration=current, move=max_move, delay=delay),
+                                threshold)
+        except exceptions.CycleException:
+            return None
+
+    def _decide_endpoints(self, current: Configuration, trace: ValueTrace, max_move: Move, threshold: Delay) -> bool:
+        """
+        _decide_move for all the sampled intervals of max_move against the
+        branch free opponent (see Backtracking._backtrack_endpoints). A
+        sampled interval wins if none of its ends loses and one of them
+        wins (the other may be dropped by the cycle bound). The lowest left
+        ends and the greatest right ends that do not lose and that win are
+        the best ones: the ends are tried from the outside in, each at most
+        once, until they are found.
+        """
+        move_interval = moves.global_interval(max_move)
+        left = move_interval.left
+        right = self.bound if math.isinf(move_interval.right) else move_interval.right
+        statuses: Dict[Delay, Optional[bool]] = {}
+        lefts = self._decide_ends(current, trace, max_move, threshold, statuses, left, right, 1)
+        rights = self._decide_ends(current, trace, max_move, threshold, statuses, right, left, -1)
+        return any(low is not None and high is not None and high - low >= threshold and
+                   (low < high or (low == left and high == right))
+                   for low, high in [(lefts[1], rights[0]), (lefts[0], rights[1])])
+
+    def _decide_ends(self, current: Configuration, trace: ValueTrace, max_move: Move, threshold: Delay,
+                     statuses: Dict[Delay, Optional[bool]], start: Delay, other_end: Delay,
+                     direction: int) -> Tuple[Optional[Delay], Optional[Delay]]:
+        """
+        returns the first end delay from start (towards other_end) that does
+        not lose and the first one that wins, None if there is none.
+        :param statuses: the results of _decide_delay already computed for
+        the ends of max_move
+        """
+        not_lost = None
+        distance = max(threshold, 0)
+        delay = start
+        while (other_end - delay) * direction >= distance and (delay == start or delay != other_end):
+            if delay not in statuses:
+                statuses[delay] = self._decide_delay(current, trace, max_move, delay, threshold)
+            if statuses[delay] is not False:
+                if not_lost is None:
+                    not_lost = delay
+                if statuses[delay]:
+                    return not_lost, delay
+            delay += direction * self.interval_sampling_step
+        return not_lost, None
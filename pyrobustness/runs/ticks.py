@@ -0,0 +1,150 @@
+# coding=utf-8
+"""
+==================================================
+Integer ticks module
+==================================================
+Once the sampling step, the guard constants and the start valuation are
+fixed, every interval bound, valuation and delay reached by the explorer is
+a multiple of 1/D, D being the least common multiple of their denominators.
+This module scales these quantities to integer ticks of 1/D, so that the
+search does integer arithmetic only (a Fraction pays a gcd normalization on
+each operation), and converts the results back to Fraction.
+
+Classes:
+------
+TickScale
+------
+"""
+from __future__ import annotations  # For forward reference typing
+
+import math
+from fractions import Fraction
+from functools import reduce
+from typing import Callable, List
+
+import pyrobustness.runs.exceptions as exceptions
+import pyrobustness.runs.moves as moves
+import pyrobustness.ta.guards as guards
+import pyrobustness.ta.timedauto as timed_auto
+from pyrobustness.dtype import Delay
+from pyrobustness.ta.interval import Interval
+
+Configuration = timed_auto.Configuration
+Move = moves.Move
+TimedAutomaton = timed_auto.TimedAutomaton
+
+
+class TickScale(object):
+    """
+    Conversion between delays and integer ticks of 1/denominator.
+    :param denominator: the number of ticks in a time unit
+    """
+
+    def __init__(self, denominator: int):
+        self.denominator = denominator
+
+    @classmethod
+    def for_search(cls, ta: TimedAutomaton, start: Configuration, interval_sampling_step: Delay,
+                   strategy_opponent) -> TickScale:
+        """
+        returns the scale of the search of an explorer: the denominators of
+        the sampling step, of the guard constants, of the start valuation and
+        of the parameters of the opponent strategy are multiples of its
+        denominator.
+        """
+        values = [interval_sampling_step] + list(start.valuation) + list(getattr(strategy_opponent, "parameters", ()))
+        for start_location, end_location in ta.edges:
+            for label in ta[start_location][end_location].values():
+                for constraint in label.guard.constraints:
+                    values.extend([constraint.interval.left, constraint.interval.right])
+        return cls(reduce(lambda a, b: a * b // math.gcd(a, b),
+                          (Fraction(v).denominator for v in values if not math.isinf(v)), 1))
+
+    def to_ticks(self, value: Delay) -> Delay:
+        if math.isinf(value):
+            return value
+        ticks = value * self.denominator
+        if isinstance(ticks, Fraction):
+            if ticks.denominator != 1:
+                raise exceptions.NotOnTickGrid(value=str(value), denominator=self.denominator)
+            ticks = ticks.numerator
+        return ticks
+
+    def from_ticks(self, ticks: Delay) -> Delay:
+        if math.isinf(ticks):
+            return ticks
+        return Fraction(ticks, self.denominator)
+
+    def interval(self, interval: Interval) -> Interval:
+        return Interval.unchecked(self.to_ticks(interval.left), self.to_ticks(interval.right), interval.closed_left,
+                                  interval.closed_right)
+
+    def interval_from_ticks(self, interval: Interval) -> Interval:
+        return Interval.unchecked(self.from_ticks(interval.left), self.from_ticks(interval.right),
+                                  interval.closed_left, interval.closed_right)
+
+    def configuration(self, configuration: Configuration) -> Configuration:
+        return Configuration(location=configuration.location,
+                             valuation=[self.to_ticks(v) for v in configuration.valuation])
+
+    def configuration_from_ticks(self, configuration: Configuration) -> Configuration:
+        return Configuration(location=configuration.location,
+                             valuation=[self.from_ticks(v) for v in configuration.valuation])
+
+    def move_from_ticks(self, move: Move) -> Move:
+        """
+        returns a move (or a delay move) whose steps are given in ticks, in
+        time units.
+        """
+        return moves.Move(move["action"],
+                          [moves.Step(interval=self.interval_from_ticks(step.interval)
+                                      if isinstance(step.interval, Interval) else self.from_ticks(step.interval),
+                                      target_location=step.target_location)
+                           for step in move["step"]])
+
+    def move(self, move: Move) -> Move:
+        return moves.Move(move["action"],
+                          [moves.Step(interval=self.interval(step.interval)
+                                      if isinstance(step.interval, Interval) else self.to_ticks(step.interval),
+                                      target_location=step.target_location)
+                           for step in move["step"]])
+
+    def timed_automaton(self, ta: TimedAutomaton) -> TimedAutomaton:
+        """
+        returns a copy of the timed automaton whose guard constants are
+        given in ticks.
+        """
+        transitions = []
+        for start_location, end_location in ta.edges:
+            data = {}
+            for action, label in ta[start_location][end_location].items():
+                constraints = [guards.LinearConstraint.unchecked(self.to_ticks(constraint.interval.left),
+                                                                 self.to_ticks(constraint.interval.right),
+                                                                 constraint.clock_index)
+                               for constraint in label.guard.constraints]
+                data[action] = guards.Label(type(label.guard)(constraints), label.resets)
+            transitions.append(timed_auto.Edge(start_location, end_location, data))
+        return TimedAutomaton(transitions=transitions,
+                              init_location=ta.init_location,
+                              goal_location=ta.goal_location,
+                              number_clocks=ta.number_clocks,
+                              overwrite=ta._flags.overwrite)
+
+    def strategy(self, strategy_opponent) -> Callable[[Move], List[Move]]:
+        """
+        returns the opponent strategy working on ticks: the strategies of
+        opponentstrategy are built again with their parameters in ticks, the
+        other ones get and return moves in time units.
+        """
+        if hasattr(strategy_opponent, "factory"):
+            return strategy_opponent.factory(*(self.to_ticks(p) for p in strategy_opponent.parameters))
+
+        def strategy(move: Move) -> List[Move]:
+            return [self.move(delay_move) for delay_move in strategy_opponent(self.move_from_ticks(move))]
+
+        return strategy
+
+
+# The scale of the searches without integer_ticks: it converts their int
+# values to Fraction (see Backtracking.result_trace)
+UNIT_SCALE = TickScale(1)
@@ -0,0 +1,135 @@
+# coding=utf-8
+"""
+==================================================
+Transposition table module
+==================================================
+This module provides the memo table used by the explorer to reuse the value
+of a sub-game when the same configuration is reached through different
+interval/delay choices.
+
+Every explored node returns the permissiveness of the whole trace, i.e.
+min(p, W) where p is the permissiveness of the prefix that led to the node
+and W is the value of the sub-game starting at the configuration. The table
+stores what a search proved about W:
+- an exact entry (the node returned a value v < p, hence W = v),
+- a lower bound entry (the node returned v >= p, hence only W >= v is known).
+
+An exact entry can answer any later query. A lower bound entry answers a
+query only if its prefix permissiveness p' satisfies p' <= v, in which case
+min(p', W) = p'. With the alpha-beta optimization it also answers a query
+whose beta satisfies beta <= v (fail-high cutoff). Results that failed low
+(v <= alpha) are only upper bounds and are not stored by the explorer.
+
+Budget rule: an entry also records the height of the sub-tree that was
+explored to prove it (how many trace nodes were added below the node). It is
+reused only if the current trace still has room for that height under
+trace_bound, so that a cached answer never hides a BoundException raised in
+that sub-tree. The cycle bound makes the value of a node depend on the number
+of visits of each location along the path: the explorer puts these counts in
+the key whenever the timed automaton has cycles.
+
+Classes:
+------
+TableEntry
+TranspositionTable
+------
+"""
+from __future__ import annotations  # For forward reference typing
+
+import math
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+Key = Hashable
+
+
+class TableEntry(NamedTuple):
+    permissiveness: float
+    exact: bool
+    suffix: Optional[List]
+    height: int
+
+
+class TranspositionTable(object):
+    """
+    Memo table of sub-game values, keyed on (location, valuation) by the
+    explorer.
+
+    The values depend on the sampling step, the bound and the opponent
+    strategy of the search: the table remembers them as its context and is
+    emptied when it is used with another one.
+    """
+
+    def __init__(self):
+        self.entries: Dict[Key, TableEntry] = {}
+        self.context = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def set_context(self, context: Tuple):
+        """
+        Empty the table if the search context (sampling step, bound, opponent
+        strategy...) is not the one its entries were computed with.
+        :param context: a tuple of the parameters the sub-game values depend on
+        """
+        if context != self.context:
+            self.clear()
+            self.context = context
+
+    def peek(self, key: Key) -> Optional[TableEntry]:
+        """
+        returns the entry of a key without counting a hit or a miss.
+        """
+        return self.entries.get(key)
+
+    def lookup(self, key: Key, prefix_permissiveness: float,
+               remaining: int, beta: float = math.inf) -> Optional[TableEntry]:
+        """
+        returns the entry that answers the query, or None.
+        :param key: the key of the node
+        :param prefix_permissiveness: the permissiveness of the trace leading
+        to the node
+        :param remaining: the number of trace nodes that can still be added
+        before the trace bound is reached
+        :param beta: the beta of the alpha-beta window of the node
+        :return: a TableEntry or None
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry.height >= remaining or \
+                (not entry.exact and prefix_permissiveness > entry.permissiveness and beta > entry.permissiveness):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def store(self, key: Key, prefix_permissiveness: float,
+              permissiveness: float, suffix: Optional[List], height: int,
+              lower_bound_only: bool = False):
+        """
+        Store the result of the search of a node.
+        :param key: the key of the node
+        :param prefix_permissiveness: the permissiveness of the trace leading
+        to the node
+        :param permissiveness: the permissiveness returned by the search
+        :param suffix: the trace cells added below the node, None if no trace
+        :param height: the height of the explored sub-tree
+        :param lower_bound_only: True if the search only proved a lower bound
+        """
+        exact = not lower_bound_only and \
+            (permissiveness < prefix_permissiveness or prefix_permissiveness == math.inf)
+        previous = self.entries.get(key)
+        if not exact and previous is not None and \
+                (previous.exact or previous.permissiveness >= permissiveness):
+            # Keep the entry that answers the most queries
+            return
+        self.entries[key] = TableEntry(permissiveness=permissiveness, exact=exact, suffix=suffix, height=height)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
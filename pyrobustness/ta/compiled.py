@@ -0,0 +1,230 @@
+# coding=utf-8
+"""
+==================================================
+Compiled timed automaton module
+==================================================
+This module provides a read-only form of a timed automaton with linear
+guards, built once for the search. The locations and the actions are
+numbered, and each location has a table of its outgoing edges holding, for
+each clock, the lower and upper bounds of the guard, the resets as a bit
+mask and the id of the target location. Enabling a delay or passing an edge
+then reads a few tuples instead of walking the networkx adjacency views and
+the guard objects.
+
+The compiled automaton only holds tuples, dicts, numbers and NumPy arrays:
+it can be pickled and sent to worker processes.
+
+enabled_delays_batch evaluates the enabled delays of all the outgoing edges
+of a location for a whole array of valuations at once. It is exact on
+integer valuations (the guard constants must then be integers, e.g. ticks
+of the ticks module) and follows float rounding on float valuations.
+
+Classes:
+------
+CompiledEdge
+EnabledDelays
+CompiledTimedAutomaton
+------
+"""
+from __future__ import annotations  # For forward reference typing
+
+import math
+from fractions import Fraction
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy
+
+import pyrobustness.ta.exceptions as exceptions
+import pyrobustness.ta.guards as guards
+from pyrobustness.dtype import Delay, Valuation
+from pyrobustness.ta.interval import Interval, EMPTY_INTERVAL
+
+
+class CompiledEdge(NamedTuple):
+    """
+    An outgoing edge of a compiled location: the guard is
+    lower[i] <= x_i <= upper[i] for each clock i (0 and math.inf for the
+    clocks it does not constrain) and the clock i is reset if the bit i of
+    resets is set.
+    """
+    action: int
+    target: int
+    lower: Tuple[Delay, ...]
+    upper: Tuple[Delay, ...]
+    resets: int
+
+
+class EnabledDelays(NamedTuple):
+    """
+    The enabled delays of the outgoing edges of a location for N valuations:
+    row e of each (edges x N) array is for the edge e of the location. The
+    delays enabling the edge e from the valuation n are the closed interval
+    [lower[e, n], upper[e, n]], empty if empty[e, n] is True. upper is a
+    float array (holding math.inf) if a guard has no upper bound.
+    """
+    lower: numpy.ndarray
+    upper: numpy.ndarray
+    empty: numpy.ndarray
+
+
+class CompiledTimedAutomaton(object):
+    """
+    Compact read-only form of a TimedAutomaton with linear guards, see
+    TimedAutomaton.compile.
+    :param ta: the timed automaton
+    """
+
+    def __init__(self, ta):
+        self.number_clocks = ta.number_clocks
+        self.locations: Tuple = tuple(ta.nodes)
+        self.location_ids: Dict = {location: i for i, location in enumerate(self.locations)}
+        actions = []
+        action_ids = {}
+        out_edges: List[List[CompiledEdge]] = [[] for _ in self.locations]
+        self.transitions: Dict[Tuple[int, int, int], CompiledEdge] = {}
+        for location in self.locations:
+            for target_location, edge_attr in ta[location].items():
+                for action, label in edge_attr.items():
+                    if action not in action_ids:
+                        action_ids[action] = len(actions)
+                        actions.append(action)
+                    edge = self.compile_label(label, action_ids[action], self.location_ids[target_location])
+                    out_edges[self.location_ids[location]].append(edge)
+                    self.transitions[(self.location_ids[location], edge.action, edge.target)] = edge
+        self.actions: Tuple = tuple(actions)
+        self.action_ids: Dict = action_ids
+        self.out_edges: Tuple[Tuple[CompiledEdge, ...], ...] = tuple(tuple(edges) for edges in out_edges)
+        self.init_location: int = self.location_ids[ta.init_location]
+        self.goal_location: int = self.location_ids[ta.goal_location]
+        # (location id, dtype kind) -> guard bound arrays of enabled_delays_batch
+        self._guard_arrays: Dict[Tuple[int, str], Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]] = {}
+
+    def compile_label(self, label: guards.Label, action: int, target: int) -> CompiledEdge:
+        if not isinstance(label.guard, guards.LinearGuard):
+            raise exceptions.UnknownGuardType
+        lower = [0] * self.number_clocks
+        upper = [math.inf] * self.number_clocks
+        for constraint in label.guard.constraints:
+            # Two constraints on the same clock: the guard is their intersection
+            clock = constraint.clock_index
+            lower[clock] = max(lower[clock], constraint.interval.left)
+            upper[clock] = min(upper[clock], constraint.interval.right)
+        resets = 0
+        for clock in label.resets:
+            if clock < self.number_clocks:
+                resets |= 1 << clock
+        return CompiledEdge(action=action, target=target, lower=tuple(lower), upper=tuple(upper), resets=resets)
+
+    def edges(self, location) -> Tuple[CompiledEdge, ...]:
+        """
+        returns the outgoing edges of a location, in the order of the
+        TimedAutomaton adjacency.
+        :param location: a location of the timed automaton (not its id)
+        """
+        return self.out_edges[self.location_ids[location]]
+
+    def edge(self, location, action, target_location) -> Optional[CompiledEdge]:
+        """
+        returns the edge from location to target_location labelled by action,
+        None if there is none.
+        """
+        action_id = self.action_ids.get(action)
+        target = self.location_ids.get(target_location)
+        if action_id is None or target is None:
+            return None
+        return self.transitions.get((self.location_ids[location], action_id, target))
+
+    @staticmethod
+    def enabled_delays_set(edge: CompiledEdge, valuation: Valuation) -> Interval:
+        """
+        returns the interval of the delays enabling the guard of edge, as
+        LinearGuard.enabled_delays_set.
+        :param edge: a CompiledEdge
+        :param valuation: array_like
+        :return: an Interval.
+        """
+        lower_bound = 0
+        upper_bound = math.inf
+        for low, up, value in zip(edge.lower, edge.upper, valuation):
+            if low - value > lower_bound:
+                lower_bound = low - value
+            if up - value < upper_bound:
+                upper_bound = up - value
+        if lower_bound > upper_bound:
+            return EMPTY_INTERVAL
+        return Interval.unchecked(lower_bound, upper_bound)
+
+    @staticmethod
+    def valuation_after_passing_guard(edge: CompiledEdge, valuation: Valuation, delay: Delay) -> Optional[Valuation]:
+        """
+        returns the valuation after waiting delay and passing edge (resets
+        applied), None if the delay does not check the guard.
+        """
+        val = [value + delay for value in valuation]
+        for low, up, value in zip(edge.lower, edge.upper, val):
+            if not low <= value <= up:
+                return None
+        resets = edge.resets
+        clock = 0
+        while resets:
+            if resets & 1:
+                val[clock] = 0
+            resets >>= 1
+            clock += 1
+        return val
+
+    def guard_arrays(self, location, kind: str) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        returns the (edges x clocks) arrays of the lower bounds, of the upper
+        bounds and of the clocks having a finite upper bound of the outgoing
+        edges of a location, as integers (kind "i") or floats (kind "f").
+        """
+        location_id = self.location_ids[location]
+        arrays = self._guard_arrays.get((location_id, kind))
+        if arrays is None:
+            edges = self.out_edges[location_id]
+            shape = (len(edges), self.number_clocks)
+            dtype = numpy.int64 if kind == "i" else numpy.float64
+            lower = numpy.array([[self.constant(b, kind) for b in edge.lower] for edge in edges],
+                                dtype=dtype).reshape(shape)
+            bounded = numpy.array([[not math.isinf(b) for b in edge.upper] for edge in edges],
+                                  dtype=bool).reshape(shape)
+            upper = numpy.array([[0 if math.isinf(b) else self.constant(b, kind) for b in edge.upper]
+                                 for edge in edges], dtype=dtype).reshape(shape)
+            arrays = self._guard_arrays[(location_id, kind)] = (lower, upper, bounded)
+        return arrays
+
+    @staticmethod
+    def constant(bound: Delay, kind: str):
+        if kind == "f":
+            return float(bound)
+        if Fraction(bound).denominator != 1:
+            raise exceptions.WrongType(element="guard constant " + str(bound),
+                                       right_type="integer for integer valuations")
+        return int(bound)
+
+    def enabled_delays_batch(self, location, valuations) -> EnabledDelays:
+        """
+        returns the enabled delays of every outgoing edge of location (in the
+        order of edges) for each valuation, as enabled_delays_set does for a
+        single one.
+        :param location: a location of the timed automaton (not its id)
+        :param valuations: an (N x clocks) array_like of integers or floats
+        :return: an EnabledDelays of (edges x N) arrays
+        """
+        valuations = numpy.asarray(valuations)
+        kind = "i" if valuations.dtype.kind in "iub" else "f"
+        valuations = valuations.astype(numpy.int64 if kind == "i" else numpy.float64, copy=False)
+        valuations = valuations.reshape(-1, self.number_clocks)
+        lower, upper, bounded = self.guard_arrays(location, kind)
+
+        # (edges x N x clocks) differences, reduced over the clocks
+        lower_delays = numpy.maximum((lower[:, None, :] - valuations[None, :, :]).max(axis=2, initial=0), 0)
+        no_bound = numpy.iinfo(numpy.int64).max if kind == "i" else math.inf
+        upper_delays = numpy.where(bounded[:, None, :], upper[:, None, :] - valuations[None, :, :],
+                                   no_bound).min(axis=2, initial=no_bound)
+        unbounded = ~bounded.any(axis=1)
+        if kind == "i" and unbounded.any():
+            upper_delays = upper_delays.astype(numpy.float64)
+            upper_delays[unbounded] = math.inf
+        return EnabledDelays(lower=lower_delays, upper=upper_delays, empty=lower_delays > upper_delays)
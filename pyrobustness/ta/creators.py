@@ -2,6 +2,7 @@
 import pyrobustness.ta.timedauto as timed_auto
 import pyrobustness.ta.guards as guards
 import pyrobustness.ta.exceptions as exceptions
+from pyrobustness.dtype import check_valuation
 
 """
 Module to generate from JSON-like the objects of the ta library 
@@ -157,6 +158,27 @@ def edge_creator(serialized):
     )
 
 
+def configuration_creator(location, valuation, timed_automaton=None):
+    """
+    Generate a Configuration, checking its clock values (and, given the timed
+    automaton, that it is one of its configurations: see
+    TimedAutomaton.check_configuration).
+    :param location: integer or str
+    :param valuation: a list of integers, Fraction or math.inf
+    :param timed_automaton: the TimedAutomaton of the configuration, or None
+    :return: a Configuration
+    -----
+    Example:
+    configuration_creator(location=0, valuation=[0, Fraction(1, 2)])
+    """
+    configuration = timed_auto.Configuration(location=location, valuation=list(valuation))
+    if timed_automaton is None:
+        check_valuation(configuration.valuation)
+    else:
+        timed_automaton.check_configuration(configuration)
+    return configuration
+
+
 def timed_automaton_creator(serialized):
     """
     Generate from a JSON-like syntax a linearGuard.
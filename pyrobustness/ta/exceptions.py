@@ -59,6 +59,16 @@ class NegativeIntervalException(Exception):
     pass
 
 
+class ValuationSizeException(Exception):
+    """
+    Raised when a valuation does not have a value for each clock of the
+    timed automaton.
+    """
+
+    def __init__(self, valuation, number_clocks):
+        super().__init__("Valuation: " + str(valuation) + " should have at least " + str(number_clocks) + " clock values")
+
+
 class NegativeClockIndexException(Exception):
     pass
 
@@ -102,3 +112,14 @@ class EmptyInterval(Exception):
 class BoundException(Exception):
     def __init__(self, lower_bound, upper_bound):
         super().__init__("left side " + lower_bound + " of interval must be <= right side" + upper_bound)
+
+
+class FrozenObjectException(AttributeError):
+    """
+    Raised when an attribute of an immutable object (interval, constraint,
+    guard, label) is set or deleted.
+    """
+
+    def __init__(self, element, attribute):
+        super().__init__("Can not change the attribute " + attribute + " of the immutable " +
+                         type(element).__name__ + " " + str(element))
@@ -19,17 +19,41 @@ LinearGuard: provide guard that contain only linear constrains.
 Transition: provide an object that represents the transitions: a couple of
 guards and a set of resets.
 
+The constraints, guards and labels are immutable and hashable, as the
+intervals: they can be keys of dictionaries and members of sets.
+
 ------
 """
 from __future__ import annotations  # For forward reference typing
 
 import pyrobustness.ta.exceptions as exceptions
-from pyrobustness.dtype import Delay, Valuation, Reset, check_delay_type
-from pyrobustness.ta.interval import Interval
-from typing import List
+import pyrobustness.dtype as dtype
+from pyrobustness.dtype import Delay, Valuation, Reset, check_delay_type, check_valuation
+from pyrobustness.ta.interval import Interval, EMPTY_INTERVAL
+from typing import Iterable
+
+
+class FrozenObject(object):
+    """
+    Base of the immutable objects of this module: their attributes are set
+    once, by _freeze in their constructor.
+    """
+    __slots__ = []
 
+    def _freeze(self, **attributes) -> None:
+        for key, value in attributes.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise exceptions.FrozenObjectException(self, key)
+
+    def __delattr__(self, key):
+        raise exceptions.FrozenObjectException(self, key)
+
+
+class AbstractConstraint(FrozenObject):  # pragma: no cover
+    __slots__ = []
 
-class AbstractConstraint(object):  # pragma: no cover
     def __init__(self):
         raise exceptions.AbstractConstructionException
 
@@ -46,10 +70,26 @@ class LinearConstraint(AbstractConstraint):
     # noinspection PyMissingConstructor
     def __init__(self, lower_bound, upper_bound, clock_index):
         # TODO: Document that intervals are considered as closed.
-        self.interval = Interval(lower_bound, upper_bound)
+        interval = Interval(lower_bound, upper_bound)
+        # The same guard constants come back on many edges
+        interval = Interval.interned(interval.left, interval.right)
         if clock_index < 0:
             raise exceptions.NegativeClockIndexException
-        self.clock_index = clock_index
+        self._freeze(interval=interval, clock_index=clock_index)
+
+    @staticmethod
+    def unchecked(lower_bound, upper_bound, clock_index) -> LinearConstraint:
+        """
+        returns the constraint without checking nor converting its bounds
+        (see Interval.unchecked): for trusted callers only, as ticks.TickScale
+        whose integer bounds must stay int.
+        """
+        constraint = object.__new__(LinearConstraint)
+        constraint._freeze(interval=Interval.interned(lower_bound, upper_bound), clock_index=clock_index)
+        return constraint
+
+    def __reduce__(self):
+        return LinearConstraint, (self.interval.left, self.interval.right, self.clock_index)
 
     def __repr__(self) -> str:
         return self.__str__()
@@ -61,9 +101,14 @@ class LinearConstraint(AbstractConstraint):
         return ' '.join(s)
 
     def __eq__(self, other) -> bool:
+        if not isinstance(other, LinearConstraint):
+            return NotImplemented
         return self.interval == other.interval \
                and self.clock_index == other.clock_index
 
+    def __hash__(self) -> int:
+        return hash((self.interval, self.clock_index))
+
     def constraint_check(self, valuation: Valuation, delay: Delay) -> bool:
         """
         returns a bool that is True if and only if the vector valuation + delay checks the constraint.
@@ -71,9 +116,9 @@ class LinearConstraint(AbstractConstraint):
         :param delay: an integer, a fraction, or math.inf
         :return: a bool
         """
-        check_delay_type(delay)
-        for val in valuation:
-            check_delay_type(val)
+        if dtype.DEBUG_CHECKS:
+            check_delay_type(delay)
+            check_valuation(valuation)
 
         applied_valuation = valuation[self.clock_index] + delay
         return applied_valuation in self.interval
@@ -85,13 +130,13 @@ class LinearConstraint(AbstractConstraint):
         :param interval: an interval
         :return: a bool
         """
-        for val in valuation:
-            check_delay_type(val)
+        if dtype.DEBUG_CHECKS:
+            check_valuation(valuation)
 
-        interval_valuation = Interval(
+        interval_valuation = Interval.unchecked(
             interval.left + valuation[self.clock_index],
             interval.right + valuation[self.clock_index],
-            closed=interval.closed)
+            interval.closed_left, interval.closed_right)
 
         return self.interval.include(interval_valuation)
 
@@ -107,14 +152,20 @@ class LinearConstraint(AbstractConstraint):
         if upper_bound < lower_bound:
             raise exceptions.EmptyInterval
         else:
-            return Interval(lower_bound, upper_bound)
+            return Interval.unchecked(lower_bound, upper_bound)
+
 
+class AbstractGuard(FrozenObject):
+    __slots__ = ["constraints"]
 
-class AbstractGuard(object):
-    def __init__(self, constraints):
-        if len(list(constraints)) == 0:
+    def __init__(self, constraints: Iterable[AbstractConstraint]):
+        constraints = tuple(constraints)
+        if len(constraints) == 0:
             raise exceptions.ConstraintNotFoundException
-        self.constraints = list(constraints)
+        self._freeze(constraints=constraints)
+
+    def __reduce__(self):
+        return type(self), (self.constraints,)
 
     def __len__(self):
         """
@@ -123,12 +174,14 @@ class AbstractGuard(object):
         """
         return len(self.constraints)
 
-    def add_constraints(self, constraints: List[AbstractConstraint]):
+    def add_constraints(self, constraints: Iterable[AbstractConstraint]) -> AbstractGuard:
         """
-        add constraints to the guard
+        returns the guard with the constraints of self and constraints (self
+        is immutable)
         :param constraints: a list of constraints
+        :return: a guard of the type of self
         """
-        self.constraints.extend(constraints)
+        return type(self)(self.constraints + tuple(constraints))
 
     def guard_check(self, valuation: Valuation, delay: Delay) -> bool:
         """
@@ -139,9 +192,9 @@ class AbstractGuard(object):
         """
 
         # checking the type
-        check_delay_type(delay)
-        for val in valuation:
-            check_delay_type(val)
+        if dtype.DEBUG_CHECKS:
+            check_delay_type(delay)
+            check_valuation(valuation)
 
         # checking the guard
         for constraint in self.constraints:
@@ -157,8 +210,8 @@ class AbstractGuard(object):
         :return: a bool
         """
         # checking the type
-        for val in valuation:
-            check_delay_type(val)
+        if dtype.DEBUG_CHECKS:
+            check_valuation(valuation)
 
         # checking the guard
         for constraint in self.constraints:
@@ -176,9 +229,9 @@ class AbstractGuard(object):
         """
 
         # checking the type
-        for val in valuation:
-            check_delay_type(val)
-        check_delay_type(delay)
+        if dtype.DEBUG_CHECKS:
+            check_valuation(valuation)
+            check_delay_type(delay)
 
         if self.guard_check(valuation, delay):
             return [valuation[i] + delay for i in valuation]
@@ -192,8 +245,13 @@ class AbstractGuard(object):
     def __eq__(self, other: AbstractGuard) -> bool:
         # Warning: The well-behavior of this function depends in the indexation
         # of the guards and resets.
+        if not isinstance(other, AbstractGuard):
+            return NotImplemented
         return self.constraints == other.constraints
 
+    def __hash__(self) -> int:
+        return hash(self.constraints)
+
     def __repr__(self) -> str:  # pragma: no cover
         return self.__str__()
 
@@ -204,6 +262,7 @@ class AbstractGuard(object):
 
 
 class LinearGuard(AbstractGuard):
+    __slots__ = []
 
     # TODO: add something to deal with someone adding two constraints with
     #  same clock_index. Sol1: exception and raise an error. Sol2: merge
@@ -217,8 +276,8 @@ class LinearGuard(AbstractGuard):
         :return: an Interval.
         """
 
-        for val in valuation:
-            check_delay_type(val)
+        if dtype.DEBUG_CHECKS:
+            check_valuation(valuation)
 
         # all interval are of the form [a,b] with a, b >= 0 and a < b
         # The cap of all [a,b] is
@@ -230,7 +289,7 @@ class LinearGuard(AbstractGuard):
             ub = min([i.right for i in intervals])
 
             if lb > ub:
-                return Interval(0, 0, closed='neither')
+                return EMPTY_INTERVAL
             # Raise exception when empty, or [3,2]
             # Enable to generalize to abstract guard if the enabled_delay_set
             # for each constraint is of the form: | x, y | with x,y float. Ask
@@ -240,10 +299,10 @@ class LinearGuard(AbstractGuard):
             # Nico: contrainte affine: une horloge OK, mais x+b*y bof?
             # Nico: 3 horloge: non!
             else:
-                return Interval(lb, ub)
+                return Interval.unchecked(lb, ub)
 
         except exceptions.EmptyInterval:
-            return Interval(0, 0, closed='neither')
+            return EMPTY_INTERVAL
 
     def well_formed(self, nb_clock: int) -> bool:
         for constraint in self.constraints:
@@ -277,7 +336,7 @@ class LinearGuard(AbstractGuard):
         return True
 
 
-class Label(object):
+class Label(FrozenObject):
     """
     Label(object)
 
@@ -308,12 +367,16 @@ class Label(object):
 
     """
 
+    __slots__ = ["guard", "resets"]
+
     def __init__(self, guard: AbstractGuard, resets: Reset):
 
         if len(guard) == 0:
             raise exceptions.GuardNotFoundException
-        self.guard = guard
-        self.resets = list(sorted(resets))
+        self._freeze(guard=guard, resets=tuple(sorted(resets)))
+
+    def __reduce__(self):
+        return Label, (self.guard, self.resets)
 
     def well_formed(self, nb_clocks: int):
         if len(self.resets) != 0 and \
@@ -325,12 +388,17 @@ class Label(object):
     def __eq__(self, other: Label) -> bool:
         # Warning: The well-behavior of this function depends in the indexation
         # of the guards and resets.
+        if not isinstance(other, Label):
+            return NotImplemented
         if self.guard != other.guard:
             return False
         if self.resets != other.resets:
             return False
         return True
 
+    def __hash__(self) -> int:
+        return hash((self.guard, self.resets))
+
     def __repr__(self) -> str:  # pragma: no cover
         return self.__str__()
 
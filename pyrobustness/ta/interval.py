@@ -2,15 +2,34 @@
 from __future__ import annotations  # For forward reference typing
 import math
 from fractions import Fraction
-from operator import gt, ge, lt, le
-from typing import Union, Optional
+from functools import lru_cache
+from operator import lt, le
+from typing import Iterator, List, Union, Optional
 
 from pyrobustness.misc import step_range
 from pyrobustness.ta import exceptions as exceptions
+import pyrobustness.dtype as dtype
 from pyrobustness.dtype import Delay, check_delay_type
 
 
+# The closedness names and their (closed_left, closed_right) ends
+CLOSED_ENDS = {"both": (True, True), "left": (True, False), "right": (False, True), "neither": (False, False)}
+CLOSED_NAMES = {ends: name for name, ends in CLOSED_ENDS.items()}
+
+
 class Interval(object):
+    """
+    An interval of delays, closed or open at each end. The intervals are
+    immutable and hashable (with their closedness): they can be keys of
+    dictionaries and members of sets.
+
+    The constructor checks its arguments. The code building intervals from
+    bounds it already knows valid (sub-intervals, merges, guard windows,
+    samplings) calls Interval.unchecked instead, and Interval.interned
+    shares one instance between the equal intervals built often.
+    """
+    __slots__ = ["left", "right", "closed_left", "closed_right"]
+
     def __init__(self, lower_bound: Delay, upper_bound: Delay, closed: str = "both"):
 
         if lower_bound < 0:
@@ -30,38 +49,82 @@ class Interval(object):
             raise exceptions.WrongType(element="upper_bound=" + str(upper_bound),
                                        right_type="integer or Fraction, or math.inf")
 
-        self.left = lower_bound
-        self.right = upper_bound
-        if closed not in ['both', 'right', 'left', 'neither']:
+        ends = CLOSED_ENDS.get(closed)
+        if ends is None:
             raise exceptions.IllegalClosedArgument
-        self.closed = closed
+        _set_left(self, lower_bound)
+        _set_right(self, upper_bound)
+        _set_closed_left(self, ends[0])
+        _set_closed_right(self, ends[1])
 
-    @property
-    def closed_right(self) -> bool:
+    @staticmethod
+    def unchecked(lower_bound: Delay, upper_bound: Delay, closed_left: bool = True,
+                  closed_right: bool = True) -> Interval:
         """
-        Is defined as a getter function!
-        returns True if the interval is closed at the right side
-        :return: a bool
+        returns the interval without checking the bounds: for trusted
+        callers only, whose bounds are valid (0 <= lower_bound <= upper_bound,
+        integers, fractions or math.inf). The integer bounds are kept as int
+        (the constructor converts them to Fraction): the ticks of
+        ticks.TickScale stay integers.
+        :param lower_bound: the left bound
+        :param upper_bound: the right bound
+        :param closed_left: True if the interval is closed at the left side
+        :param closed_right: True if the interval is closed at the right side
+        :return: an Interval
+        """
+        interval = _new(Interval)
+        _set_left(interval, lower_bound)
+        _set_right(interval, upper_bound)
+        _set_closed_left(interval, closed_left)
+        _set_closed_right(interval, closed_right)
+        return interval
+
+    @staticmethod
+    def interned(lower_bound: Delay, upper_bound: Delay, closed_left: bool = True,
+                 closed_right: bool = True) -> Interval:
+        """
+        Interval.unchecked, returning the same instance for equal intervals
+        (up to the size of the pool, emptied when full). Hashing the bounds
+        costs more than building the interval: for the intervals kept long
+        or compared often, as the ones of the guards.
         """
-        return self.closed in ["both", "right"]
+        # 1 == Fraction(1): the types are part of the key, an int interval
+        # of the ticks is not shared with a Fraction one
+        key = (lower_bound, upper_bound, closed_left, closed_right, type(lower_bound), type(upper_bound))
+        interval = _interned.get(key)
+        if interval is None:
+            if len(_interned) >= INTERNED_SIZE:
+                _interned.clear()
+            interval = _interned[key] = Interval.unchecked(lower_bound, upper_bound, closed_left, closed_right)
+        return interval
+
+    def __setattr__(self, key, value):
+        raise exceptions.FrozenObjectException(self, key)
+
+    def __delattr__(self, key):
+        raise exceptions.FrozenObjectException(self, key)
+
+    def __reduce__(self):
+        return Interval, (self.left, self.right, self.closed)
 
     @property
-    def open_right(self) -> bool:
+    def closed(self) -> str:
         """
         Is defined as a getter function!
-        returns True if the interval is open at the right side
-        :return: a bool
+        returns the closedness of the interval: 'both', 'left', 'right' or
+        'neither'
+        :return: a str
         """
-        return not self.closed_right
+        return CLOSED_NAMES[self.closed_left, self.closed_right]
 
     @property
-    def closed_left(self) -> bool:
+    def open_right(self) -> bool:
         """
         Is defined as a getter function!
-        returns True if the interval is closed at the left side
+        returns True if the interval is open at the right side
         :return: a bool
         """
-        return self.closed in ["both", "left"]
+        return not self.closed_right
 
     @property
     def open_left(self) -> bool:
@@ -92,7 +155,13 @@ class Interval(object):
         return (self.left < other.left) or ((self.left == other.left) and (self.right < other.right))
 
     def __eq__(self, other: Interval) -> bool:
-        return (self.left == other.left) and (self.right == other.right)
+        if not isinstance(other, Interval):
+            return NotImplemented
+        return (self.left == other.left) and (self.right == other.right) and \
+               self.closed_left == other.closed_left and self.closed_right == other.closed_right
+
+    def __hash__(self) -> int:
+        return hash((self.left, self.right, self.closed_left, self.closed_right))
 
     def __le__(self, other: Interval) -> bool:
         """
@@ -108,11 +177,14 @@ class Interval(object):
         :param item: a delay
         :return: a bool
         """
-        check_delay_type(item)
-        op1 = gt if self.open_left else ge
-        op2 = lt if self.open_right else le
-
-        return op1(item, self.left) and op2(item, self.right)
+        if dtype.DEBUG_CHECKS:
+            check_delay_type(item)
+        if self.closed_left:
+            if item < self.left:
+                return False
+        elif item <= self.left:
+            return False
+        return item <= self.right if self.closed_right else item < self.right
 
     def __str__(self) -> str:
         left_repr = "[" if self.closed_left else "("
@@ -127,7 +199,7 @@ class Interval(object):
         checks if self is an empty interval (i.e does not contains any delay)
         :return: a bool
         """
-        return (self.right == self.left) & (self.closed != 'both')
+        return self.right == self.left and not (self.closed_left and self.closed_right)
 
     def overlaps(self, other: Interval) -> bool:
         """
@@ -162,17 +234,14 @@ class Interval(object):
 
     def include(self, other: Interval) -> bool:
         """ check if self includes other"""
-        if self.closed == 'both':
-            return self.left in other and self.right in other
-
-        elif self.closed == 'right':
-            return self.left >= other.left and self.right in other
-
-        elif self.closed == 'left':
-            return other.right >= self.right and self.left in other
-
-        elif self.closed == 'neither':
-            return self.left >= other.left and self.right <= other.right
+        if self.closed_left:
+            if self.left not in other:
+                return False
+        elif self.left < other.left:
+            return False
+        if self.closed_right:
+            return self.right in other
+        return self.right <= other.right
 
     @staticmethod
     def interval_type(left: bool, right: bool) -> str:
@@ -204,9 +273,7 @@ class Interval(object):
         if not self.is_disjoint_and_mergeable(other):
             raise exceptions.NotMergeableOrDisjointIntervals(int_1 = self, int_2=other)
 
-        closed_type = self.interval_type(lowest.closed_left,
-                                         highest.closed_right)
-        return Interval(lowest.left, highest.right, closed=closed_type)
+        return Interval.unchecked(lowest.left, highest.right, lowest.closed_left, highest.closed_right)
 
     def sub_interval(self, left: Delay, right: Delay) -> Interval:
         """
@@ -221,19 +288,11 @@ class Interval(object):
             raise exceptions.NotIncludedInterval(int_1=str([left, right]),
                                                  int_2=str(self)
                                                  )
-        if left == self.left and right == self.right:
-            return Interval(left, right, closed=self.closed)
-
-        elif left == self.left and right != self.right \
-                and self.closed in ['right', 'neither']:
-            return Interval(left, right, closed='right')
-
-        elif left != self.left and right == self.right \
-                and self.closed in ['left', 'neither']:
-            return Interval(left, right, closed='left')
-
-        else:
-            return Interval(left, right, closed='both')
+        if left > right:
+            raise exceptions.BoundException(lower_bound=str(left), upper_bound=str(right))
+        # The ends of self are kept with their closedness, the others are closed
+        return Interval.unchecked(left, right, left != self.left or self.closed_left,
+                                  right != self.right or self.closed_right)
 
     def semi_sorted_sampling(self, step: Union[int, Fraction], bound: Optional[Union[int, Fraction]] = None):
         """
@@ -256,7 +315,7 @@ class Interval(object):
         sleft = self.left
         # sright = bound + self.left + step if (bound is not None and math.isinf(self.right)) else self.right
         sright = bound if (bound is not None and math.isinf(self.right)) else self.right
-        sampling = [Interval(sleft, sright, closed=self.closed)]
+        sampling = [Interval.unchecked(sleft, sright, self.closed_left, self.closed_right)]
 
         for left in step_range(sleft, sright + step, step):
             for right in step_range(sright - step, left, - step):
@@ -265,4 +324,83 @@ class Interval(object):
         for left in step_range(sleft + step, sright, step):
             sampling.append(self.sub_interval(left, sright))
 
-        return sampling
\ No newline at end of file
+        return sampling
+
+    def sorted_sampling(self, step: Union[int, Fraction], bound: Optional[Union[int, Fraction]] = None) -> \
+            LazySampling:
+        """
+        The intervals of semi_sorted_sampling, generated lazily by
+        non-increasing size: [left + i * step, right - k * step] for i + k =
+        0, 1, 2... (i increasing for the same i + k). The samplings are
+        memoised per (interval, step, bound): the same guard windows come
+        back all along a search.
+        :param step: an integer
+        :param bound: a bound to truncate infinite interval into finite, closed at right, interval
+        :return: a LazySampling, to iterate over the intervals
+        """
+        if math.isinf(step) or (math.isinf(self.right) and (bound is None or math.isinf(bound))):
+            raise ValueError("An argument is infinite")
+        return _sorted_sampling(self.left, self.right, self.closed, step, bound)
+
+    def _sorted_sampling_generator(self, step: Union[int, Fraction], bound: Optional[Union[int, Fraction]]):
+        sleft = self.left
+        sright = bound if (bound is not None and math.isinf(self.right)) else self.right
+        yield Interval.unchecked(sleft, sright, self.closed_left, self.closed_right)
+        # The sub-intervals of sub_interval: the inner ends are closed
+        closed_left = self.closed_left
+        closed_right = self.closed_right or sright != self.right
+        lefts = [sleft]
+        rights = [sright]
+        total = 1
+        while sright - sleft - total * step > 0:
+            lefts.append(lefts[-1] + step)
+            rights.append(rights[-1] - step)
+            for i in range(total + 1):
+                yield Interval.unchecked(lefts[i], rights[total - i], i > 0 or closed_left,
+                                         i < total or closed_right)
+            total += 1
+
+
+class LazySampling(object):
+    """
+    A sampling generated on demand and kept: the iterations share the
+    intervals already generated and only generate the missing ones.
+    """
+
+    def __init__(self, generator: Iterator[Interval]):
+        self._generator = generator
+        self._intervals: List[Interval] = []
+        self._finished = False
+
+    def __iter__(self) -> Iterator[Interval]:
+        index = 0
+        while True:
+            if index == len(self._intervals):
+                if self._finished:
+                    return
+                interval = next(self._generator, None)
+                if interval is None:
+                    self._finished = True
+                    return
+                self._intervals.append(interval)
+            yield self._intervals[index]
+            index += 1
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _sorted_sampling(left: Delay, right: Delay, closed: str, step: Union[int, Fraction],
+                     bound: Optional[Union[int, Fraction]]) -> LazySampling:
+    return LazySampling(Interval.unchecked(left, right, *CLOSED_ENDS[closed])._sorted_sampling_generator(step, bound))
+
+
+# The intervals shared by Interval.interned
+INTERNED_SIZE = 4096
+_interned = {}
+_new = object.__new__
+_set_left = Interval.left.__set__
+_set_right = Interval.right.__set__
+_set_closed_left = Interval.closed_left.__set__
+_set_closed_right = Interval.closed_right.__set__
+
+# The interval of the guards enabled by no delay
+EMPTY_INTERVAL = Interval.interned(0, 0, False, False)
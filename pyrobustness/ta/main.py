@@ -11,6 +11,9 @@ from typing import List
 import pyrobustness.ta.timedauto as timed_auto
 import pyrobustness.ta.creators as creators
 import pyrobustness.runs.explorer as explorer
+import pyrobustness.runs.parallel as parallel
+import pyrobustness.runs.symbolic as symbolic
+import pyrobustness.runs.grid as grid
 import pyrobustness.runs.opponentstrategy as opponent_strategy
 from benchmarks.bench_explorer import three_clock_automata_1_explo, three_clock_automata_2_explo
 from pyrobustness.runs.backtrack_log import BacktrackHTMLLogger, \
@@ -383,6 +386,109 @@ def experiment_runtime_4_auto(file="./experiment_f0_4auto.csv"):
             f.write(str(data) + "\n")
 
 
+def experiment_value_only(file="./experiment_value_only.csv"):
+    """
+    Runtime of the value only mode against the default mode, with and without
+    the rebuild of the best trace. On the bench_explorer automata the traces
+    are short and the two modes are close; on the long chains of formats_0,
+    where building the traces dominates, the value only mode pays off when the
+    trace is not rebuilt.
+    """
+    experimental_data: List[ExperimentalData] = []
+
+    explorations = []
+    for precision_denom in [2, 15]:
+        for explo, name in [
+            (three_clock_automata_1_explo, "3clock_6_21b"),
+            (three_clock_automata_2_explo, "3clock_6_21c"),
+        ]:
+            explorations.append((lambda value_only, explo=explo, precision_denom=precision_denom:
+                                 explo(precision_denom, [0, 0, 0], 0, value_only=value_only),
+                                 f"{name}_exploration_{precision_denom}", 2, Fraction(1, precision_denom)))
+    for number_of_transitions in [50, 100, 150]:
+        explorations.append((lambda value_only, number_of_transitions=number_of_transitions:
+                             explorer.Backtracking(ta=formats_0(number_of_transitions=number_of_transitions),
+                                                   start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                                   strategy_opponent=opponent_strategy.
+                                                   worst_case_branch_free_opponent_strategy(),
+                                                   interval_sampling_step=Fraction(1, 2),
+                                                   trace_bound=number_of_transitions + 1,
+                                                   value_only=value_only),
+                             f"formats_0_exploration_{number_of_transitions}", number_of_transitions,
+                             Fraction(1, 2)))
+
+    for explo, name, nb_transition, precision in explorations:
+        for value_only, rebuild_trace, suffix in [(False, False, ""),
+                                                  (True, False, "_value_only"),
+                                                  (True, True, "_value_only_rebuild")]:
+            t0 = time.time()
+            res = explo(value_only).backtracking(rebuild_trace=rebuild_trace)
+            t1 = time.time()
+            experimental_data.append(ExperimentalData(name + suffix,
+                                                      nb_transition,
+                                                      precision,
+                                                      t1 - t0,
+                                                      res.compute_trace_permissiveness(),
+                                                      1
+                                                      ))
+
+    with open(file, 'w') as f:
+        f.write("name;nb_transition;precision;runtime;result;nb_exec\n")
+        for data in experimental_data:
+            f.write(str(data) + "\n")
+
+
+@dataclasses.dataclass
+class SpeedupData(object):
+    name: str
+    precision: Fraction
+    jobs: int
+    sequential_runtime: float
+    parallel_runtime: float
+    result: Fraction
+
+    @property
+    def speedup(self) -> float:
+        return self.sequential_runtime / self.parallel_runtime
+
+    def __str__(self):
+        return f"{self.name};{self.precision};{self.jobs};{self.sequential_runtime};{self.parallel_runtime};" \
+               f"{self.speedup};{self.result}"
+
+
+def experiment_parallel(file="./experiment_parallel.csv", jobs_list=(2, 4)):
+    """
+    Speedup of the parallel explorer against the sequential one, see
+    ParallelBacktracking.speedup.
+    """
+    experimental_data: List[SpeedupData] = []
+
+    for precision_denom in [15, 30, 60]:
+        for explo, name in [
+            (three_clock_automata_1_explo, "3clock_6_21b"),
+            (three_clock_automata_2_explo, "3clock_6_21c"),
+        ]:
+            sequential = explo(precision_denom, [0, 0, 0], 0)
+            for jobs in jobs_list:
+                report = parallel.ParallelBacktracking(ta=sequential.ta,
+                                                       start=sequential.start,
+                                                       strategy_opponent=sequential.strategy_opponent,
+                                                       interval_sampling_step=sequential.interval_sampling_step,
+                                                       jobs=jobs).speedup()
+                experimental_data.append(SpeedupData(f"{name}_exploration_{precision_denom}",
+                                                     Fraction(1, precision_denom),
+                                                     jobs,
+                                                     report.sequential_time,
+                                                     report.parallel_time,
+                                                     report.permissiveness
+                                                     ))
+
+    with open(file, 'w') as f:
+        f.write("name;precision;jobs;sequential_runtime;parallel_runtime;speedup;result\n")
+        for data in experimental_data:
+            f.write(str(data) + "\n")
+
+
 def logger_exp():
     explorator = formats_1_exploration(2, [0, 0], 0)
     explorator.print_class = BacktrackHTMLLogger("./log.html")
@@ -442,6 +548,37 @@ def experiment_precision():
             f.write(str(r))
 
 
+def experiment_symbolic():
+    """
+    Runtime of the exact symbolic permissiveness on the configurations of
+    experiment_precision and experiment_precision_nbf, whose permissiveness
+    are 4/15 and 11/40.
+    """
+    for name, ta, valuation in [("format2", formats_1(), [Fraction(1, 5), Fraction(2, 3)]),
+                                ("non_branch_free", formats_non_branch_free(), [Fraction(1, 4), Fraction(7, 10)])]:
+        t0 = time.time()
+        engine = symbolic.SymbolicPermissiveness(ta)
+        engine.compute()
+        t1 = time.time()
+        res = engine.permissiveness(0, valuation)
+        t2 = time.time()
+        print(name, "compute:", t1 - t0, "query:", t2 - t1, "permissiveness:", res)
+
+
+def experiment_grid(precision_denom: int = 30):
+    """
+    Runtime of the grid permissiveness of formats_1: one backward pass gives
+    the sampled permissiveness of every valuation of the grid, among which
+    the configuration of experiment_precision.
+    """
+    t0 = time.time()
+    engine = grid.GridPermissiveness(formats_1(), Fraction(1, precision_denom))
+    engine.compute()
+    t1 = time.time()
+    res = engine.permissiveness(0, [Fraction(1, 5), Fraction(2, 3)])
+    print("format2", "valuations:", len(engine.valuations), "compute:", t1 - t0, "permissiveness:", res)
+
+
 def experiment_precision_nbf():
     location = 0
     valuation = [Fraction(1, 4), Fraction(7, 10)]
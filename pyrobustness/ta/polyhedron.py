@@ -0,0 +1,261 @@
+# coding=utf-8
+"""
+==================================================
+Polyhedron module
+==================================================
+This module provides closed convex polyhedra with exact (Fraction)
+coefficients: a polyhedron is the set of the points x of Q^n checking a
+finite list of constraints coefficients . x <= bound.
+
+The polyhedra are small (a few clocks and a few auxiliary variables), the
+operations are written for exactness and not for large dimensions: the
+projection uses Fourier-Motzkin elimination and the emptiness and
+redundancy tests use a dense two-phase simplex with Bland's rule.
+
+Classes:
+------
+Constraint
+Polyhedron
+------
+
+Methods:
+normalize_constraint
+maximize
+------
+"""
+from __future__ import annotations  # For forward reference typing
+
+import math
+from fractions import Fraction
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+Number = Union[int, Fraction]
+
+
+class Constraint(NamedTuple):
+    """
+    The constraint coefficients . x <= bound.
+    """
+    coefficients: Tuple[Fraction, ...]
+    bound: Fraction
+
+    def holds(self, point: Sequence[Number]) -> bool:
+        return sum(c * p for c, p in zip(self.coefficients, point) if c) <= self.bound
+
+
+def normalize_constraint(coefficients: Iterable[Number], bound: Number) -> Optional[Constraint]:
+    """
+    returns the constraint scaled such that its first non zero coefficient
+    is 1 or -1, so that two constraints with the same half-space have the
+    same coefficients.
+    :param coefficients: the coefficients of the constraint
+    :param bound: the bound of the constraint
+    :return: a Constraint, None if the constraint is always true
+    """
+    coefficients = tuple(Fraction(c) for c in coefficients)
+    pivot = next((c for c in coefficients if c != 0), None)
+    if pivot is None:
+        # 0 <= bound: always true, or never true
+        return None if bound >= 0 else Constraint(coefficients, Fraction(-1))
+    scale = abs(pivot)
+    return Constraint(tuple(c / scale for c in coefficients), Fraction(bound) / scale)
+
+
+def _pivot(rows: List[List[Fraction]], objective: List[Fraction], basis: List[int], row: int, col: int) -> None:
+    pivot_row = rows[row]
+    pivot_value = pivot_row[col]
+    if pivot_value != 1:
+        rows[row] = pivot_row = [x / pivot_value for x in pivot_row]
+    for other in rows + [objective]:
+        factor = other[col]
+        if factor != 0 and other is not pivot_row:
+            for j, x in enumerate(pivot_row):
+                if x != 0:
+                    other[j] -= factor * x
+    basis[row] = col
+
+
+def _run_simplex(rows: List[List[Fraction]], objective: List[Fraction], basis: List[int],
+                 columns: int) -> bool:
+    """
+    Maximize the objective row of a feasible tableau (Bland's rule). The last
+    entry of each row is its right-hand side; the objective row holds the
+    opposite of the reduced costs.
+    :return: False if the objective is unbounded, True otherwise
+    """
+    while True:
+        col = next((j for j in range(columns) if objective[j] < 0), None)
+        if col is None:
+            return True
+        row, best = None, None
+        for i, r in enumerate(rows):
+            if r[col] > 0:
+                ratio = r[-1] / r[col]
+                if best is None or ratio < best or (ratio == best and basis[i] < basis[row]):
+                    row, best = i, ratio
+        if row is None:
+            return False
+        _pivot(rows, objective, basis, row, col)
+
+
+def maximize(objective: Sequence[Number], constraints: Sequence[Constraint]) -> Fraction:
+    """
+    returns the maximum of objective . x over the points x checking the
+    constraints (the variables are free).
+    :param objective: the coefficients of the objective
+    :param constraints: the list of constraints
+    :return: the maximum, math.inf if unbounded, -math.inf if there is no
+    point
+    """
+    dimension = len(objective)
+    if any(all(c == 0 for c in constraint.coefficients) and constraint.bound < 0 for constraint in constraints):
+        return -math.inf
+    # Columns: x+ (dimension), x- (dimension), slacks (one per row), artificial
+    size = len(constraints)
+    artificial = 2 * dimension + size
+    columns = artificial + 1
+    rows = []
+    for i, constraint in enumerate(constraints):
+        row = [Fraction(0)] * (columns + 1)
+        for j, c in enumerate(constraint.coefficients):
+            row[j] = Fraction(c)
+            row[dimension + j] = -Fraction(c)
+        row[2 * dimension + i] = Fraction(1)
+        row[artificial] = Fraction(-1)
+        row[-1] = Fraction(constraint.bound)
+        rows.append(row)
+    basis = [2 * dimension + i for i in range(size)]
+
+    # Phase 1: maximize -artificial
+    phase_one = [Fraction(0)] * (columns + 1)
+    phase_one[artificial] = Fraction(1)
+    lowest = min(range(size), key=lambda i: rows[i][-1], default=None)
+    if lowest is not None and rows[lowest][-1] < 0:
+        _pivot(rows, phase_one, basis, lowest, artificial)
+        _run_simplex(rows, phase_one, basis, columns)
+        if phase_one[-1] < 0:
+            return -math.inf
+        if artificial in basis:
+            row = basis.index(artificial)
+            col = next((j for j in range(artificial) if rows[row][j] != 0), None)
+            if col is not None:
+                _pivot(rows, phase_one, basis, row, col)
+    for row in rows:
+        row[artificial] = Fraction(0)
+
+    # Phase 2
+    target = [Fraction(0)] * (columns + 1)
+    for j, c in enumerate(objective):
+        target[j] = -Fraction(c)
+        target[dimension + j] = Fraction(c)
+    for i, b in enumerate(basis):
+        factor = target[b]
+        if factor != 0:
+            target = [t - factor * x for t, x in zip(target, rows[i])]
+    if not _run_simplex(rows, target, basis, artificial):
+        return math.inf
+    return target[-1]
+
+
+class Polyhedron(object):
+    """
+    Closed convex polyhedron {x in Q^dimension : c . x <= b for each
+    constraint (c, b)}.
+    """
+
+    def __init__(self, dimension: int, constraints: Iterable[Constraint] = ()):
+        self.dimension = dimension
+        self.constraints: Tuple[Constraint, ...] = self._reduce(constraints)
+
+    @staticmethod
+    def _reduce(constraints: Iterable[Constraint]) -> Tuple[Constraint, ...]:
+        # Keep the tightest bound of the constraints with the same coefficients
+        tightest: Dict[Tuple[Fraction, ...], Fraction] = {}
+        for constraint in constraints:
+            constraint = normalize_constraint(*constraint)
+            if constraint is None:
+                continue
+            bound = tightest.get(constraint.coefficients)
+            if bound is None or constraint.bound < bound:
+                tightest[constraint.coefficients] = constraint.bound
+        return tuple(Constraint(coefficients, bound) for coefficients, bound in tightest.items())
+
+    def __contains__(self, point: Sequence[Number]) -> bool:
+        return all(constraint.holds(point) for constraint in self.constraints)
+
+    def __repr__(self) -> str:
+        return "Polyhedron(dimension=" + str(self.dimension) + ", constraints=" + str(self.constraints) + ")"
+
+    def maximize(self, objective: Sequence[Number]) -> Fraction:
+        """
+        returns the maximum of objective . x over the polyhedron (math.inf if
+        unbounded, -math.inf if the polyhedron is empty).
+        """
+        return maximize(objective, self.constraints)
+
+    def is_empty(self) -> bool:
+        return self.maximize([0] * self.dimension) == -math.inf
+
+    def intersection(self, constraints: Iterable[Constraint]) -> Polyhedron:
+        return Polyhedron(self.dimension, self.constraints + tuple(constraints))
+
+    def includes(self, other: Polyhedron) -> bool:
+        """
+        returns True if other is included in self.
+        """
+        return all(other.maximize(constraint.coefficients) <= constraint.bound for constraint in self.constraints)
+
+    def eliminate(self, index: int) -> Polyhedron:
+        """
+        Fourier-Motzkin elimination: returns the projection of the polyhedron
+        that forgets the coordinate index.
+        :param index: the index of the coordinate to eliminate
+        :return: a Polyhedron of dimension self.dimension - 1
+        """
+        kept, lower, upper = [], [], []
+        for constraint in self.constraints:
+            coefficient = constraint.coefficients[index]
+            if coefficient == 0:
+                kept.append(constraint)
+            elif coefficient > 0:
+                upper.append(constraint)
+            else:
+                lower.append(constraint)
+        for up in upper:
+            for low in lower:
+                up_factor, low_factor = -low.coefficients[index], up.coefficients[index]
+                kept.append(Constraint(
+                    tuple(up_factor * u + low_factor * l for u, l in zip(up.coefficients, low.coefficients)),
+                    up_factor * up.bound + low_factor * low.bound))
+        return Polyhedron(self.dimension - 1,
+                          (Constraint(c.coefficients[:index] + c.coefficients[index + 1:], c.bound) for c in kept))
+
+    def project(self, dimension: int) -> Polyhedron:
+        """
+        returns the projection of the polyhedron on its first coordinates,
+        eliminating the last ones one by one (redundant constraints are
+        removed after each elimination).
+        :param dimension: the number of coordinates kept
+        :return: a Polyhedron
+        """
+        polyhedron = self
+        while polyhedron.dimension > dimension:
+            polyhedron = polyhedron.eliminate(polyhedron.dimension - 1).minimize()
+        return polyhedron
+
+    def minimize(self) -> Polyhedron:
+        """
+        returns the same polyhedron without its redundant constraints (an
+        empty polyhedron is returned with the single constraint 0 <= -1).
+        """
+        constraints = list(self.constraints)
+        if maximize([0] * self.dimension, constraints) == -math.inf:
+            return Polyhedron(self.dimension, [Constraint((Fraction(0),) * self.dimension, Fraction(-1))])
+        i = 0
+        while i < len(constraints):
+            others = constraints[:i] + constraints[i + 1:]
+            if maximize(constraints[i].coefficients, others) <= constraints[i].bound:
+                constraints = others
+            else:
+                i += 1
+        return Polyhedron(self.dimension, constraints)
@@ -9,7 +9,7 @@ automaton.
 Classes:
 ------
 Transitions
-TimedAutomaton
+TimedAutomaton (see compiled.CompiledTimedAutomaton for its compiled form)
 
 Methods:
 TODO: enumerate all methods.
@@ -19,17 +19,19 @@ TODO: enumerate all methods.
 # TODO: Finish the documentation
 from __future__ import annotations  # For forward reference typing
 
+import heapq
 import math
 from collections import namedtuple
 from copy import copy
 from operator import eq
 import networkx as nx
 
-from pyrobustness.dtype import Delay, Location, Action
+from pyrobustness.dtype import Delay, Location, Action, FrozenValuation, check_valuation
 import pyrobustness.ta.exceptions as exceptions
 from typing import List, Set, Optional, Dict, Tuple, Union
 import matplotlib.pyplot as plt
 import pyrobustness.ta.guards as guards
+import pyrobustness.ta.compiled as compiled
 
 plt.switch_backend("Qt5Agg")
 
@@ -40,6 +42,18 @@ Data = Dict[Action, Label]
 DiGraphEdge = Tuple[Location, Location, Data]
 
 
+def freeze_configuration(configuration: Configuration) -> Configuration:
+    """
+    returns configuration with its valuation as a tuple: a hashable
+    configuration, equal to the configurations with the same location and
+    clock values.
+    :param configuration: a configuration
+    :return: a configuration whose valuation is a FrozenValuation
+    """
+    valuation: FrozenValuation = tuple(configuration.valuation)
+    return Configuration(location=configuration.location, valuation=valuation)
+
+
 def edge_form(edge: Edge) -> DiGraphEdge:
     """Convert an edge into a diGraph-friendly form
 
@@ -116,6 +130,8 @@ class TimedAutomaton(nx.DiGraph):
         self.goal_location = goal_location
         self.number_clocks = number_clocks
         self._flags = self._TAFlags(overwrite)
+        self._compiled: Optional[compiled.CompiledTimedAutomaton] = None
+        self._widest_bounds: Optional[Dict[Location, Delay]] = None
 
         self.is_well_formed()
 
@@ -123,6 +139,19 @@ class TimedAutomaton(nx.DiGraph):
 
     def _invalidate_flags_on_change(self):
         self._flags.reset()
+        self._compiled = None
+        self._widest_bounds = None
+
+    def compile(self) -> compiled.CompiledTimedAutomaton:
+        """
+        returns the compiled form of the timed automaton used by the search
+        (see the compiled module). It is built on the first call and kept
+        until the timed automaton is changed.
+        :return: a CompiledTimedAutomaton
+        """
+        if self._compiled is None:
+            self._compiled = compiled.CompiledTimedAutomaton(self)
+        return self._compiled
 
     def __eq__(self, other: TimedAutomaton) -> bool:
         """Compare two ta"""
@@ -181,6 +210,23 @@ class TimedAutomaton(nx.DiGraph):
         return lower_bound
         # return 0
 
+    def clock_ceilings(self) -> List[Delay]:
+        """
+        Only implemented for linear constraint
+        returns, for each clock, its greatest finite guard constant (0 if no
+        guard bounds it): once a clock is above its ceiling, the guards it
+        checks are enabled or disabled for good.
+        :return: a list of constants, indexed by the clocks
+        """
+        ceilings = [0] * self.number_clocks
+        for out_node, in_node in self.edges:
+            for label in self[out_node][in_node].values():
+                for constraint in label.guard.constraints:
+                    for constant in (constraint.interval.left, constraint.interval.right):
+                        if not math.isinf(constant):
+                            ceilings[constraint.clock_index] = max(ceilings[constraint.clock_index], constant)
+        return ceilings
+
     def existence_infinite_weighted_path(self, location: Location) -> Tuple[Union[int, float], Dict]:
         """
         If the graph has a path of infinite capacity, the value of a feasible flow on the graph is unbounded above and
@@ -190,25 +236,69 @@ class TimedAutomaton(nx.DiGraph):
         value of the flow that went through each edge
         """
 
-        def capacity(ta: TimedAutomaton, out_node: Location, in_node: Location):
-            upper_bounds = []
-            edge_attr = ta[out_node][in_node]
-            for label in edge_attr.values():
-                bound = []
-                for constraint in label.guard.constraints:
-                    long = constraint.interval.size()
-                    bound.append(long)
-                upper_bounds.append(min(bound))
-
-            return math.inf if len(upper_bounds) == 0 else max(upper_bounds)
-
         capacity_graph = nx.DiGraph()
         capacity_graph.add_edges_from(self.edges)
         for u, v in capacity_graph.edges():
-            capacity_graph[u][v]["capacity"] = capacity(self, u, v)
+            capacity_graph[u][v]["capacity"] = self.transition_capacity(u, v)
 
         return nx.maximum_flow(flowG=capacity_graph, _s=location, _t=self.goal_location, capacity="capacity")
 
+    def transition_capacity(self, out_node: Location, in_node: Location) -> Delay:
+        """
+        Only implemented for linear constraint
+        returns the size of the greatest guard of the transitions from
+        out_node to in_node: no interval of delays enabled by one of them is
+        longer, whatever the valuation.
+        :param out_node: a Location
+        :param in_node: a Location
+        :return: the capacity of the edge (math.inf for an unbounded guard)
+        """
+        upper_bounds = []
+        edge_attr = self[out_node][in_node]
+        for label in edge_attr.values():
+            bound = []
+            for constraint in label.guard.constraints:
+                long = constraint.interval.size()
+                bound.append(long)
+            upper_bounds.append(min(bound) if bound else math.inf)
+
+        return math.inf if len(upper_bounds) == 0 else max(upper_bounds)
+
+    def widest_path_bounds(self) -> Dict[Location, Delay]:
+        """
+        returns for each location the capacity of the widest path from it to
+        the goal location, the capacity of a path being the smallest capacity
+        of its edges (see transition_capacity). The permissiveness of a trace
+        is the length of its shortest interval: no trace from a location has
+        a permissiveness greater than its widest path. The goal location gets
+        math.inf and the locations that can not reach it -math.inf.
+        The bounds are computed on the first call (a Dijkstra on the reversed
+        graph, maximising the bottleneck) and kept until the timed automaton
+        is changed.
+        :return: a dictionary from the locations to their bounds
+        """
+        if self._widest_bounds is not None:
+            return self._widest_bounds
+        widest = {location: -math.inf for location in self.nodes}
+        widest[self.goal_location] = math.inf
+        queue = [(-math.inf, 0, self.goal_location)]
+        done = set()
+        count = 1
+        while queue:
+            _, _, location = heapq.heappop(queue)
+            if location in done:
+                continue
+            done.add(location)
+            for previous in self.predecessors(location):
+                width = min(widest[location], self.transition_capacity(previous, location))
+                if previous not in done and width > widest[previous]:
+                    widest[previous] = width
+                    # count breaks the ties: the locations may not be comparable
+                    heapq.heappush(queue, (-width, count, previous))
+                    count += 1
+        self._widest_bounds = widest
+        return widest
+
     def graphical_print(self):  # pragma: no cover
         """
         Print with graphic representation of all locations in the timed
@@ -336,6 +426,24 @@ class TimedAutomaton(nx.DiGraph):
         self._flags.well_formed = True
         return True
 
+    def check_configuration(self, configuration: Configuration) -> None:
+        """
+        checks that configuration is a configuration of the timed automaton:
+        its location is a location of the automaton and its valuation has a
+        non negative value (integer, Fraction or math.inf) for each clock. The
+        configurations given to the explorers are checked once here, the
+        search does not check the ones it computes (see
+        dtype.DEBUG_CHECKS).
+        :param configuration: a configuration
+        """
+        if configuration.location not in self.nodes:
+            raise exceptions.LocationNotFoundException(configuration.location, None)
+        if len(configuration.valuation) < self.number_clocks:
+            raise exceptions.ValuationSizeException(configuration.valuation, self.number_clocks)
+        check_valuation(configuration.valuation)
+        if any(value < 0 for value in configuration.valuation):
+            raise exceptions.NegativeIntervalException
+
     def is_single_action(self) -> bool:
         """
         This function verifies for each nodes, that every edges had
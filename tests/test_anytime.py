@@ -0,0 +1,44 @@
+# coding=utf-8
+
+from tests.test_explorer_examples import *
+import pyrobustness.runs.anytime as anytime
+
+
+def anytime_exploration(ta, step, **kwargs):
+    return anytime.AnytimeBacktracking(ta=ta,
+                                       start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                       strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                       interval_sampling_step=step,
+                                       **kwargs)
+
+
+class TestAnytimeBacktracking:
+    def test_search(self, formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2):
+        for ta in [formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2]:
+            expected = explorer.Backtracking(ta=ta,
+                                             start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                             strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                             interval_sampling_step=Fraction(1, 8)).backtracking()
+            explo = anytime_exploration(ta, Fraction(1, 8), levels=2)
+            incumbents = list(explo.incumbents())
+            assert [incumbent.step for incumbent in incumbents if incumbent.exact] == explo.steps()
+            permissiveness = [incumbent.permissiveness for incumbent in incumbents]
+            assert permissiveness == sorted(permissiveness)
+            assert explo.finished and explo.proven_step == Fraction(1, 8)
+            assert explo.best.exact and explo.best.permissiveness == expected.compute_trace_permissiveness()
+            assert explo.best.trace.compute_trace_permissiveness() == explo.best.permissiveness
+
+    def test_node_budget(self, formats_timed_automaton_0):
+        incumbents = []
+        explo = anytime_exploration(formats_timed_automaton_0, Fraction(1, 16), node_budget=30, chunk_nodes=1)
+        best = explo.search(callback=incumbents.append)
+        assert not explo.finished and explo.nodes == 30
+        assert best == incumbents[-1]
+        # The searches with the coarse steps are finished, not the one with 1/16
+        assert explo.proven_step in explo.steps()[:-1]
+        assert best.permissiveness >= 0
+
+    def test_time_budget(self, formats_timed_automaton_1):
+        explo = anytime_exploration(formats_timed_automaton_1, Fraction(1, 4), time_budget=0)
+        assert explo.search() is None
+        assert explo.nodes == 0 and not explo.finished
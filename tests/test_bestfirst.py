@@ -0,0 +1,30 @@
+# coding=utf-8
+
+from tests.test_explorer_examples import *
+import pyrobustness.runs.bestfirst as bestfirst
+
+
+def exploration(ta, step, cls=explorer.Backtracking, **kwargs):
+    return cls(ta=ta,
+               start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+               strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+               interval_sampling_step=step,
+               **kwargs)
+
+
+class TestBestFirstBacktracking:
+    def test_backtracking(self, formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2):
+        for ta in [formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2]:
+            for options in [{}, {"endpoint_opt": False, "rollout_opt": False}, {"value_only": True},
+                            {"sorted_sampling_opt": False, "bound_opt": False}]:
+                expected = exploration(ta, Fraction(1, 4), **options).backtracking()
+                explo = exploration(ta, Fraction(1, 4), cls=bestfirst.BestFirstBacktracking, **options)
+                result = explo.backtracking()
+                assert result.compute_trace_permissiveness() == expected.compute_trace_permissiveness()
+
+    def test_compare_nodes(self, formats_timed_automaton_0):
+        comparison = bestfirst.compare_nodes(ta=formats_timed_automaton_0,
+                                             start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                             strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                             interval_sampling_step=Fraction(1, 10))
+        assert 0 < comparison.best_first < comparison.depth_first
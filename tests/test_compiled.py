@@ -0,0 +1,78 @@
+# coding=utf-8
+
+import pickle
+
+import numpy
+import pytest
+
+from tests.test_explorer_examples import *
+import pyrobustness.runs.ticks as ticks
+import pyrobustness.ta.exceptions as ta_exceptions
+
+
+class TestCompiledTimedAutomaton:
+    def test_moves(self, formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2):
+        for ta in [formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2]:
+            compiled_ta = ta.compile()
+            for location in ta.nodes:
+                for valuation in [[0, 0], [Fraction(1, 3), 1], [2, Fraction(5, 2)]]:
+                    config = timed_auto.Configuration(location=location, valuation=valuation)
+                    assert moves.moves(compiled_ta, config) == moves.moves(ta, config)
+
+    def test_next_step(self, formats_timed_automaton_1):
+        compiled_ta = formats_timed_automaton_1.compile()
+        config = timed_auto.Configuration(location=0, valuation=[0, 0])
+        for move in moves.moves(formats_timed_automaton_1, config):
+            for delay in [0, Fraction(1, 2), 1, 3]:
+                delay_move = {"action": move["action"],
+                              "step": [moves.Step(interval=delay, target_location=move["step"][0].target_location)]}
+                assert moves.next_step(compiled_ta, config, delay_move) == \
+                    moves.next_step(formats_timed_automaton_1, config, delay_move)
+        unknown = {"action": "unknown", "step": [moves.Step(interval=0, target_location=1)]}
+        assert moves.next_step(compiled_ta, config, unknown) is None
+
+    def test_cache(self, formats_timed_automaton_1):
+        compiled_ta = formats_timed_automaton_1.compile()
+        assert formats_timed_automaton_1.compile() is compiled_ta
+        formats_timed_automaton_1.change_end_location(formats_timed_automaton_1.goal_location)
+        assert formats_timed_automaton_1.compile() is not compiled_ta
+
+    def test_pickle(self, formats_timed_automaton_1):
+        compiled_ta = formats_timed_automaton_1.compile()
+        copy = pickle.loads(pickle.dumps(compiled_ta))
+        config = timed_auto.Configuration(location=0, valuation=[0, 0])
+        assert moves.moves(copy, config) == moves.moves(compiled_ta, config)
+
+    def test_explorer(self, formats_timed_automaton_1, formats_timed_automaton_2):
+        for ta in [formats_timed_automaton_1, formats_timed_automaton_2]:
+            traces = [explorer.Backtracking(ta=ta,
+                                            start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                            strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                            interval_sampling_step=Fraction(1, 3),
+                                            compile_opt=compile_opt).backtracking()
+                      for compile_opt in [True, False]]
+            assert traces[0].data == traces[1].data
+
+    def test_enabled_delays_batch(self, formats_timed_automaton_1, formats_timed_automaton_2):
+        valuations = [[0, 0], [1, 2], [3, 1], [5, 5], [2, 7]]
+        for ta in [formats_timed_automaton_1, formats_timed_automaton_2]:
+            compiled_ta = ta.compile()
+            for location in ta.nodes:
+                for batch_valuations in [numpy.array(valuations), numpy.array(valuations, dtype=float)]:
+                    batch = compiled_ta.enabled_delays_batch(location, batch_valuations)
+                    for e, edge in enumerate(compiled_ta.edges(location)):
+                        for n, valuation in enumerate(valuations):
+                            interval = compiled_ta.enabled_delays_set(edge, valuation)
+                            assert batch.empty[e, n] == interval.is_empty()
+                            if not interval.is_empty():
+                                assert batch.lower[e, n] == interval.left
+                                assert batch.upper[e, n] == interval.right
+
+    def test_enabled_delays_batch_fraction_guard(self, formats_timed_automaton_1):
+        scaled = ticks.TickScale(1).timed_automaton(formats_timed_automaton_1)
+        scaled.add_transition(0, 1, guards.Label(guards.LinearGuard([guards.LinearConstraint(Fraction(1, 2), 1, 0)]),
+                                                 []), "fraction")
+        with pytest.raises(ta_exceptions.WrongType):
+            scaled.compile().enabled_delays_batch(0, numpy.array([[0, 0]]))
+        batch = scaled.compile().enabled_delays_batch(0, numpy.array([[0., 0.]]))
+        assert batch.lower.shape == (len(scaled.compile().edges(0)), 1)
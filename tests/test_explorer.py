@@ -1,8 +1,18 @@
 # coding=utf-8
 
+import collections
+import math
+
+import pytest
+
 from tests.test_explorer_examples import *
+import pyrobustness.runs.exceptions as exceptions
 import pyrobustness.runs.explorer as explorer
+import pyrobustness.runs.grid as grid
+import pyrobustness.runs.transposition as transposition
+import pyrobustness.ta.exceptions as ta_exceptions
 import pyrobustness.ta.timedauto as timed_auto
+from benchmarks.bench_automata import formats_1, formats_1_with_cycle, formats_non_branch_free
 
 
 
@@ -91,3 +101,352 @@ class TestBacktrack:
 
         # explo = formats_exploration_2_precise([0.5, 0.3], 0.5)
         # assert explo.compute_trace_permissiveness(explo.backtracking()) == 2
+
+
+class TestOptions:
+    @pytest.mark.parametrize("option", ["filter_opt", "memo_opt", "alpha_beta_opt", "value_only", "integer_ticks",
+                                        "compile_opt", "sorted_sampling_opt", "endpoint_opt", "bound_opt",
+                                        "rollout_opt", "ordering_opt"])
+    def test_same_permissiveness(self, option, formats_timed_automaton_0, formats_timed_automaton_1,
+                                 formats_timed_automaton_2):
+        # An option only changes the nodes explored, not the permissiveness
+        opponent = strategy.worst_case_branch_free_opponent_strategy()
+        for ta in [formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2]:
+            for step in [Fraction(1, 3), Fraction(1, 4)]:
+                for options in [{}, {"alpha_beta_opt": False}, {"endpoint_opt": False}, {"value_only": True}]:
+                    results = [explorer.Backtracking(ta=ta,
+                                                     start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                                     strategy_opponent=opponent,
+                                                     interval_sampling_step=step,
+                                                     **{**options, option: value}).backtracking()
+                               for value in [False, True]]
+                    assert results[0].compute_trace_permissiveness() == results[1].compute_trace_permissiveness()
+
+
+class TestTranspositionTable:
+    def test_lookup(self):
+        table = transposition.TranspositionTable()
+        table.store("exact", prefix_permissiveness=2, permissiveness=1, suffix=[], height=1)
+        table.store("lower", prefix_permissiveness=1, permissiveness=1, suffix=[], height=1)
+
+        assert table.lookup("exact", prefix_permissiveness=math.inf, remaining=2).exact
+        assert table.lookup("lower", prefix_permissiveness=Fraction(1, 2), remaining=2) is not None
+        # A lower bound can not answer a query with a greater prefix permissiveness
+        assert table.lookup("lower", prefix_permissiveness=2, remaining=2) is None
+        # The sub-tree does not fit in the remaining trace budget
+        assert table.lookup("exact", prefix_permissiveness=math.inf, remaining=1) is None
+        assert table.lookup("unknown", prefix_permissiveness=math.inf, remaining=2) is None
+        assert table.stats() == {"hits": 2, "misses": 3, "entries": 2}
+
+    def test_backtrack(self, formats_timed_automaton_1):
+        for valuation in [[0, 0], [Fraction(1, 2), 0], [Fraction(1, 4), Fraction(3, 4)]]:
+            results = []
+            for memo_opt in [False, True]:
+                explo = explorer.Backtracking(ta=formats_timed_automaton_1,
+                                              start=timed_auto.Configuration(location=0, valuation=valuation),
+                                              strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                              interval_sampling_step=Fraction(1, 4),
+                                              memo_opt=memo_opt)
+                results.append(explo.backtracking().compute_trace_permissiveness())
+            assert results[0] == results[1]
+
+    def test_hits(self, formats_exploration_0_precise):
+        assert formats_exploration_0_precise.backtracking().compute_trace_permissiveness() == 1
+        assert formats_exploration_0_precise.memo_stats()["hits"] > 0
+
+
+class TestAlphaBeta:
+    def test_window(self):
+        window = explorer.SearchWindow()
+        assert window.alpha == -math.inf and window.beta == math.inf
+
+    def test_cutoffs(self, monkeypatch):
+        explorers = [explorer.Backtracking(ta=formats_1(),
+                                           start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                           strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                           interval_sampling_step=Fraction(1, 4),
+                                           endpoint_opt=False, bound_opt=False, rollout_opt=False,
+                                           alpha_beta_opt=alpha_beta_opt)
+                     for alpha_beta_opt in [False, True]]
+        cutoffs, results = [], []
+        for explo in explorers:
+            counts = {"min": 0, "max": 0}
+            for layer, choose in [("min", explo.choose_min_trace), ("max", explo.choose_max_trace)]:
+                def counted(*args, layer=layer, choose=choose):
+                    best_trace, cut = choose(*args)
+                    counts[layer] += cut
+                    return best_trace, cut
+                monkeypatch.setattr(explo, "choose_" + layer + "_trace", counted)
+            results.append(explo.backtracking().compute_trace_permissiveness())
+            cutoffs.append(counts)
+        assert results[0] == results[1] == Fraction(1, 2)
+        # The opponent loops stop below alpha and the player loops at beta
+        assert cutoffs[0] == {"min": 0, "max": 0}
+        assert cutoffs[1]["min"] > 0 and cutoffs[1]["max"] > 0
+        assert explorers[1].memo_stats()["misses"] < explorers[0].memo_stats()["misses"]
+
+
+class TestSortedSampling:
+    def test_early_exit(self, monkeypatch):
+        explorers = [explorer.Backtracking(ta=formats_1(),
+                                           start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                           strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                           interval_sampling_step=Fraction(1, 4),
+                                           endpoint_opt=False, sorted_sampling_opt=sorted_sampling_opt)
+                     for sorted_sampling_opt in [False, True]]
+        filtered, results = [], []
+        for explo in explorers:
+            rejected = []
+            filter_poss = explo.filter_poss
+
+            def counted(*args, filter_poss=filter_poss, rejected=rejected):
+                kept = filter_poss(*args)
+                if not kept:
+                    rejected.append(args[0])
+                return kept
+            monkeypatch.setattr(explo, "filter_poss", counted)
+            results.append(explo.backtracking().compute_trace_permissiveness())
+            filtered.append(len(rejected))
+        assert results[0] == results[1] == Fraction(1, 2)
+        # Sorted by length, the loop stops at the first move too short to help
+        assert filtered[1] < filtered[0]
+        assert explorers[1].memo_stats()["misses"] <= explorers[0].memo_stats()["misses"]
+
+
+class TestEndpointValues:
+    def test_successors_once(self, monkeypatch):
+        explorers = [explorer.Backtracking(ta=formats_1(),
+                                           start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                           strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                           interval_sampling_step=Fraction(1, 4),
+                                           memo_opt=False, alpha_beta_opt=False, bound_opt=False, rollout_opt=False,
+                                           endpoint_opt=endpoint_opt)
+                     for endpoint_opt in [False, True]]
+        assert [explo.endpoint_values for explo in explorers] == [False, True]
+        explored, results = [], []
+        for explo in explorers:
+            successors = collections.Counter()
+            backtrack = explo._backtrack
+
+            def counted(current, trace, *args, backtrack=backtrack, successors=successors):
+                if len(trace) == 1:
+                    successors[(current.location, tuple(current.valuation))] += 1
+                return backtrack(current, trace, *args)
+            monkeypatch.setattr(explo, "_backtrack", counted)
+            results.append(explo.backtracking().compute_trace_permissiveness())
+            explored.append(successors)
+        assert results[0] == results[1] == Fraction(1, 2)
+        # Each end of the root moves is explored once, not once per move containing it
+        assert max(explored[0].values()) > 1
+        assert max(explored[1].values()) == 1
+        assert sum(explored[1].values()) < sum(explored[0].values())
+
+    def test_trace(self, formats_timed_automaton_1):
+        best_trace = explorer.Backtracking(ta=formats_timed_automaton_1,
+                                           start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                           strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                           interval_sampling_step=Fraction(1, 3)).backtracking()
+        # The trace is built on the sampled moves and ends of the intervals
+        permissiveness = math.inf
+        for node in best_trace:
+            move_interval = moves.global_interval(node.move)
+            assert node.delay in (move_interval.left, move_interval.right)
+            permissiveness = min(permissiveness, moves.compute_interval_length(node.move))
+        assert best_trace.compute_trace_permissiveness() == permissiveness
+
+    def test_other_opponent(self, formats_timed_automaton_1):
+        explo = explorer.Backtracking(ta=formats_timed_automaton_1,
+                                      start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                      strategy_opponent=strategy.up_case_opponent_strategy(),
+                                      interval_sampling_step=Fraction(1, 3))
+        assert not explo.endpoint_values
+
+
+def wide_then_narrow_automaton():
+    # Any interval of [0, 10] on the first edge is followed by an interval of length 1
+    return timed_auto.TimedAutomaton(transitions=[
+        timed_auto.Edge(0, 1, {"a": guards.Label(guards.LinearGuard([guards.LinearConstraint(0, 10, 0)]), [])}),
+        timed_auto.Edge(1, 2, {"b": guards.Label(guards.LinearGuard([guards.LinearConstraint(10, 11, 0)]), [])})],
+        init_location=0, goal_location=2, number_clocks=1)
+
+
+class TestLocationBounds:
+    def test_early_termination(self):
+        explorers = [explorer.Backtracking(ta=wide_then_narrow_automaton(),
+                                           start=timed_auto.Configuration(location=0, valuation=[0]),
+                                           strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                           interval_sampling_step=Fraction(1, 4),
+                                           bound_opt=bound_opt, rollout_opt=False) for bound_opt in [False, True]]
+        assert explorers[1].node_bound(explorers[1].extract_max_moves(explorers[1].start)) == 1
+        assert explorers[0].backtracking().compute_trace_permissiveness() == 1
+        assert explorers[1].backtracking().compute_trace_permissiveness() == 1
+        # [0, 10] reaches the bound of the root: only its two ends are explored
+        assert explorers[1].memo_stats()["misses"] == 3
+        assert explorers[0].memo_stats()["misses"] > 3
+
+
+class TestRollout:
+    def test_lower_bound(self, formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2):
+        # The greedy trace is a valid trace: its permissiveness can only be lower
+        for ta in [formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2, formats_1()]:
+            explo = explorer.Backtracking(ta=ta,
+                                          start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                          strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                          interval_sampling_step=Fraction(1, 4))
+            greedy_trace = explo.rollout()
+            assert greedy_trace.compute_trace_permissiveness() <= explo.backtracking().compute_trace_permissiveness()
+
+    def test_seed(self):
+        explo = explorer.Backtracking(ta=wide_then_narrow_automaton(),
+                                      start=timed_auto.Configuration(location=0, valuation=[0]),
+                                      strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                      interval_sampling_step=Fraction(1, 4))
+        greedy_trace = explo.rollout()
+        assert greedy_trace.compute_trace_permissiveness() == 1
+        assert moves.global_interval(greedy_trace.data[0].move) == explorer.Interval(0, 10)
+        # The greedy trace reaches the bound of the root: no move is explored
+        assert explo.backtracking().data == greedy_trace.data
+        assert explo.memo_stats()["misses"] == 1
+
+
+class TestMoveOrdering:
+    def test_backtrack(self, formats_timed_automaton_0, formats_timed_automaton_1):
+        for ta in [formats_timed_automaton_0, formats_timed_automaton_1, formats_non_branch_free()]:
+            for options in [{}, {"sorted_sampling_opt": False}, {"rollout_opt": False}]:
+                explorers = [explorer.Backtracking(ta=ta,
+                                                   start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                                   strategy_opponent=strategy.worst_case_brut_force_opponent_strategy(
+                                                       step=Fraction(1, 4)),
+                                                   interval_sampling_step=Fraction(1, 4),
+                                                   ordering_opt=ordering_opt, **options)
+                             for ordering_opt in [False, True]]
+                assert explorers[1].backtracking().compute_trace_permissiveness() == \
+                    explorers[0].backtracking().compute_trace_permissiveness()
+
+    def test_fewer_nodes(self):
+        # Without the sorted sampling, the moves of move_sampling are tried
+        # largest first across all the actions
+        explorers = [explorer.Backtracking(ta=formats_non_branch_free(),
+                                           start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                           strategy_opponent=strategy.worst_case_brut_force_opponent_strategy(
+                                               step=Fraction(1, 16)),
+                                           interval_sampling_step=Fraction(1, 16),
+                                           sorted_sampling_opt=False,
+                                           ordering_opt=ordering_opt)
+                     for ordering_opt in [False, True]]
+        assert explorers[1].backtracking().compute_trace_permissiveness() == \
+            explorers[0].backtracking().compute_trace_permissiveness()
+        assert explorers[1].memo_stats()["misses"] < explorers[0].memo_stats()["misses"]
+
+    def test_largest_first(self, formats_exploration_0_precise):
+        explo = formats_exploration_0_precise
+        explo.sorted_sampling = False
+        explo.ordering_opt = True
+        ordered = [moves.compute_interval_length(move) for move in explo.order_moves(explo.start, explo.root_trace())]
+        assert ordered == sorted(ordered, reverse=True)
+        assert sorted(ordered) == sorted(moves.compute_interval_length(move)
+                                         for move in explo.gen_next_poss(explo.start))
+
+    def test_order(self, formats_exploration_0_precise):
+        explo = formats_exploration_0_precise
+        explo.ordering_opt = True
+        trace = explo.root_trace()
+        sampled = list(explo.order_moves(explo.start, trace))
+        assert sampled == list(explo.gen_next_poss(explo.start))
+        length = moves.compute_interval_length(sampled[-1])
+        same_size = [move for move in sampled if moves.compute_interval_length(move) == length]
+        explo.record_cutoff(explo.start, trace, same_size[-1])
+        ordered = list(explo.order_moves(explo.start, trace))
+        # The killer move comes first among the moves of its size only
+        assert ordered[len(sampled) - len(same_size)] == same_size[-1]
+        assert [moves.compute_interval_length(move) for move in ordered] == \
+            [moves.compute_interval_length(move) for move in sampled]
+        assert explo.history_table[explo.history_key(explo.start, same_size[-1])] > 0
+
+
+class TestLoops:
+    def test_path_visits(self):
+        visits = explorer.PathVisits(ceilings=(2, 2), tracked=frozenset([1]))
+        visits = visits.add(timed_auto.Configuration(location=0, valuation=[0, 0]))
+        visits = visits.add(timed_auto.Configuration(location=1, valuation=[3, 1]))
+        assert visits.counts() == frozenset([(1, 1)]) and visits.max_count == 1
+        # Above its ceiling the value of a clock does not matter
+        assert visits.visited(timed_auto.Configuration(location=1, valuation=[5, 1]))
+        assert not visits.visited(timed_auto.Configuration(location=1, valuation=[2, 1]))
+        visits = visits.add(timed_auto.Configuration(location=1, valuation=[2, 1]))
+        assert visits.count(1) == 2 and visits.max_count == 2
+        assert visits.configurations([1]) == frozenset([(1, (math.inf, 1)), (1, (2, 1))])
+
+    def test_backtrack(self):
+        ta = formats_1_with_cycle()
+        iteration = grid.ValueIteration(ta, Fraction(1, 2))
+        for valuation in [[0, 0], [1, Fraction(1, 2)]]:
+            explo = explorer.Backtracking(ta=ta,
+                                          start=timed_auto.Configuration(location=0, valuation=valuation),
+                                          strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                          interval_sampling_step=Fraction(1, 2))
+            # The value of the least fixed point, whatever the cycle bound
+            assert explo.backtracking().compute_trace_permissiveness() == iteration.permissiveness(0, valuation)
+            assert explo.memo_stats()["misses"] < 20
+        # Unrolling the cycle up to the cycle bound reaches the trace bound first
+        with pytest.raises(exceptions.BoundException):
+            explorer.Backtracking(ta=ta,
+                                  start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                  strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                  interval_sampling_step=Fraction(1, 2),
+                                  loop_opt=False).backtracking()
+
+
+class TestPersistentTrace:
+    def test_data(self, trace_0, trace_1):
+        assert Trace(data=trace_1.data).data == trace_1.data
+        assert list(trace_1) == trace_1.data
+        assert len(trace_1) == 2
+        assert Trace(data=None, no_trace=True).data is None
+        assert Trace(data=[]).compute_trace_permissiveness() == math.inf
+
+    def test_add_node(self, trace_2, trace_1):
+        node = trace_1.data[0]
+        extended = trace_2.add_node(node)
+        other = trace_2.add_node(trace_1.data[1])
+        # The prefix is shared and left untouched
+        assert len(trace_2) == 1 and len(extended) == 2 and len(other) == 2
+        assert extended.data == trace_2.data + [node]
+        assert extended.suffix(1) == [node]
+        assert extended.compute_trace_permissiveness() == min(trace_2.compute_trace_permissiveness(),
+                                                              moves.compute_interval_length(node.move))
+        assert trace_2.extend(trace_1.data).data == trace_2.data + trace_1.data
+
+
+class TestValueOnly:
+    def test_backtrack(self, formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2):
+        for ta in [formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2]:
+            explorers = [explorer.Backtracking(ta=ta,
+                                               start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                               strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                               interval_sampling_step=Fraction(1, 3),
+                                               value_only=value_only) for value_only in [False, True]]
+            value_trace = explorers[1].backtracking()
+            assert isinstance(value_trace, explorer.ValueTrace)
+            assert explorers[0].backtracking().compute_trace_permissiveness() == \
+                value_trace.compute_trace_permissiveness()
+
+    def test_rebuild_trace(self, formats_exploration_0_precise):
+        formats_exploration_0_precise.value_only = True
+        best_trace = formats_exploration_0_precise.backtracking(rebuild_trace=True)
+        assert isinstance(best_trace, Trace)
+        assert best_trace.compute_trace_permissiveness() == 1
+        assert best_trace.data[0].configuration == formats_exploration_0_precise.start
+
+
+class TestInit:
+    # The start configuration and the sampling step are checked once, by the constructor
+    @pytest.mark.parametrize("valuation, step, exception", [([0, 0.5], 1, ta_exceptions.WrongType),
+                                                            ([0, 0], 0.5, ta_exceptions.WrongType),
+                                                            ([0, 0], 0, ValueError)])
+    def test_checks(self, valuation, step, exception, formats_timed_automaton_1):
+        with pytest.raises(exception):
+            explorer.Backtracking(ta=formats_timed_automaton_1,
+                                  start=timed_auto.Configuration(location=0, valuation=valuation),
+                                  strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                  interval_sampling_step=step)
@@ -0,0 +1,116 @@
+# coding=utf-8
+
+import itertools
+import math
+
+import pytest
+
+from benchmarks.bench_automata import formats_1, formats_1_with_cycle
+from tests.test_explorer_examples import *
+import pyrobustness.runs.exceptions as exceptions
+import pyrobustness.runs.grid as grid
+
+
+def explorer_permissiveness(ta, location, valuation, step, **kwargs):
+    return explorer.Backtracking(ta=ta,
+                                 start=timed_auto.Configuration(location=location, valuation=valuation),
+                                 strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                 interval_sampling_step=step, **kwargs).backtracking().compute_trace_permissiveness()
+
+
+def loop_automaton():
+    # The goal needs y >= 3 but x <= 1: the loop on 0 has to be taken at least twice
+    return timed_auto.TimedAutomaton(transitions=[
+        timed_auto.Edge(0, 0, {"loop": guards.Label(guards.LinearGuard([guards.LinearConstraint(0, 1, 0)]), [0])}),
+        timed_auto.Edge(0, 1, {"end": guards.Label(guards.LinearGuard([guards.LinearConstraint(3, 4, 1),
+                                                                       guards.LinearConstraint(0, 1, 0)]), [])})],
+        init_location=0, goal_location=1, number_clocks=2)
+
+
+def unbounded_automaton(loop=False):
+    # The guard of 1 -> 2 has no upper bound, the one of 0 -> 1 has one
+    transitions = [
+        timed_auto.Edge(0, 1, {"a": guards.Label(guards.LinearGuard([guards.LinearConstraint(0, 1, 0)]), [0])}),
+        timed_auto.Edge(1, 2, {"b": guards.Label(guards.LinearGuard([guards.LinearConstraint(1, math.inf, 0)]),
+                                                 [])})]
+    if loop:
+        transitions.append(timed_auto.Edge(0, 0, {"loop": guards.Label(
+            guards.LinearGuard([guards.LinearConstraint(0, 1, 0)]), [0])}))
+    return timed_auto.TimedAutomaton(transitions=transitions, init_location=0, goal_location=2, number_clocks=1)
+
+
+class TestGridPermissiveness:
+    def test_known_value(self):
+        # Configuration of experiment_precision
+        engine = grid.GridPermissiveness(formats_1(), Fraction(1, 15))
+        assert engine.permissiveness(0, [Fraction(1, 5), Fraction(2, 3)]) == Fraction(4, 15)
+
+    def test_explorer(self, formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2):
+        for ta in [formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2]:
+            for step in [1, Fraction(1, 3)]:
+                engine = grid.GridPermissiveness(ta, step)
+                values = [0, step, 1, 1 + 2 * step, 4]
+                for location in ta.nodes:
+                    if location == ta.goal_location:
+                        continue
+                    for valuation in itertools.product(values, repeat=ta.number_clocks):
+                        assert engine.permissiveness(location, list(valuation)) == \
+                            explorer_permissiveness(ta, location, list(valuation), step)
+
+    def test_grid_step(self, formats_timed_automaton_1):
+        engine = grid.GridPermissiveness(formats_timed_automaton_1, Fraction(1, 2), grid_step=Fraction(1, 3))
+        valuation = [Fraction(1, 3), Fraction(2, 3)]
+        assert engine.permissiveness(0, valuation) == \
+            explorer_permissiveness(formats_timed_automaton_1, 0, valuation, Fraction(1, 2))
+        with pytest.raises(exceptions.NotOnTickGrid):
+            engine.permissiveness(0, [Fraction(1, 4), 0])
+
+    def test_cyclic(self):
+        with pytest.raises(exceptions.WrongTimedAutomatonClass):
+            grid.GridPermissiveness(formats_1_with_cycle(), 1)
+
+    def test_unbounded(self):
+        ta = unbounded_automaton()
+        engine = grid.GridPermissiveness(ta, Fraction(1, 2))
+        assert engine.permissiveness(0, [0]) == explorer_permissiveness(ta, 0, [0], Fraction(1, 2))
+        with pytest.raises(exceptions.InfinitePathFound):
+            explorer_permissiveness(ta, 1, [0], Fraction(1, 2))
+        with pytest.raises(exceptions.InfinitePathFound):
+            engine.permissiveness(1, [0])
+
+
+class TestValueIteration:
+    def test_acyclic(self, formats_timed_automaton_1):
+        engine = grid.GridPermissiveness(formats_timed_automaton_1, Fraction(1, 3))
+        iteration = grid.ValueIteration(formats_timed_automaton_1, Fraction(1, 3))
+        for location in formats_timed_automaton_1.nodes:
+            assert (engine.table(location) == iteration.table(location)).all()
+        assert iteration.converged
+
+    def test_cycle(self):
+        ta = formats_1_with_cycle()
+        engine = grid.ValueIteration(ta, Fraction(1, 2))
+        assert engine.permissiveness(0, [0, 0]) == explorer_permissiveness(ta, 0, [0, 0], Fraction(1, 2), cycle_bound=4)
+
+    def test_loop(self):
+        # The explorer needs a cycle bound large enough to find the fixed point
+        engine = grid.ValueIteration(loop_automaton(), Fraction(1, 2))
+        assert engine.permissiveness(0, [0, 0]) == Fraction(1, 2)
+        assert explorer_permissiveness(loop_automaton(), 0, [0, 0], Fraction(1, 2), cycle_bound=4) == -math.inf
+        assert explorer_permissiveness(loop_automaton(), 0, [0, 0], Fraction(1, 2), cycle_bound=10) == Fraction(1, 2)
+        assert engine.converged and engine.iterations > 1
+
+    def test_unbounded(self):
+        ta = unbounded_automaton(loop=True)
+        engine = grid.ValueIteration(ta, Fraction(1, 2))
+        assert engine.permissiveness(0, [0]) == explorer_permissiveness(ta, 0, [0], Fraction(1, 2))
+        with pytest.raises(exceptions.InfinitePathFound):
+            engine.permissiveness(1, [0])
+
+    def test_max_iterations(self):
+        engine = grid.ValueIteration(loop_automaton(), Fraction(1, 2), max_iterations=1)
+        assert engine.permissiveness(0, [0, 0]) == -math.inf
+        assert engine.iterations == 1 and not engine.converged
+        engine = grid.ValueIteration(loop_automaton(), Fraction(1, 2), tolerance=math.inf)
+        engine.compute()
+        assert engine.converged
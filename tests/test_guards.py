@@ -1,4 +1,5 @@
 # coding=utf-8
+import pickle
 from fractions import Fraction
 
 from tests.test_guards_examples import *
@@ -6,7 +7,8 @@ from pyrobustness.ta.guards import AbstractConstraint, \
     LinearConstraint, LinearGuard
 from pyrobustness.ta.interval import Interval
 from pyrobustness.ta.exceptions import AbstractConstructionException, \
-    NegativeIntervalException, NegativeClockIndexException, EmptyInterval
+    NegativeIntervalException, NegativeClockIndexException, EmptyInterval, IllegalClosedArgument, WrongType
+import pyrobustness.dtype as dtype
 import math
 
 
@@ -120,6 +122,23 @@ class TestInterval:
                           Interval(5, 6, closed='both')]
         assert infinite_interval_4_inf.semi_sorted_sampling(step=1, bound=6) == sampling_4_6_1
 
+    def test_sorted_sampling(self, closed_interval_4_6, left_closed_interval_0_4, open_interval_0_4,
+                             infinite_interval_4_inf):
+        for interval, step in [(closed_interval_4_6, 1), (left_closed_interval_0_4, 1),
+                               (open_interval_0_4, Fraction(1, 2))]:
+            sampling = list(interval.sorted_sampling(step))
+            assert sorted(sampling, key=str) == sorted(interval.semi_sorted_sampling(step), key=str)
+            lengths = [sampled.right - sampled.left for sampled in sampling]
+            assert lengths == sorted(lengths, reverse=True)
+        assert list(infinite_interval_4_inf.sorted_sampling(step=1, bound=6)) == \
+            [Interval(4, 6, closed='both'), Interval(4, 5, closed='both'), Interval(5, 6, closed='both')]
+        # The sampling is memoised and shared by the iterations
+        sampling = left_closed_interval_0_4.sorted_sampling(1)
+        assert left_closed_interval_0_4.sorted_sampling(1) is sampling
+        assert next(iter(sampling)) is next(iter(sampling))
+        with pytest.raises(ValueError):
+            infinite_interval_4_inf.sorted_sampling(1)
+
     def test_init_non_inverted_bounds(self):
         with pytest.raises(Exception):
             Interval(2, 1)
@@ -127,6 +146,29 @@ class TestInterval:
     def test_bounds(self):
         assert Interval(0, 5).left == 0
         assert Interval(0, 5).right == 5
+        # The constructor converts the integer bounds, Interval.unchecked keeps them
+        assert type(Interval(0, 5).left) == Fraction and type(Interval(0, math.inf).left) == Fraction
+        assert type(Interval.unchecked(0, 5).left) == int
+        assert type(Interval.interned(0, 5).left) == int and type(Interval.interned(Fraction(0), 5).left) == Fraction
+
+    def test_hash(self, closed_interval_0_4, open_interval_0_4):
+        assert Interval(0, 4) == closed_interval_0_4 and hash(Interval(0, 4)) == hash(closed_interval_0_4)
+        assert Interval(0, Fraction(4)) in {closed_interval_0_4}
+        # The closedness is part of the value
+        assert closed_interval_0_4 != open_interval_0_4
+        assert len({closed_interval_0_4, open_interval_0_4, Interval(0, 4, closed='neither')}) == 2
+        with pytest.raises(AttributeError):
+            closed_interval_0_4.left = 1
+        assert pickle.loads(pickle.dumps(open_interval_0_4)) == open_interval_0_4
+
+    def test_constructors(self, left_closed_interval_0_4):
+        assert left_closed_interval_0_4.closed_left and left_closed_interval_0_4.open_right
+        assert left_closed_interval_0_4.closed == 'left'
+        assert Interval.unchecked(0, 4, closed_right=False) == left_closed_interval_0_4
+        assert Interval.interned(0, 4, True, False) is Interval.interned(0, 4, True, False)
+        assert Interval.interned(0, 4, True, False) == left_closed_interval_0_4
+        with pytest.raises(IllegalClosedArgument):
+            Interval(0, 4, closed='open')
 
 
 class TestAbstractConstraint:
@@ -163,6 +205,8 @@ class TestLinearConstraint:
         assert linear_constraint_standard == linear_constraint_standard_clone
         assert linear_constraint_standard != \
                linear_constraint_standard_not_clone
+        assert hash(linear_constraint_standard) == hash(linear_constraint_standard_clone)
+        assert len({linear_constraint_standard, linear_constraint_standard_clone}) == 1
 
     def test_constraint_check(self, linear_constraint_standard,
                               linear_constraint_infinite_bounds):
@@ -223,6 +267,18 @@ class TestLinearGuard:
         assert standard_linear_guard.guard_check([0, 0], Fraction(1, 5))
         assert standard_linear_guard.enabled_delays_set([0, 0]) == Interval(0, 3)
 
+    def test_debug_checks(self, standard_linear_guard):
+        # The delays are trusted, unless the debug checks are on
+        assert not standard_linear_guard.guard_check([0, 0], 3.5)
+        dtype.set_debug_checks(True)
+        try:
+            with pytest.raises(WrongType):
+                standard_linear_guard.guard_check([0, 0], 3.5)
+            with pytest.raises(WrongType):
+                standard_linear_guard.enabled_delays_set([0, 0.5])
+        finally:
+            dtype.set_debug_checks(False)
+
 
 # TODO :test equality
 
@@ -233,6 +289,15 @@ class TestLabel:
 
         assert standard_linear_label.guard.guard_check([0, 0], Fraction(1, 5))
 
+    def test_hash(self, standard_linear_label, standard_linear_guard):
+        assert {standard_linear_guard: 1}[standard_linear_label.guard] == 1
+        assert standard_linear_label in {standard_linear_label: 1}
+        with pytest.raises(AttributeError):
+            standard_linear_label.resets = [0]
+        extended = standard_linear_guard.add_constraints([LinearConstraint(0, 1, 0)])
+        assert len(extended) == len(standard_linear_guard) + 1 and extended != standard_linear_guard
+        assert pickle.loads(pickle.dumps(standard_linear_label)) == standard_linear_label
+
 
 # TODO: recup these tests to label test
 
@@ -243,17 +308,17 @@ class TestTransition:
         assert transition_empty_reset.data["a"].guard == LinearGuard([
             LinearConstraint(clock_index=0, lower_bound=0, upper_bound=1)
         ])
-        assert transition_empty_reset.data["a"].resets == []
+        assert transition_empty_reset.data["a"].resets == ()
 
         # Multiple guards
         assert transition_1.data["b"].guard == LinearGuard([
             LinearConstraint(clock_index=0, lower_bound=0, upper_bound=1),
             LinearConstraint(clock_index=1, lower_bound=2, upper_bound=3)
         ])
-        assert transition_1.data["b"].resets == [1]
+        assert transition_1.data["b"].resets == (1,)
 
         # Unbounded constraints
         assert transition_2.data["c"].guard == LinearGuard([
             LinearConstraint(clock_index=0, lower_bound=0, upper_bound=+inf),
         ])
-        assert transition_2.data["c"].resets == []
+        assert transition_2.data["c"].resets == ()
@@ -0,0 +1,59 @@
+# coding=utf-8
+
+import pytest
+
+from benchmarks.utility import linear_constructor
+from tests.test_explorer_examples import *
+import pyrobustness.runs.exceptions as exceptions
+import pyrobustness.runs.iterative as iterative
+
+
+def explorations(ta, step, **kwargs):
+    return [cls(ta=ta,
+                start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                interval_sampling_step=step,
+                endpoint_opt=False,
+                **kwargs) for cls in [explorer.Backtracking, iterative.IterativeBacktracking]]
+
+
+class TestIterativeBacktracking:
+    def test_same_results(self, formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2):
+        for ta in [formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2]:
+            for options in [{}, {"memo_opt": False}, {"alpha_beta_opt": False}, {"value_only": True}]:
+                recursive, iterative_explo = explorations(ta, Fraction(1, 3), **options)
+                recursive_trace = recursive.backtracking()
+                iterative_trace = iterative_explo.backtracking()
+                assert recursive_trace.compute_trace_permissiveness() == \
+                    iterative_trace.compute_trace_permissiveness()
+                if not options.get("value_only"):
+                    assert recursive_trace.data == iterative_trace.data
+
+    def test_pause(self, formats_timed_automaton_1):
+        # The greedy rollout alone would solve the root
+        recursive, iterative_explo = explorations(formats_timed_automaton_1, Fraction(1, 4), rollout_opt=False)
+        iterative_explo.start_search()
+        assert iterative_explo.resume_search(max_nodes=1) is None
+        assert iterative_explo.paused()
+        best_trace = None
+        while best_trace is None:
+            best_trace = iterative_explo.resume_search(max_nodes=2)
+        assert not iterative_explo.paused()
+        assert best_trace.data == recursive.backtracking().data
+
+    def test_not_started(self, formats_timed_automaton_1):
+        with pytest.raises(exceptions.SearchNotStarted):
+            explorations(formats_timed_automaton_1, 1)[1].resume_search()
+
+    def test_deep_trace(self):
+        # Too deep for the recursive explorer with the default recursion limit
+        length = 1500
+        ta = creators.timed_automaton_creator(linear_constructor([({0: (0, 1)}, [0]) for _ in range(length)]))
+        explo = iterative.IterativeBacktracking(ta=ta,
+                                                start=timed_auto.Configuration(location=0, valuation=[0]),
+                                                strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                                interval_sampling_step=1,
+                                                trace_bound=length + 1)
+        best_trace = explo.backtracking()
+        assert len(best_trace) == length
+        assert best_trace.compute_trace_permissiveness() == 1
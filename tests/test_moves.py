@@ -1,4 +1,6 @@
 # coding=utf-8
+import pickle
+
 import pyrobustness.runs.moves as moves
 import pyrobustness.ta.interval
 from pyrobustness.ta.timedauto import Configuration
@@ -54,6 +56,33 @@ class TestComputeIntervalLength:
         assert moves.compute_interval_length(two_step_move) == 5
 
 
+class TestMove:
+
+    def test_freeze(self, standard_move, two_step_move, two_step_move_expected_sampling_1):
+        assert moves.freeze_move(two_step_move) == moves.freeze_move(two_step_move_expected_sampling_1[0])
+        assert moves.freeze_move(standard_move) != moves.freeze_move(two_step_move)
+        assert len({moves.freeze_move(move) for move in two_step_move_expected_sampling_1}) == \
+               len(two_step_move_expected_sampling_1)
+
+    def test_dictionary(self, two_step_move):
+        move = moves.freeze_move(two_step_move)
+        # Read as the dictionary it replaces
+        assert move == two_step_move and dict(move) == {"action": "a", "step": tuple(two_step_move["step"])}
+        assert move["action"] == "a" and move["step"][1].target_location == 3 and move.get("interval") is None
+        with pytest.raises(TypeError):
+            move["action"] = "b"
+        with pytest.raises(AttributeError):
+            move.step = ()
+
+    def test_global_interval(self, two_step_move):
+        move = moves.freeze_move(two_step_move)
+        assert move.global_interval == pyrobustness.ta.interval.Interval(0, 5, closed='left')
+        assert moves.global_interval(move) is moves.global_interval(move)
+        assert moves.compute_interval_length(move) == moves.compute_interval_length(two_step_move) == 5
+        copied = pickle.loads(pickle.dumps(move))
+        assert copied == move and copied.global_interval == move.global_interval
+
+
 class TestMoveSampling:
     def test(self, empty_move, standard_move, standard_move_expected_sampling_0_5,
              two_step_move, two_step_move_expected_sampling_1):
@@ -64,3 +93,10 @@ class TestMoveSampling:
 
         assert moves.move_sampling(two_step_move, 1) == \
                two_step_move_expected_sampling_1
+
+    def test_sorted(self, standard_move, two_step_move):
+        for move, step in [(standard_move, Fraction(1, 2)), (two_step_move, 1)]:
+            sampling = list(moves.sorted_move_sampling(move, step))
+            assert sorted(sampling, key=str) == sorted(moves.move_sampling(move, step), key=str)
+            lengths = [moves.compute_interval_length(sampled) for sampled in sampling]
+            assert lengths == sorted(lengths, reverse=True)
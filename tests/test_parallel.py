@@ -0,0 +1,77 @@
+# coding=utf-8
+
+import math
+
+import pytest
+
+from tests.test_explorer_examples import *
+import pyrobustness.runs.parallel as parallel
+
+
+def parallel_exploration(ta, step, **kwargs):
+    return parallel.ParallelBacktracking(ta=ta,
+                                         start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+                                         strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                         interval_sampling_step=step,
+                                         **kwargs)
+
+
+class TestParallelBacktracking:
+    def test_same_results(self, monkeypatch, formats_timed_automaton_0, formats_timed_automaton_1,
+                          formats_timed_automaton_2):
+        # Split up to split_depth whatever the number of tasks
+        monkeypatch.setattr(parallel, "TASKS_PER_JOB", math.inf)
+        for ta in [formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2]:
+            for options in [{}, {"endpoint_opt": False}]:
+                sequential = parallel_exploration(ta, Fraction(1, 3), **options).backtracking()
+                for split_depth in [1, 2, 3]:
+                    explo = parallel_exploration(ta, Fraction(1, 3), jobs=2, split_depth=split_depth, **options)
+                    assert explo.backtracking().compute_trace_permissiveness() == \
+                        sequential.compute_trace_permissiveness()
+
+    def test_deterministic(self, formats_timed_automaton_1):
+        traces = [parallel_exploration(formats_timed_automaton_1, Fraction(1, 4), jobs=2).backtracking().data
+                  for _ in range(3)]
+        assert traces[0] == traces[1] == traces[2]
+
+    def test_split_filter(self, formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2):
+        # The split moves are the ones the sequential search does not prune at once
+        for ta in [formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2]:
+            explo = parallel_exploration(ta, Fraction(1, 4), jobs=2, endpoint_opt=False)
+            explo.prepare_search()
+            root = explo._split(explo.start, explo.root_trace(), 1)
+            assert all(explo.filter_poss(split_move.move, root.seed) and explo.bound_poss(split_move.move, root.seed)
+                       for split_move in root.moves)
+        # The seed trace of the root is already optimal: no task
+        explo = parallel_exploration(formats_timed_automaton_1, Fraction(1, 4), jobs=2)
+        explo.prepare_search()
+        root = explo._split(explo.start, explo.root_trace(), 1)
+        assert not root.moves
+        assert explo.backtracking().compute_trace_permissiveness() == root.seed.compute_trace_permissiveness() == \
+            parallel_exploration(formats_timed_automaton_1, Fraction(1, 4)).backtracking().compute_trace_permissiveness()
+
+    def test_split_endpoints(self, formats_timed_automaton_0):
+        # Against the branch free opponent the tasks are the ends of the intervals, as in _backtrack_endpoints
+        explo = parallel_exploration(formats_timed_automaton_0, Fraction(1, 4), jobs=2)
+        explo.prepare_search()
+        root = explo._split(explo.start, explo.root_trace(), 1)
+        assert root.moves
+        for split_move in root.moves:
+            assert isinstance(split_move, parallel.SplitEndpoints)
+            assert explo.move_bound(split_move.max_move) > root.seed.compute_trace_permissiveness()
+            assert set(split_move.ends) == set(split_move.lefts + split_move.rights)
+            assert all(task.method == "evaluate_node" for task in split_move.tasks())
+        sampled = parallel_exploration(formats_timed_automaton_0, Fraction(1, 4), jobs=2, endpoint_opt=False)
+        sampled.prepare_search()
+        assert len(root.tasks()) < len(sampled._split(sampled.start, sampled.root_trace(), 1).tasks())
+
+    def test_speedup(self, formats_timed_automaton_0):
+        report = parallel_exploration(formats_timed_automaton_0, Fraction(1, 4), jobs=2).speedup()
+        assert report.jobs == 2
+        assert report.permissiveness == parallel_exploration(formats_timed_automaton_0, Fraction(1, 4)) \
+            .backtracking().compute_trace_permissiveness()
+        assert report.speedup == report.sequential_time / report.parallel_time
+
+    def test_split_depth(self, formats_timed_automaton_1):
+        with pytest.raises(ValueError):
+            parallel_exploration(formats_timed_automaton_1, 1, jobs=2, split_depth=0)
@@ -0,0 +1,47 @@
+# coding=utf-8
+from fractions import Fraction
+import math
+
+from pyrobustness.ta.polyhedron import Constraint, Polyhedron, maximize
+
+
+def constraint(coefficients, bound):
+    return Constraint(tuple(Fraction(c) for c in coefficients), Fraction(bound))
+
+
+def unit_square():
+    return Polyhedron(2, [constraint((1, 0), 1), constraint((-1, 0), 0),
+                          constraint((0, 1), 1), constraint((0, -1), 0)])
+
+
+class TestPolyhedron:
+    def test_maximize(self):
+        assert unit_square().maximize((1, 1)) == 2
+        assert unit_square().maximize((-1, 2)) == 2
+        assert maximize((1, 0), [constraint((0, 1), 1)]) == math.inf
+        assert maximize((1, 0), [constraint((1, 0), -1), constraint((-1, 0), 0)]) == -math.inf
+
+    def test_is_empty(self):
+        assert not unit_square().is_empty()
+        assert unit_square().intersection([constraint((1, 1), Fraction(-1, 2))]).is_empty()
+
+    def test_contains(self):
+        assert [Fraction(1, 2), 1] in unit_square()
+        assert [Fraction(3, 2), 0] not in unit_square()
+
+    def test_minimize(self):
+        square = unit_square().intersection([constraint((1, 1), 5), constraint((2, 0), 4)])
+        assert len(square.constraints) == 5
+        assert set(square.minimize().constraints) == set(unit_square().constraints)
+
+    def test_eliminate(self):
+        # 1 <= x, x + y <= 3, 0 <= y: x is in [1, 3]
+        triangle = Polyhedron(2, [constraint((-1, 0), -1), constraint((1, 1), 3), constraint((0, -1), 0)])
+        projection = triangle.eliminate(1).minimize()
+        assert projection.maximize((1,)) == 3
+        assert projection.maximize((-1,)) == -1
+
+    def test_includes(self):
+        small = unit_square().intersection([constraint((1, 0), Fraction(1, 2))])
+        assert unit_square().includes(small)
+        assert not small.includes(unit_square())
@@ -0,0 +1,76 @@
+# coding=utf-8
+
+import math
+
+import pytest
+
+from benchmarks.bench_automata import formats_1, formats_1_with_cycle, formats_non_branch_free
+from tests.test_explorer_examples import *
+import pyrobustness.runs.exceptions as exceptions
+import pyrobustness.runs.symbolic as symbolic
+from pyrobustness.ta.polyhedron import Constraint, Polyhedron
+
+
+def constant_piece(value, left, right):
+    # value on [left, right], for one clock
+    return symbolic.ConcavePiece(Polyhedron(2, [Constraint((Fraction(0), Fraction(1)), Fraction(value)),
+                                                Constraint((Fraction(1), Fraction(0)), Fraction(right)),
+                                                Constraint((Fraction(-1), Fraction(0)), Fraction(-left))]))
+
+
+class TestSymbolicPermissiveness:
+    def test_known_values(self):
+        # Permissiveness of experiment_precision and experiment_precision_nbf
+        assert symbolic.SymbolicPermissiveness(formats_1()).permissiveness(
+            0, [Fraction(1, 5), Fraction(2, 3)]) == Fraction(4, 15)
+        assert symbolic.SymbolicPermissiveness(formats_non_branch_free()).permissiveness(
+            0, [Fraction(1, 4), Fraction(7, 10)]) == Fraction(11, 40)
+
+    def test_explorer(self, formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2):
+        # Three intervals in [0, 1]: only a sampling step of 1/3 finds 1/3
+        engine = symbolic.SymbolicPermissiveness(formats_timed_automaton_0)
+        assert engine.permissiveness(0, [0]) == Fraction(1, 3)
+        for ta in [formats_timed_automaton_1, formats_timed_automaton_2]:
+            engine = symbolic.SymbolicPermissiveness(ta)
+            for valuation in [[0, 0], [Fraction(1, 2), 0]]:
+                explo = explorer.Backtracking(ta=ta,
+                                              start=timed_auto.Configuration(location=0, valuation=valuation),
+                                              strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                              interval_sampling_step=Fraction(1, 4))
+                assert engine.permissiveness(0, valuation) == explo.backtracking().compute_trace_permissiveness()
+
+    def test_goal_and_dead_end(self, formats_timed_automaton_1):
+        engine = symbolic.SymbolicPermissiveness(formats_timed_automaton_1)
+        assert engine.permissiveness(formats_timed_automaton_1.goal_location, [0, 0]) == math.inf
+        # The guard of the first edge can not be checked anymore
+        assert engine.permissiveness(0, [2, 0]) == -math.inf
+
+    def test_chain(self):
+        # The target is 3 on [0, 2] and on [2, 4]: no piece covers [0, 3] alone
+        engine = symbolic.SymbolicPermissiveness.__new__(symbolic.SymbolicPermissiveness)
+        engine.number_clocks = 1
+        label = guards.Label(guards.LinearGuard([guards.LinearConstraint(0, 4, 0)]), [])
+        target = symbolic.PermissivenessFunction(1, [constant_piece(3, 0, 2), constant_piece(3, 2, 4)])
+        function = symbolic.PermissivenessFunction(1, engine.edge_pieces(label, target))
+        assert function([0]) == 3
+        assert function([3]) == 1
+
+    def test_chain_pruning(self, monkeypatch):
+        # Six pieces 3 on [k, k + 2]: 1956 ordered chains, most of them
+        # with a useless piece
+        engine = symbolic.SymbolicPermissiveness.__new__(symbolic.SymbolicPermissiveness)
+        engine.number_clocks = 1
+        windows = []
+        window = engine.window
+        monkeypatch.setattr(engine, "window", lambda guard, chain: windows.append(chain) or window(guard, chain))
+        label = guards.Label(guards.LinearGuard([guards.LinearConstraint(0, 8, 0)]), [])
+        target = symbolic.PermissivenessFunction(1, [constant_piece(3, k, k + 2) for k in range(6)])
+        function = symbolic.PermissivenessFunction(1, engine.edge_pieces(label, target))
+        assert [function([x]) for x in [0, 4, Fraction(9, 2), 7, Fraction(15, 2)]] == [3, 3, Fraction(5, 2), 0,
+                                                                                     -math.inf]
+        assert len(windows) < 100
+        assert len(function) == 2
+
+    def test_cyclic(self):
+        with pytest.raises(exceptions.WrongTimedAutomatonClass):
+            symbolic.SymbolicPermissiveness(formats_1_with_cycle())
@@ -0,0 +1,55 @@
+# coding=utf-8
+
+import math
+
+import pytest
+
+from tests.test_explorer_examples import *
+import pyrobustness.runs.threshold as threshold
+
+
+def exploration(ta, step, cls=explorer.Backtracking, **kwargs):
+    return cls(ta=ta,
+               start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+               strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+               interval_sampling_step=step,
+               **kwargs)
+
+
+class TestThresholdBacktracking:
+    def test_decide(self, formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2):
+        for ta in [formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2]:
+            permissiveness = exploration(ta, Fraction(1, 3)).backtracking().compute_trace_permissiveness()
+            for options in [{}, {"endpoint_opt": False}, {"integer_ticks": True}]:
+                explo = exploration(ta, Fraction(1, 3), cls=threshold.ThresholdBacktracking, **options)
+                for value in [0, Fraction(1, 3), Fraction(1, 2), 1, 2]:
+                    assert explo.decide(value) == (permissiveness >= value)
+                assert explo.decide(permissiveness)
+                assert not explo.decide(permissiveness + Fraction(1, 100))
+
+    def test_table(self, formats_timed_automaton_1):
+        explo = exploration(formats_timed_automaton_1, Fraction(1, 4), cls=threshold.ThresholdBacktracking)
+        assert explo.decide(Fraction(1, 2))
+        nodes = explo.nodes
+        # Answered by the table: a lower threshold is reached too
+        assert explo.decide(Fraction(1, 4))
+        assert explo.nodes == nodes + 1
+
+    def test_bisection(self, formats_timed_automaton_1, formats_timed_automaton_2):
+        for ta in [formats_timed_automaton_1, formats_timed_automaton_2]:
+            permissiveness = exploration(ta, Fraction(1, 4)).backtracking().compute_trace_permissiveness()
+            low, high = exploration(ta, Fraction(1, 4), cls=threshold.ThresholdBacktracking).bisection(
+                Fraction(1, 100))
+            # The permissiveness may be the bound of the explorer: low = high
+            assert low <= permissiveness < high or low == high == permissiveness
+            assert high - low <= Fraction(1, 100)
+        with pytest.raises(ValueError):
+            exploration(formats_timed_automaton_1, 1, cls=threshold.ThresholdBacktracking).bisection(0)
+
+    def test_unreachable_goal(self, formats_timed_automaton_1):
+        explo = threshold.ThresholdBacktracking(ta=formats_timed_automaton_1,
+                                                start=timed_auto.Configuration(location=0, valuation=[10, 10]),
+                                                strategy_opponent=strategy.worst_case_branch_free_opponent_strategy(),
+                                                interval_sampling_step=1)
+        assert not explo.decide(0)
+        assert explo.bisection(1) == (-math.inf, 0)
@@ -0,0 +1,83 @@
+# coding=utf-8
+
+import math
+
+import pytest
+
+from tests.test_explorer_examples import *
+import pyrobustness.runs.exceptions as exceptions
+import pyrobustness.runs.iterative as iterative
+import pyrobustness.runs.ticks as ticks
+
+
+def exploration(ta, step, strategy_opponent, cls=explorer.Backtracking, **kwargs):
+    return cls(ta=ta,
+               start=timed_auto.Configuration(location=0, valuation=[0, 0]),
+               strategy_opponent=strategy_opponent,
+               interval_sampling_step=step,
+               **kwargs)
+
+
+class TestTickScale:
+    def test_for_search(self, formats_timed_automaton_1):
+        start = timed_auto.Configuration(location=0, valuation=[0, Fraction(1, 2)])
+        scale = ticks.TickScale.for_search(formats_timed_automaton_1, start, Fraction(1, 3),
+                                           strategy.worst_case_brut_force_opponent_strategy(Fraction(1, 5)))
+        assert scale.denominator == 30
+
+    def test_conversion(self):
+        scale = ticks.TickScale(6)
+        assert scale.to_ticks(Fraction(1, 3)) == 2
+        assert type(scale.to_ticks(Fraction(1, 3))) == int
+        assert scale.to_ticks(math.inf) == math.inf
+        assert scale.from_ticks(2) == Fraction(1, 3)
+        with pytest.raises(exceptions.NotOnTickGrid):
+            scale.to_ticks(Fraction(1, 4))
+
+
+class TestIntegerTicks:
+    def test_same_results(self, formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2):
+        strategies = [strategy.worst_case_branch_free_opponent_strategy,
+                      lambda: strategy.worst_case_brut_force_opponent_strategy(Fraction(1, 2)),
+                      strategy.up_case_opponent_strategy]
+        for ta in [formats_timed_automaton_0, formats_timed_automaton_1, formats_timed_automaton_2]:
+            for opponent in strategies:
+                expected = exploration(ta, Fraction(1, 3), opponent()).backtracking()
+                trace = exploration(ta, Fraction(1, 3), opponent(), integer_ticks=True).backtracking()
+                assert trace.compute_trace_permissiveness() == expected.compute_trace_permissiveness()
+                assert trace.data == expected.data
+
+    def test_result_types(self, formats_timed_automaton_1):
+        # With or without integer_ticks, the delays and the interval bounds of the trace are Fraction
+        for integer_ticks in [False, True]:
+            explo = exploration(formats_timed_automaton_1, 1, strategy.worst_case_branch_free_opponent_strategy(),
+                                integer_ticks=integer_ticks)
+            trace = explo.backtracking()
+            assert type(trace.compute_trace_permissiveness()) == Fraction
+            for node in trace:
+                assert type(node.delay) == Fraction
+                assert all(type(bound) == Fraction for step in node.move["step"]
+                           for bound in (step.interval.left, step.interval.right))
+            # The search itself works on int ticks
+            constraint = next(iter(explo.ta[0][1].values())).guard.constraints[0]
+            assert (type(constraint.interval.left) == int) == integer_ticks
+
+    def test_options(self, formats_timed_automaton_1):
+        expected = exploration(formats_timed_automaton_1, Fraction(1, 4),
+                               strategy.worst_case_branch_free_opponent_strategy()).backtracking()
+        for cls, options in [(explorer.Backtracking, {"value_only": True}),
+                             (iterative.IterativeBacktracking, {})]:
+            trace = exploration(formats_timed_automaton_1, Fraction(1, 4),
+                                strategy.worst_case_branch_free_opponent_strategy(), cls=cls,
+                                integer_ticks=True, **options).backtracking()
+            assert trace.compute_trace_permissiveness() == expected.compute_trace_permissiveness()
+
+    def test_custom_strategy(self, formats_timed_automaton_1):
+        branch_free = strategy.worst_case_branch_free_opponent_strategy()
+
+        def opponent(move):
+            return branch_free(move)
+
+        expected = exploration(formats_timed_automaton_1, Fraction(1, 4), opponent).backtracking()
+        trace = exploration(formats_timed_automaton_1, Fraction(1, 4), opponent, integer_ticks=True).backtracking()
+        assert trace.data == expected.data
@@ -1,7 +1,10 @@
 # coding=utf-8
+from fractions import Fraction
+
 from tests.test_timedauto_examples import *
 from pyrobustness.ta.timedauto import *
 from pyrobustness.ta.exceptions import *
+from pyrobustness.ta.creators import configuration_creator
 
 
 # TODO(Test for each method at least two examples to verify its accuracy.)
@@ -10,6 +13,13 @@ from pyrobustness.ta.exceptions import *
 # TODO(Parameter tab)
 
 
+class TestFreezeConfiguration:
+    def test_freeze_configuration(self):
+        frozen = freeze_configuration(Configuration(location=0, valuation=[0, Fraction(1, 2)]))
+        assert frozen.valuation == (0, Fraction(1, 2))
+        assert frozen in {Configuration(location=0, valuation=(Fraction(0), Fraction(1, 2)))}
+
+
 class TestEdgeForm:
     def test_edge_form(self, transition_empty_reset, transition_1,
                        transition_2):
@@ -188,6 +198,33 @@ class TestTATimedAutomatonMethods:
         with pytest.raises(nx.NetworkXUnbounded):
             timed_automaton_infinite.existence_infinite_weighted_path(location=0)
 
+    def test_widest_path_bounds(self, timed_automaton_0, timed_automaton_1):
+        assert timed_automaton_0.widest_path_bounds() == {0: 1, 1: math.inf}
+        assert timed_automaton_0.transition_capacity(0, 0) == math.inf
+        # The bounds are computed again when the timed automaton changes
+        timed_automaton_0.change_end_location(0)
+        assert timed_automaton_0.widest_path_bounds() == {0: math.inf, 1: -math.inf}
+        assert timed_automaton_1.widest_path_bounds()[0] == timed_automaton_1.transition_capacity(0, 1)
+
+    def test_clock_ceilings(self, timed_automaton_0, timed_automaton_1):
+        # The unbounded guard of the loop of timed_automaton_0 does not count
+        assert timed_automaton_0.clock_ceilings() == [1]
+        assert timed_automaton_1.clock_ceilings() == [1, 3]
+
+    def test_check_configuration(self, timed_automaton_1):
+        timed_automaton_1.check_configuration(Configuration(location=0, valuation=[0, Fraction(1, 2)]))
+        assert configuration_creator(0, (0, math.inf), timed_automaton_1).valuation == [0, math.inf]
+        with pytest.raises(LocationNotFoundException):
+            timed_automaton_1.check_configuration(Configuration(location=5, valuation=[0, 0]))
+        with pytest.raises(ValuationSizeException):
+            timed_automaton_1.check_configuration(Configuration(location=0, valuation=[0]))
+        with pytest.raises(WrongType):
+            timed_automaton_1.check_configuration(Configuration(location=0, valuation=[0, 0.5]))
+        with pytest.raises(NegativeIntervalException):
+            timed_automaton_1.check_configuration(Configuration(location=0, valuation=[0, -1]))
+        with pytest.raises(WrongType):
+            configuration_creator(0, [0.5])
+
     def test_well_formed_graph(self, timed_automaton_0, timed_automaton_1,
                                timed_automaton_6):
         assert timed_automaton_0.is_well_formed()